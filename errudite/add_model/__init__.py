@@ -0,0 +1,38 @@
+from typing import List
+from tqdm import tqdm
+
+from ..targets.instance import Instance
+from ..targets.label import Label
+from ..predictors import Predictor
+
+# { task class: { kwarg of model_predict_batch: instance entry } }
+TASK_INPUTS = {
+    'qa_task_class': { 'questions': 'question', 'contexts': 'context', 'groundtruths': 'groundtruths' },
+    'vqa_task_class': { 'question': 'question', 'groundtruths': 'groundtruths' },
+    'nli_task_class': { 'premise': 'premise', 'hypothesis': 'hypothesis', 'groundtruth': 'groundtruth' },
+    'sentiment_task_class': { 'query': 'query', 'groundtruth': 'groundtruth' }
+}
+
+def predict_instances(
+    predictor: Predictor, 
+    instances: List[Instance], 
+    task_class: str, 
+    batch_size: int=256) -> List[Label]:
+    """Run a predictor on the instances, with ``model_predict_batch``.
+    
+    Arguments:
+        predictor {Predictor} -- the predictor, with a runnable model.
+        instances {List[Instance]} -- the instances, original or rewritten.
+        task_class {str} -- the task class, which decides the inputs. A key of ``TASK_INPUTS``.
+        batch_size {int} -- the number of instances per call. (default: {256})
+    
+    Returns:
+        List[Label] -- the predictions, aligned with the instances. None if the prediction failed.
+    """
+    inputs = TASK_INPUTS[task_class]
+    predictions = []
+    for start in tqdm(range(0, len(instances), batch_size)):
+        batch = instances[start:start+batch_size]
+        predictions += predictor.model_predict_batch(predictor, **{
+            kwarg: [ i.get_entry(entry) for i in batch ] for kwarg, entry in inputs.items() })
+    return predictions
@@ -0,0 +1,76 @@
+import sys
+import requests
+
+sys.path.append("..")
+sys.path.append("../..")
+import traceback
+import argparse
+import logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+from ..io import DatasetReader
+from ..targets.instance import Instance
+from ..predictors import Predictor
+from . import TASK_INPUTS, predict_instances
+
+def get_args():
+    """Get the user arguments
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cache_path', 
+        required=True, 
+        help='The cache folder of the preprocessed dataset.')
+    parser.add_argument('--name', 
+        required=True, 
+        help='The model name. The predictions are saved to evaluations/[name].pkl.')
+    parser.add_argument('--model_class', 
+        required=True, 
+        help='The registered predictor class, e.g., bidaf.')
+    parser.add_argument('--model_path', 
+        default=None, 
+        help='The local path of the model archive.')
+    parser.add_argument('--model_online_path', 
+        default=None, 
+        help='The online path of the model archive.')
+    parser.add_argument('--description', 
+        default='', 
+        help='A sentence describing the model.')
+    parser.add_argument('--task_class', 
+        default='qa_task_class', 
+        choices=list(TASK_INPUTS.keys()),
+        help='The task class, which decides the inputs of the model.')
+    parser.add_argument('--batch_size', 
+        type=int, 
+        default=256, 
+        help='The number of instances per model_predict_batch call.')
+    parser.add_argument('--server', 
+        default=None, 
+        help='The url of a running server, e.g., http://localhost:5000. If set, the ' + 
+            'server session adds the model without reloading; otherwise only the caches are updated.')
+    args = parser.parse_args()
+    return args
+
+args = get_args()
+try:
+    reader = DatasetReader(args.cache_path)
+    reader.load_preprocessed()
+    instances = list(Instance.instance_hash.values())
+    predictor = Predictor.create_from_json({
+        'model_class': args.model_class,
+        'name': args.name,
+        'description': args.description,
+        'model_path': args.model_path,
+        'model_online_path': args.model_online_path
+    })
+    predictions = [ p for p in predict_instances(predictor, instances, args.task_class, args.batch_size) if p ]
+    file_path = reader.dump_predictions(args.name, predictions)
+    logger.info(f"Predicted {len(predictions)}/{len(instances)} instances with [ {args.name} ].")
+    if args.server:
+        output = requests.get(f'{args.server.rstrip("/")}/api/add_model_predictions/{args.name}').json()
+        logger.info(f"Added [ {args.name} ] to the server session: {output}")
+    else:
+        reader.add_model_predictions(args.name, file_path)
+except Exception as e:
+    logger.error(e)
+    traceback.print_exc()
@@ -262,7 +262,7 @@ class BuildBlockDetectorVQA(BuildBlockDetector):
             separate = target.split('::')
             groundtruths = self.instance.get_entry("groundtruths") or []
             if len(separate) == 2:
-                groundtruths = [g for g in groundtruths if g.doc.text == separate[1] ]
+                groundtruths = [g for g in groundtruths if g.label == separate[1] ]
             if groundtruths:
                 self.targets.append(
                     TargetMeta(
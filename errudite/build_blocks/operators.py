@@ -1,6 +1,7 @@
 import traceback
 import functools
-from typing import Dict, NamedTuple, List
+import numpy as np
+from typing import Dict, NamedTuple, List, Tuple
 from collections import defaultdict
 
 from .prim_func import PrimFunc
@@ -41,6 +42,17 @@ class OpNode(object):
         #    " : This is a undefined class!"))
         return DEFAULT_RETURN
 
+    def collect_batch_values(self, 
+        instance_groups: List[Dict[str, Instance]],
+        batch_cache: Dict[int, List[OpNodeReturn]],
+        rewrite_type: str=UNREWRITTEN_RID, **kwargs) -> None:
+        """Precompute the values of all the batchable function subtrees, 
+        for all the instance groups, and save them to ``batch_cache`` as 
+        ``{ id(node): [ OpNodeReturn per instance group ] }``. ``get_value`` 
+        then reads the values with ``batch_cache`` and ``batch_idx``.
+        """
+        pass
+
 class NoneNode(OpNode):
     """The None value
     """
@@ -100,6 +112,17 @@ class LogicOp(OpNode):
 
     def __repr__(self) -> str:
         return f"[{self.__class__.__name__}]({self.operator}):{self.operands}"
+
+    def collect_batch_values(self, 
+        instance_groups: List[Dict[str, Instance]],
+        batch_cache: Dict[int, List[OpNodeReturn]],
+        rewrite_type: str=UNREWRITTEN_RID, **kwargs) -> None:
+        for op in self.operands:
+            if isinstance(op, OpNode):
+                op.collect_batch_values(
+                    instance_groups=instance_groups, 
+                    batch_cache=batch_cache, 
+                    rewrite_type=rewrite_type, **kwargs)
     
     def _get_operand_value(self, 
         op, 
@@ -113,6 +136,10 @@ class LogicOp(OpNode):
             [list] -- A list of operand values
         """
         try:
+            batch_cache, batch_idx = kwargs.get('batch_cache', None), kwargs.get('batch_idx', None)
+            if isinstance(op, OpNode) and batch_cache and batch_idx is not None and \
+                id(op) in batch_cache and batch_cache[id(op)][batch_idx] is not None:
+                return batch_cache[id(op)][batch_idx]
             if isinstance(op, OpNode):
                 return op.get_value(
                     instance_group=instance_group, 
@@ -188,6 +215,65 @@ class BinOp(LogicOp):
     """
     def __init__(self, tokens):
         LogicOp.__init__(self, tokens[0][1], tokens[0][::2])
+
+    def _logic_step(self, results: any, operand: OpNodeReturn) -> Tuple[any, bool]:
+        """Apply ``and``/``or`` to the result so far and one more operand.
+        
+        Returns:
+            Tuple[any, bool] -- the new result, and whether it decides the output 
+                (so the later operands are skipped). The result is None if the operand is invalid.
+        """
+        if operand == None or not isinstance(operand, OpNodeReturn):
+            return None, True
+        value = f'"{operand.value}"' if type(operand.value) == str else operand.value
+        if value == None:
+            return False, True
+        cur_input = eval(f'{value}')
+        if cur_input == None:
+            #print(f'{self.operands[idx]} is None!!')
+            return False, True
+        results = eval(f'{results} {self.operator} {cur_input}')
+        return results, (results == True and self.operator == 'or') or \
+            (results == False and self.operator == 'and')
+
+    def collect_batch_values(self, 
+        instance_groups: List[Dict[str, Instance]],
+        batch_cache: Dict[int, List[OpNodeReturn]],
+        rewrite_type: str=UNREWRITTEN_RID, **kwargs) -> None:
+        if self.operator not in ['and', 'or'] or 'attr_hash' not in kwargs:
+            return LogicOp.collect_batch_values(self, 
+                instance_groups=instance_groups, batch_cache=batch_cache, 
+                rewrite_type=rewrite_type, **kwargs)
+        # short-circuit: an operand is only batched for the groups that are not
+        # decided by the earlier operands. The decided groups are replaced by 
+        # empty placeholders, so the batch values stay aligned with the groups.
+        groups = list(instance_groups)
+        results = [ True if self.operator == 'and' else False ] * len(groups)
+        for op_idx, op in enumerate(self.operands):
+            if not isinstance(op, OpNode):
+                continue
+            op.collect_batch_values(
+                instance_groups=groups, batch_cache=batch_cache, 
+                rewrite_type=rewrite_type, **kwargs)
+            if op_idx == len(self.operands) - 1:
+                break
+            values = []
+            for batch_idx, group in enumerate(groups):
+                value = DEFAULT_RETURN
+                if group:
+                    try:
+                        value = self._get_operand_value(op, 
+                            instance_group=group, rewrite_type=rewrite_type, 
+                            batch_cache=batch_cache, batch_idx=batch_idx, **kwargs)
+                        results[batch_idx], decided = self._logic_step(results[batch_idx], value)
+                        if decided:
+                            groups[batch_idx] = {}
+                    except:
+                        # not cached, so get_value raises it for this group.
+                        value = None
+                values.append(value)
+            # so ``get_value`` does not compute the operand again.
+            batch_cache[id(op)] = values
     
     def get_value(self, 
         instance_group: Dict[str, Instance],
@@ -204,26 +290,17 @@ class BinOp(LogicOp):
             output_keys = []
             if self.operator in ['and', 'or']:
                 results = True if self.operator == 'and' else False
-                for idx, op in enumerate(self.operands):
+                for op in self.operands:
                     operand = self._get_operand_value(
                         op, 
                         instance_group=instance_group,
                         rewrite_type=rewrite_type,
                         attr_hash=attr_hash, group_hash=group_hash, **kwargs)
-                    if operand == None or not isinstance(operand, OpNodeReturn):
+                    results, decided = self._logic_step(results, operand)
+                    if results is None:
                         return DEFAULT_RETURN
                     output_keys += operand.key
-                    value = f'"{operand.value}"' if type(operand.value) == str else operand.value
-                    if value == None:
-                        return OpNodeReturn(output_keys, False)
-                    cur_input = eval(f'{value}')
-                    if cur_input == None:
-                        #print(f'{self.operands[idx]} is None!!')
-                        return OpNodeReturn(output_keys, False)
-                    results = eval(f'{results} {self.operator} {cur_input}')
-                    if results == True and self.operator == 'or':
-                        return OpNodeReturn(output_keys, results)
-                    if results == False and self.operator == 'and':
+                    if decided:
                         return OpNodeReturn(output_keys, results)
                 return OpNodeReturn(output_keys, results)
             else:
@@ -265,6 +342,47 @@ class KwargOp(OpNode):
     def __repr__(self) -> str:
         return f"""{self.__class__.__name__}({self.key}):{self.value}"""
 
+    def collect_batch_values(self, 
+        instance_groups: List[Dict[str, Instance]],
+        batch_cache: Dict[int, List[OpNodeReturn]],
+        rewrite_type: str=UNREWRITTEN_RID, **kwargs) -> None:
+        if isinstance(self.value, OpNode):
+            self.value.collect_batch_values(
+                instance_groups=instance_groups, 
+                batch_cache=batch_cache, 
+                rewrite_type=rewrite_type, **kwargs)
+
+    def get_batch_value(self, 
+        instance_groups: List[Dict[str, Instance]],
+        batch_cache: Dict[int, List[OpNodeReturn]],
+        rewrite_type: str=UNREWRITTEN_RID) -> List[OpNodeReturn]:
+        """Get the values for all the instance groups, in batch.
+        
+        Returns:
+            List[OpNodeReturn] -- the (key, value) tuples, aligned with the instance groups.
+            ``None`` if the value cannot be computed in batch.
+        """
+        if isinstance(self.value, FuncOp):
+            outputs = self.value.get_batch_value(
+                instance_groups=instance_groups, 
+                batch_cache=batch_cache, rewrite_type=rewrite_type)
+            if outputs is None:
+                return None
+            return [ OpNodeReturn(key=o.key, value=(self.key, o.value)) for o in outputs ]
+        elif isinstance(self.value, OpNode):
+            return None
+        outputs = []
+        for instance_group in instance_groups:
+            output = OpNodeReturn(key=[], value=(self.key, self.value))
+            if rewrite_type in instance_group and self.key != "target_type":
+                instance = instance_group[rewrite_type]
+                if instance.get_entry(self.value) != None:
+                    output = OpNodeReturn(
+                        key=[ instance.key() ],
+                        value=(self.key, instance.get_entry(self.value)))
+            outputs.append(output)
+        return outputs
+
     def get_value(self, 
         instance_group: Dict[str, Instance],
         attr_hash: Dict[str, 'Attribute'], 
@@ -302,7 +420,45 @@ class ArgOp(OpNode):
         self.key = tokens[0][0]
     def __repr__(self) -> str:
         return "{}:{}".format(self.__class__.__name__, self.key)
-    
+
+    def collect_batch_values(self, 
+        instance_groups: List[Dict[str, Instance]],
+        batch_cache: Dict[int, List[OpNodeReturn]],
+        rewrite_type: str=UNREWRITTEN_RID, **kwargs) -> None:
+        if isinstance(self.key, OpNode):
+            self.key.collect_batch_values(
+                instance_groups=instance_groups, 
+                batch_cache=batch_cache, 
+                rewrite_type=rewrite_type, **kwargs)
+
+    def get_batch_value(self, 
+        instance_groups: List[Dict[str, Instance]],
+        batch_cache: Dict[int, List[OpNodeReturn]],
+        rewrite_type: str=UNREWRITTEN_RID) -> List[OpNodeReturn]:
+        """Get the values for all the instance groups, in batch.
+        
+        Returns:
+            List[OpNodeReturn] -- the values, aligned with the instance groups.
+            ``None`` if the value cannot be computed in batch.
+        """
+        if isinstance(self.key, FuncOp):
+            return self.key.get_batch_value(
+                instance_groups=instance_groups, 
+                batch_cache=batch_cache, rewrite_type=rewrite_type)
+        elif isinstance(self.key, OpNode):
+            return None
+        outputs = []
+        for instance_group in instance_groups:
+            output = OpNodeReturn(key=[], value=self.key)
+            if rewrite_type in instance_group:
+                instance = instance_group[rewrite_type]
+                if instance.get_entry(self.key) != None:
+                    output = OpNodeReturn(
+                        key=[ instance.key() ],
+                        value=instance.get_entry(self.key))
+            outputs.append(output)
+        return outputs
+
     def get_value(self, 
         instance_group: Dict[str, Instance],
         attr_hash: Dict[str, 'Attribute'], 
@@ -348,6 +504,86 @@ class FuncOp(OpNode):
         else:
             self.rewrite_type = UNREWRITTEN_RID
 
+    def _resolve_rewrite_type(self, rewrite_type: str) -> str:
+        # if the input type is the default, but we know it should not be default
+        # overwrite
+        if self.rewrite_type != UNREWRITTEN_RID and rewrite_type == UNREWRITTEN_RID:
+            rewrite_type = self.rewrite_type
+        return Instance.resolve_default_rewrite(rewrite_type)
+
+    def collect_batch_values(self, 
+        instance_groups: List[Dict[str, Instance]],
+        batch_cache: Dict[int, List[OpNodeReturn]],
+        rewrite_type: str=UNREWRITTEN_RID, **kwargs) -> None:
+        outputs = self.get_batch_value(
+            instance_groups=instance_groups, 
+            batch_cache=batch_cache, rewrite_type=rewrite_type)
+        if outputs is not None:
+            return
+        # not batchable as a whole. Try the subtrees.
+        rewrite_type = self._resolve_rewrite_type(rewrite_type)
+        for a in self.args + self.kwargs:
+            if isinstance(a, OpNode):
+                a.collect_batch_values(
+                    instance_groups=instance_groups, 
+                    batch_cache=batch_cache, 
+                    rewrite_type=rewrite_type, **kwargs)
+
+    def get_batch_value(self, 
+        instance_groups: List[Dict[str, Instance]],
+        batch_cache: Dict[int, List[OpNodeReturn]],
+        rewrite_type: str=UNREWRITTEN_RID) -> List[OpNodeReturn]:
+        """Get the values for all the instance groups, with the batch version 
+        of the primitive function. Only works if the function has a batch version, 
+        and all the args and kwargs can also be computed in batch.
+        
+        Returns:
+            List[OpNodeReturn] -- the values, aligned with the instance groups.
+            ``None`` if the value cannot be computed in batch.
+        """
+        if id(self) in batch_cache:
+            return batch_cache[id(self)]
+        if not PrimFunc.has_batch(self.func_name):
+            return None
+        rewrite_type = self._resolve_rewrite_type(rewrite_type)
+        idxes = [ idx for idx, g in enumerate(instance_groups) if rewrite_type in g ]
+        if not idxes:
+            return None
+        instances = [ instance_groups[idx][rewrite_type] for idx in idxes ]
+        args_output, kwargs_output = [], []
+        for a, outputs in [ (a, args_output) for a in self.args ] + \
+            [ (a, kwargs_output) for a in self.kwargs ]:
+            if not isinstance(a, (ArgOp, KwargOp, FuncOp)):
+                return None
+            output = a.get_batch_value(
+                instance_groups=instance_groups, 
+                batch_cache=batch_cache, rewrite_type=rewrite_type)
+            if output is None:
+                return None
+            outputs.append(output)
+        func = PrimFunc.build_batch_func(self.func_name, instances)
+        if not func:
+            return None
+        args = [ [ o[idx].value for idx in idxes ] for o in args_output ]
+        kwargs = { a.key: [ o[idx].value[1] for idx in idxes ] \
+            for a, o in zip(self.kwargs, kwargs_output) }
+        try:
+            values = func(*args, **kwargs)
+            values = values.tolist() if isinstance(values, np.ndarray) else list(values)
+        except:
+            # the per-instance version handles (and raises) the errors.
+            return None
+        if len(values) != len(instances):
+            return None
+        outputs = [ DEFAULT_RETURN ] * len(instance_groups)
+        for value, idx in zip(values, idxes):
+            instance_keys = []
+            for o in args_output + kwargs_output:
+                instance_keys += o[idx].key
+            outputs[idx] = OpNodeReturn(key=instance_keys, value=value)
+        batch_cache[id(self)] = outputs
+        return outputs
+
     def get_value(self, 
         instance_group: Dict[str, Instance],
         attr_hash: Dict[str, 'Attribute'], 
@@ -364,12 +600,11 @@ class FuncOp(OpNode):
         try:
             #print(self.args)
             #print([type(a) for a in self.args])
-            # if the input type is the default, but we know it should not be default
-            # overwrite
-            if self.rewrite_type != UNREWRITTEN_RID and rewrite_type == UNREWRITTEN_RID:
-                rewrite_type = self.rewrite_type
+            batch_cache, batch_idx = kwargs.get('batch_cache', None), kwargs.get('batch_idx', None)
+            if batch_cache and batch_idx is not None and id(self) in batch_cache:
+                return batch_cache[id(self)][batch_idx]
             # compute the instance in this case, in order to compute t
-            rewrite_type = Instance.resolve_default_rewrite(rewrite_type)
+            rewrite_type = self._resolve_rewrite_type(rewrite_type)
             if rewrite_type not in instance_group:
                 return DEFAULT_RETURN
             instance = instance_group[rewrite_type]
@@ -10,9 +10,99 @@ class PrimFunc(Registrable):
     A wrapper function primitive functions used in the domain specific language.
     It inherits ``errudite.utils.registrable``, so all the functions can be 
     registered to this class with their function names.
+
+    Optionally, a function can also register a batch version with 
+    ``@PrimFunc.register_batch(name)``. The batch version takes the same 
+    parameters, but each of them is a list with one value per instance, 
+    and returns a list of outputs aligned with the instances. The DSL uses 
+    it whenever all the inputs of a function can be computed in batch, and 
+    falls back to the per-instance version otherwise, or if the batch 
+    version raises any exception.
     """
+    _batch_registry: Dict[str, Callable] = {}
+
     def __init__(self):
         pass
+
+    @classmethod
+    def register_batch(cls, name: str=None) -> Callable:
+        """
+        A decorator function that helps register the batch version of a function:
+        ``@PrimFunc.register_batch(name)``. The per-instance version should 
+        be registered under the same name.
+        
+        Parameters
+        ----------
+        name : str, optional
+            The name of the function. If not given, retrive the name of the function,
+            with the ``_batch`` suffix removed. By default None
+        
+        Returns
+        -------
+        Callable
+            The registering function
+        """
+        def add_batch_func_to_registry(func: Callable, name: str) -> Callable:
+            if not name:
+                name = func.__name__
+                name = name[:-len('_batch')] if name.endswith('_batch') else name
+            cls._batch_registry[name] = func
+            return func
+        return partial(add_batch_func_to_registry, name=name)
+
+    @classmethod
+    def has_batch(cls, func_name: str) -> bool:
+        """
+        Whether or not a function has a batch version.
+        
+        Parameters
+        ----------
+        func_name : str
+            The name of the function.
+        
+        Returns
+        -------
+        bool
+            If the batch version is registered.
+        """
+        return func_name in cls._batch_registry
+
+    @classmethod
+    def build_batch_func(cls, func_name: str, instances: List['Instance']) -> Callable:
+        """
+        Given a list of instances, adjust the batch version of one function 
+        to fit for all of them, by filling in the inputs that have the same 
+        variable name as a target entry with the column of that entry.
+        
+        Parameters
+        ----------
+        func_name : str
+            The name of the function.
+        instances : List[Instance]
+            The instances that the function should be adjusted to.
+        
+        Returns
+        -------
+        Callable
+            The batch function with entry columns filled in. If the function 
+            has no batch version, or an entry only exists in some of the 
+            instances, return ``None``.
+        """
+        try:
+            if not cls.has_batch(func_name):
+                return None
+            params = {}
+            func = cls._batch_registry[func_name]
+            sig = signature(func)
+            for param_name in sig.parameters:
+                column = [ instance.get_entry(param_name) for instance in instances ]
+                if all([ c is not None for c in column ]):
+                    params[param_name] = column
+                elif any([ c is not None for c in column ]):
+                    return None
+            return partial(func, **params)
+        except:
+            raise
     
     @classmethod
     def build_instance_func(cls, func_name: str, instance: 'Instance') -> Callable:
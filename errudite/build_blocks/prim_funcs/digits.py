@@ -124,6 +124,46 @@ def digitize(target: Union[str, int, float]) -> Union[int, float]:
     finally:
         return output
 
+@PrimFunc.register_batch()
+def is_digit_batch(target: List[Union[str, int, float]]) -> List[bool]:
+    """
+    The batch version of ``is_digit``. Columns that are all numbers 
+    are resolved at once.
+    
+    Parameters
+    ----------
+    target : List[Union[str, int, float]]
+        The input of each instance.
+        
+    Returns
+    -------
+    List[bool]
+        Whether or not each input is a digit.
+    """
+    if all([ isinstance(t, numbers.Number) for t in target ]):
+        return [ True ] * len(target)
+    return [ is_digit(t) for t in target ]
+
+@PrimFunc.register_batch()
+def digitize_batch(target: List[Union[str, int, float]]) -> List[Union[int, float]]:
+    """
+    The batch version of ``digitize``. Columns that are all numbers 
+    are returned as they are.
+    
+    Parameters
+    ----------
+    target : List[Union[str, int, float]]
+        The input of each instance.
+    
+    Returns
+    -------
+    List[Union[int, float]]
+        The digitized inputs. ``None`` if not a number.
+    """
+    if all([ isinstance(t, numbers.Number) for t in target ]):
+        return list(target)
+    return [ digitize(t) for t in target ]
+
 @PrimFunc.register()
 def truncate(
     value: Union[int, float],
@@ -1,10 +1,12 @@
 import math
+import numpy as np
 import os
 import traceback
 from typing import Union,List
-from spacy.tokens import Doc, Span, Token
+from spacy.tokens import Doc, Span
 from ...utils.helpers import convert_doc
 from ...utils.check import DSLValueError
+from ...processor.freq_table import get_lemma_hashes
 from ...targets.instance import Instance
 
 import logging
@@ -26,47 +28,34 @@ def freq(
     target : Union[Target, Span]
         The targeted token.
     target_type : str, optional
-        Needs to be a key in ``Instance.train_freq`` to 
+        Needs to be a key in ``Instance.train_freq_table`` to 
         help determine the frequency dictionary.
     
     Returns
     -------
     float
-        [description]
+        The minimum frequency of the (non-punctuation) tokens.
     """
     output = 0
     try:
-        if not Instance.train_freq:
-            raise DSLValueError(f"No training data freq.")
+        if not Instance.train_freq_table:
+            raise DSLValueError("No training data freq.")
         if not target_type.endswith("_vocab"):
             target_type += "_vocab"
-        if target_type not in Instance.train_freq:
+        if target_type not in Instance.train_freq_table:
             raise DSLValueError(f"No training data frequency for {target_type}.")
-        def freq_(doc):
-            doc = convert_doc(doc)
-            spans = list(doc)
-            weight = float("inf")
-            for span in spans:
-                if type(span) == Token:
-                    tokens = [ span ]if not (span.is_punct or span.text == '\n') else []
-                else:
-                    tokens = [token for token in span if not (token.is_punct or token.text == '\n')]
-                if not tokens:
-                    continue
-                weights = [0 if \
-                    t.lemma_ not in Instance.train_freq[target_type] else \
-                    Instance.train_freq[target_type][t.lemma_] for t in tokens]
-                local_min_weight = min(weights)
-                weight = local_min_weight if local_min_weight < weight else weight
-            if math.isinf(weight):
-                return 0
-            return weight
         if not target:
             raise DSLValueError(f"Unknown target for training frequency query in [ freq ]: {target}")
-        if type(target) == list:
-            return min([ freq_(doc) for doc in target ]) # convert_token
-        else:
-            return freq_(target) # convert_token
+        docs = target if type(target) == list else [ target ]
+        weight = float("inf")
+        for doc in docs:
+            doc = convert_doc(doc)
+            # one gather over the lemma hashes of the whole doc.
+            weights = Instance.train_freq_table.gather(target_type, get_lemma_hashes(doc))
+            # docs without any valid token count as 0.
+            local_min_weight = weights.min().item() if len(weights) else 0
+            weight = local_min_weight if local_min_weight < weight else weight
+        output = 0 if math.isinf(weight) else weight
     except DSLValueError as e:
         #logger.error(e)
         raise(e)
@@ -79,4 +68,51 @@ def freq(
     #finally:
     else:
         #pass
-        return output
\ No newline at end of file
+        return output
+
+@PrimFunc.register_batch()
+def freq_batch(
+    target: List[Union['Target', Span]], 
+    target_type: List[str]) -> List[float]:
+    """
+    The batch version of ``freq``. The lemma frequencies of all the instances 
+    are gathered with one lookup, and reduced with ``np.minimum.reduceat``.
+    
+    Parameters
+    ----------
+    target : List[Union[Target, Span]]
+        The targeted token of each instance.
+    target_type : List[str]
+        The target type of each instance. Needs to be the same for all of them.
+    
+    Returns
+    -------
+    List[float]
+        The minimum frequencies, aligned with the instances.
+    """
+    target_types = set(target_type)
+    if len(target_types) != 1:
+        raise DSLValueError(f"[ freq ] only batches one target type: {target_types}")
+    target_type = target_types.pop()
+    if not Instance.train_freq_table:
+        raise DSLValueError("No training data freq.")
+    if not target_type.endswith("_vocab"):
+        target_type += "_vocab"
+    if target_type not in Instance.train_freq_table:
+        raise DSLValueError(f"No training data frequency for {target_type}.")
+    hashes, counts = [], []
+    for t in target:
+        if not t:
+            raise DSLValueError(f"Unknown target for training frequency query in [ freq ]: {t}")
+        docs = t if type(t) == list else [ t ]
+        hashes += [ get_lemma_hashes(convert_doc(doc)) for doc in docs ]
+        counts.append(len(docs))
+    lengths = np.array([ len(h) for h in hashes ], dtype=np.int64)
+    weights = Instance.train_freq_table.gather(target_type, np.concatenate(hashes))
+    # docs without any valid token count as 0.
+    doc_weights = np.zeros(len(hashes), dtype=np.int64)
+    non_empty = lengths > 0
+    if non_empty.any():
+        starts = (np.cumsum(lengths) - lengths)[non_empty]
+        doc_weights[non_empty] = np.minimum.reduceat(weights, starts)
+    return np.minimum.reduceat(doc_weights, np.cumsum(counts) - counts)
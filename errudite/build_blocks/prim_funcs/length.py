@@ -1,4 +1,5 @@
 import traceback
+import numpy as np
 from typing import Union, List
 from spacy.tokens import Doc, Span, Token
 from ...utils.helpers import convert_doc
@@ -47,4 +48,30 @@ def length(
     #finally:
     else:
         #pass
-        return output
\ No newline at end of file
+        return output
+
+@PrimFunc.register_batch()
+def length_batch(
+    docs: List[Union['Target', Span, List[Union['Target', Span]]]]) -> List[int]:
+    """
+    The batch version of ``length``.
+    
+    Parameters
+    ----------
+    docs : List[Union[Target, Span, List[Union[Target, Span]]]]
+        The input doc(s) of each instance.
+    
+    Returns
+    -------
+    List[int]
+        The lengths, aligned with the instances.
+    """
+    if any([ d is None for d in docs ]):
+        raise DSLValueError("No valid input to [ length ].")
+    lengths, counts = [], []
+    for d in docs:
+        d = d if type(d) == list and len(d) > 0 else [ d ]
+        lengths += [ len(convert_doc(doc)) if doc else 0 for doc in d ]
+        counts.append(len(d))
+    lengths = np.array(lengths, dtype=np.int64)
+    return np.minimum.reduceat(lengths, np.cumsum(counts) - counts) if len(lengths) else lengths
@@ -60,6 +60,45 @@ def perform(model: str, predictions: Union['Label', List['Label']], perform_name
         #pass
         return output
 
+@PrimFunc.register_batch()
+def perform_batch(
+    model: List[str], 
+    predictions: List[Union['Label', List['Label']]], 
+    perform_name: Union[str, List[str]]) -> List[float]:
+    """The batch version of ``perform``.
+    
+    Parameters
+    ----------
+    model : List[str]
+        The model to query, for each instance.
+    predictions : List[Union[Label, List[Label]]]
+        All the predictions available, for each instance.
+        *Automatically filled in when using the DSL parser.*
+    perform_name : Union[str, List[str]]
+        The selected metric name for each instance. Can be one str
+        when filled in with ``functools.partial``.
+    
+    Returns
+    -------
+    List[float]
+        The queried metrics, aligned with the instances.
+    """
+    if type(perform_name) != list:
+        perform_name = [ perform_name ] * len(predictions)
+    resolved = { m: Instance.resolve_default_model(m) for m in set(model) }
+    output = []
+    for m, preds, p_name in zip(model, predictions, perform_name):
+        m = resolved[m]
+        if not m:
+            raise DSLValueError(f"No valid model to [ perform ]. model: {m}")
+        preds = [ p for p in convert_list(preds) if p.model == m ] if preds else []
+        if not preds:
+            raise DSLValueError(f"Cannot find [ model: {m} ]'s predictions for [ perform ].")
+        output.append(preds[0].get_perform(p_name))
+    return output
+
 for p in ["f1", "precision", "recall", "accuracy", "confidence", "exact_match"]:
     PrimFunc.register(p)(functools.partial(perform, perform_name=p))
-PrimFunc.register("is_correct_sent")(functools.partial(perform, perform_name='sent'))
\ No newline at end of file
+    PrimFunc.register_batch(p)(functools.partial(perform_batch, perform_name=p))
+PrimFunc.register("is_correct_sent")(functools.partial(perform, perform_name='sent'))
+PrimFunc.register_batch("is_correct_sent")(functools.partial(perform_batch, perform_name='sent'))
\ No newline at end of file
@@ -1,9 +1,8 @@
-from nltk.corpus import wordnet as wn
-from typing import Union
+from typing import Union, List
 from spacy.tokens import Span, Token, Doc
 import functools
 
-from ...processor import spacy_annotator
+from ...processor import spacy_annotator, lexical_table
 from ...utils.check import DSLValueError
 from ..prim_func import PrimFunc
 
@@ -15,7 +14,8 @@ def match_super(orgin: str, new: str) -> str:
 def find_similar_token(word: Union[Token, str], search_type: str) -> str:
     """
     Find related words from wordnet, given a token's text and POS. 
-    If cannot find one, return itself.
+    If cannot find one, return itself. The ranked candidates are served 
+    from the precomputed ``errudite.processor.lexical_table``.
     
     *When using the DSL parser*, this function can be called in alternative ways, 
     with ``search_type`` being automatically filled in: 
@@ -34,36 +34,67 @@ def find_similar_token(word: Union[Token, str], search_type: str) -> str:
     str
         The synonym or the antonym string.
     """
-    lemma = ""
-    words = set()
     if search_type not in ["synonym", "antonym"]:
         raise DSLValueError(f"Invalid token search_type: [ {search_type} ]. Has to be 'synonym' or 'antonym'. ")
     if type(word) == str:
         word = spacy_annotator.process_text(word)
         if len(word) > 0:
             word = word[0]
-    if type(word) == Token:
-        synsets = wn.synsets(word.lemma_, getattr(wn, word.pos_, None))
-        lemma = word.lemma_
-    else:
+    if type(word) != Token:
         raise DSLValueError(f"Invalid input to find_similar_token: [ {word} ({type(word)}) ].")
-    for syn in synsets:
-        for l in syn.lemmas(): 
-            if search_type == "synonym":
-                words.add(l.name()) 
-            elif search_type == "antonym":
-                if l.antonyms(): 
-                    words.add(l.antonyms()[0].name()) 
-    if lemma in words:
-        words.remove(word.lemma_)
+    # ranked candidates from the precomputed table, no pipeline runs.
+    words = lexical_table.lookup(word.lemma_, word.pos_, search_type)
     if words:
-        words = sorted(list(words), 
-            key=lambda l: word.similarity(spacy_annotator.process_text(l)), 
-            reverse=True)
         return match_super(word.text, words[0].lower())
     else:
         #raise DSLValueError(f"Invalid input to find_similar_token: [ {word} ({type(word)}) ].")
         return word.text
 
+def find_similar_tokens(word: Union[Token, str], search_type: str, max_count: int=5) -> List[str]:
+    """
+    Find the top-ranked related words from wordnet, given a token's text and POS.
+    Same as ``find_similar_token``, but returns up to ``max_count`` candidates, 
+    so a rewrite rule can produce one variant per candidate.
+    If cannot find any, return ``[ word ]``.
+    
+    *When using the DSL parser*, this function can be called in alternative ways, 
+    with ``search_type`` being automatically filled in: 
+    ``[get_synonyms|get_antonyms](word, max_count=5)``.
+
+    Parameters
+    ----------
+    word : Union[Token, str]
+        The given word. Can be a spacy token or just a string (in which case, 
+        the POS tag will not be specified.)
+    search_type : str
+        "synonym" or "antonym".
+    max_count : int, optional
+        The max number of candidates, by default 5
+    
+    Returns
+    -------
+    List[str]
+        The synonym or the antonym strings, ranked.
+    """
+    if search_type not in ["synonym", "antonym"]:
+        raise DSLValueError(f"Invalid token search_type: [ {search_type} ]. Has to be 'synonym' or 'antonym'. ")
+    if type(word) == str:
+        word = spacy_annotator.process_text(word)
+        if len(word) > 0:
+            word = word[0]
+    if type(word) != Token:
+        raise DSLValueError(f"Invalid input to find_similar_tokens: [ {word} ({type(word)}) ].")
+    words = lexical_table.lookup(word.lemma_, word.pos_, search_type)
+    outputs = []
+    for w in words or []:
+        w = match_super(word.text, w.lower())
+        if w not in outputs:
+            outputs.append(w)
+        if len(outputs) >= max_count:
+            break
+    return outputs if outputs else [ word.text ]
+
 PrimFunc.register("get_synonym")(functools.partial(find_similar_token, search_type='synonym'))
-PrimFunc.register("get_antonym")(functools.partial(find_similar_token, search_type='antonym'))
\ No newline at end of file
+PrimFunc.register("get_antonym")(functools.partial(find_similar_token, search_type='antonym'))
+PrimFunc.register("get_synonyms")(functools.partial(find_similar_tokens, search_type='synonym'))
+PrimFunc.register("get_antonyms")(functools.partial(find_similar_tokens, search_type='antonym'))
@@ -1,10 +1,28 @@
 import traceback
 from typing import Union, List
-from collections import Counter
+from collections import defaultdict
 from ...utils.helpers import convert_list
 from ...utils.check import DSLValueError
+from ...targets.instance import Instance
+from ...targets.type_columns import get_answer_type, QUESTION_COLUMN, GROUNDTRUTH_COLUMN
 from ..prim_func import PrimFunc
 
+def _get_precomputed_answer_type(target: Union['Answer', List['Answer']]) -> str:
+    """Serve the answer type from ``Instance.type_columns``, if the target
+    is exactly the groundtruths or one model's prediction of an original instance."""
+    first = target[0] if type(target) == list else target
+    key = first.key()
+    if not Instance.exists(key):
+        return None
+    instance = Instance.get(key)
+    if type(target) == list and getattr(first, 'is_groundtruth', False):
+        if instance.get_entry('groundtruths') is target:
+            return Instance.type_columns.get(GROUNDTRUTH_COLUMN, key)
+    elif type(target) != list and not getattr(first, 'is_groundtruth', True):
+        if instance.get_entry('prediction', first.model) is target:
+            return Instance.type_columns.get(first.model, key)
+    return None
+
 @PrimFunc.register()
 def question_type(target: 'Question') -> str:
     """
@@ -22,7 +40,8 @@ def question_type(target: 'Question') -> str:
         The question type.
     """
     try:
-        return target.question_type
+        question_type = target.question_type
+        return Instance.type_columns.get(QUESTION_COLUMN, target.key()) or question_type
     except:
         #print(f'[question_type]')
         #traceback.print_exc()
@@ -48,20 +67,71 @@ def answer_type(target: 'Answer') -> str:
     """
     try:
         answers = convert_list(target)
-        answer_types = []
         if not target:
             raise(DSLValueError(f"Not a valid input to [ answer type ]. Target: {target}"))
         for a in answers:
-            if a.__class__.__name__ == 'VQAAnswer':
-                answer_types += [ a.answer_type ] * a.count
-            elif 'Answer' in a.__class__.__name__:
-                answer_types.append(a.answer_type)
-            else:
+            if 'Answer' not in a.__class__.__name__:
                 raise(DSLValueError(f"{type(a)} does not have [ answer_type ]. Target: {target}"))
-        answer_type, _ = Counter(answer_types).most_common()[0]
-        return answer_type
+        return _get_precomputed_answer_type(target) or get_answer_type(answers)
     except DSLValueError as e:
         raise e
     except Exception as e:
         traceback.print_exc()
-        raise Exception(f"Unknown exception from [ answer_type ]: {e}")
\ No newline at end of file
+        raise Exception(f"Unknown exception from [ answer_type ]: {e}")
+
+@PrimFunc.register_batch()
+def question_type_batch(target: List['Question']) -> List[str]:
+    """
+    The batch version of ``question_type``. The types are 
+    gathered from ``Instance.type_columns`` at once.
+    
+    Parameters
+    ----------
+    target : List[Question]
+        The question target of each instance.
+    
+    Returns
+    -------
+    List[str]
+        The question types, aligned with the instances.
+    """
+    precomputed = Instance.type_columns.get_column(QUESTION_COLUMN, [ t.key() for t in target ])
+    return [ p or t.question_type for p, t in zip(precomputed, target) ]
+
+@PrimFunc.register_batch()
+def answer_type_batch(target: List[Union['Answer', List['Answer']]]) -> List[str]:
+    """
+    The batch version of ``answer_type``. The types of the original groundtruths 
+    and predictions are gathered from ``Instance.type_columns`` column by column.
+    
+    Parameters
+    ----------
+    target : List[Union[Answer, List[Answer]]]
+        The answer target(s) of each instance.
+    
+    Returns
+    -------
+    List[str]
+        The answer types, aligned with the instances.
+    """
+    output = [ None ] * len(target)
+    column_idxes = defaultdict(list)
+    for idx, t in enumerate(target):
+        answers = convert_list(t)
+        if not t or any([ 'Answer' not in a.__class__.__name__ for a in answers ]):
+            raise(DSLValueError(f"Not a valid input to [ answer type ]. Target: {t}"))
+        first = answers[0]
+        if not Instance.exists(first.key()):
+            continue
+        instance = Instance.get(first.key())
+        if type(t) == list and getattr(first, 'is_groundtruth', False):
+            if instance.get_entry('groundtruths') is t:
+                column_idxes[GROUNDTRUTH_COLUMN].append(idx)
+        elif type(t) != list and not getattr(first, 'is_groundtruth', True):
+            if instance.get_entry('prediction', first.model) is t:
+                column_idxes[first.model].append(idx)
+    for name, idxes in column_idxes.items():
+        types = Instance.type_columns.get_column(name, [ convert_list(target[idx])[0].key() for idx in idxes ])
+        for idx, answer_type in zip(idxes, types):
+            output[idx] = answer_type
+    return [ o or get_answer_type(convert_list(t)) for o, t in zip(output, target) ]
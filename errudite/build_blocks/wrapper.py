@@ -8,9 +8,11 @@ from .definitions import conditions as defConditions
 from .operators import OpNode, OpNodeReturn
 
 from ..targets.instance import Instance
+from ..targets.label import Label
 from ..targets.interfaces import InstanceKey, UNREWRITTEN_RID
 
 from ..utils.check import DSLValueError
+from ..utils.helpers import convert_list
 import logging
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
@@ -90,6 +92,16 @@ class BuildBlockWrapper(object):
         else:
             self.cmd_type = cmd_type
     
+    def _defer_label_docs(self, instance_groups: List[Dict[str, Instance]]) -> None:
+        # the labels are constructed text-only. If the command uses the linguistic 
+        # features of any of them, annotate the same model's labels in one batch.
+        labels = []
+        for instance_group in instance_groups:
+            for instance in instance_group.values():
+                for entry in [ 'groundtruths', 'predictions' ]:
+                    labels += convert_list(instance.get_entry(entry) or [])
+        Label.defer_docs(labels)
+    
     def test_instances(self, 
         instance_groups: List[Dict[str, Instance]], 
         attr_hash: Dict[str, 'Attribute']=None, 
@@ -109,7 +121,17 @@ class BuildBlockWrapper(object):
         output_ = {}
         try:
             id_list = defaultdict(None)
-            for instance_group in instance_groups:
+            instance_groups = list(instance_groups)
+            # precompute the batchable function subtrees for all the groups.
+            batch_cache = {}
+            if isinstance(self.operator, OpNode):
+                self._defer_label_docs(instance_groups)
+                self.operator.collect_batch_values(
+                    instance_groups=instance_groups,
+                    batch_cache=batch_cache,
+                    attr_hash=attr_hash,
+                    group_hash=group_hash)
+            for batch_idx, instance_group in enumerate(instance_groups):
                 instances = list(instance_group.values())
                 if not instances:
                     continue
@@ -118,7 +140,9 @@ class BuildBlockWrapper(object):
                     output = self.operator.get_value(
                         attr_hash=attr_hash,
                         group_hash=group_hash,
-                        instance_group=instance_group)
+                        instance_group=instance_group,
+                        batch_cache=batch_cache,
+                        batch_idx=batch_idx)
                     value = output.value
                     keys = list(set(output.key))
                 elif callable(self.operator):
@@ -151,6 +175,5 @@ class BuildBlockWrapper(object):
             ex = Exception(f"Unknown exception from [ test_instances ]: {e}")
             logger.error(ex)
             raise(e)
-        #finally:
-            #pass
-        #    return output_
\ No newline at end of file
+        finally:
+            Label.clear_pending_docs()
\ No newline at end of file
@@ -1,3 +1,4 @@
 from .attribute import Attribute
 from .group import Group
-from .built_block import BuiltBlock
\ No newline at end of file
+from .built_block import BuiltBlock
+from .error_overlap import ErrorOverlap
\ No newline at end of file
@@ -14,6 +14,7 @@ from .built_block import BuiltBlock
 from ..targets.instance import Instance
 from ..targets.interfaces import InstanceKey, UNREWRITTEN_RID
 from ..utils import DSLValueError, ConfigurationError, load_json, CACHE_FOLDERS, normalize_file_path
+from ..utils.intervals import wilson_interval
 
 import logging
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
@@ -205,13 +206,19 @@ class Attribute(BuiltBlock):
             corrects, incorrects = track_key({key: True for key in self.instance_dict if key.qid in filtered_instances})
         else:
             corrects, incorrects = track_key(self.instance_dict)
+        # the error rate intervals of all the attribute values at once.
+        values = list(set(corrects.keys()) | set(incorrects.keys()))
+        lowers, uppers = wilson_interval(
+            np.array([ incorrects[v] for v in values ]),
+            np.array([ corrects[v] + incorrects[v] for v in values ]))
         return {
             'name': self.name,
             'description': self.description,
             'cmd': self.cmd,
             'domain': self.domain(filtered_instances),
             'dtype': self.dtype,
-            'counts': { 'correct': list(corrects.items()), 'incorrect': list(incorrects.items()) }
+            'counts': { 'correct': list(corrects.items()), 'incorrect': list(incorrects.items()) },
+            'intervals': [ (v, [ float(l), float(u) ]) for v, l, u in zip(values, lowers, uppers) ]
         }
 
     def domain(self, filtered_instances: List[InstanceKey]=[]) -> List[T]:
@@ -1,4 +1,5 @@
 import os
+import re
 from typing import Dict, List, Tuple, Callable, Union
 from ..build_blocks.wrapper import BuildBlockWrapper
 from ..targets.interfaces import InstanceKey
@@ -93,6 +94,24 @@ class BuiltBlock(Store):
             ((switched == "model" and "ANCHOR" in self.cmd) or \
             (switched == "rewrite" and "SELECTED" in self.cmd))
 
+    def depends_on_model(self, model: str) -> bool:
+        """Whether or not a built block needs to be recomputed when the
+        predictions of a model are added, i.e., whether the cmd mentions 
+        the model name, like ``prediction(model="bidaf")``.
+        
+        Parameters
+        ----------
+        model : str
+            The model name.
+        
+        Returns
+        -------
+        bool
+            Should recompute or not.
+        """
+        return type(self.cmd) == str and model is not None and \
+            re.search(r"""["']{}["']""".format(re.escape(model)), self.cmd) is not None
+
     def set_cmd(self, cmd: Union[str, Callable], cmd_type: str) -> None:
         """
         Use the cmd to define the built block.
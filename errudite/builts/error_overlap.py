@@ -0,0 +1,195 @@
+from typing import List, Dict, Iterable
+import numpy as np
+
+from ..targets.label import Label
+from ..targets.interfaces import InstanceKey
+from ..targets.performance_table import PerformanceTable
+from ..utils.intervals import wilson_interval, bootstrap_means, percentile_interval, N_RESAMPLES
+
+import logging
+logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+# 2^K patterns are enumerated, so K is kept small.
+MAX_MODELS = 16
+
+
+class ErrorOverlap(object):
+    """
+    The error overlaps of K models on the original instances. The correctness
+    masks of the models are read from ``Label.performance_table`` once, and packed
+    into one bitset per instance (bit ``k`` is set if model ``k`` is incorrect),
+    so for any instance slice (a group, or a filter):
+
+    * the 2^K correctness-pattern contingency is one ``np.bincount``,
+    * the pairwise overlap and regression matrices are one matrix product,
+    * the metric deltas between every two models are one gather and a mean.
+
+    .. code-block:: python
+
+        from errudite.builts import Group, ErrorOverlap
+        overlap = ErrorOverlap([ 'bidaf', 'bidaf-elmo', 'bert' ])
+        output = overlap.evaluate({ 'all': None, **{ g.name: g.get_instance_list() for g in Group.values() } })
+
+    Parameters
+    ----------
+    models : List[str]
+        The models to compare. Models without predictions in the table are skipped.
+    metric : str, optional
+        The metric for the correctness and the deltas, by default None
+        (``Label.task_primary_metric``).
+    table : PerformanceTable, optional
+        The performance table, by default None (``Label.performance_table``).
+
+    Attributes
+    ----------
+    incorrect : np.ndarray
+        ``(n_rows, K)`` bool, whether each model is incorrect on each row.
+    patterns : np.ndarray
+        ``(n_rows, )`` the correctness bitsets.
+    scores : np.ndarray
+        ``(n_rows, K)`` the metric scores.
+    """
+    def __init__(self, models: List[str], metric: str=None, table: PerformanceTable=None) -> None:
+        self.table: PerformanceTable = table or Label.performance_table
+        self.metric: str = metric or Label.task_primary_metric
+        self.models: List[str] = []
+        for model in models:
+            if model not in self.table:
+                logger.warn(f"[ ErrorOverlap ]: {model} has no predictions. Skipped.")
+            elif model not in self.models:
+                self.models.append(model)
+        if len(self.models) > MAX_MODELS:
+            logger.warn(f"[ ErrorOverlap ]: at most {MAX_MODELS} models are compared. " + 
+                f"Dropped: {self.models[MAX_MODELS:]}.")
+            self.models = self.models[:MAX_MODELS]
+        n_rows, n_models = len(self.table.rows), len(self.models)
+        self.incorrect = np.zeros((n_rows, n_models), dtype=bool)
+        self.scores = np.zeros((n_rows, n_models), dtype=np.float64)
+        for idx, model in enumerate(self.models):
+            self.incorrect[:, idx] = self.table.incorrect_mask(model, self.metric)
+            self.scores[:, idx] = self.table.get_scores(model, self.metric)
+        self.patterns = (self.incorrect.astype(np.int64) << np.arange(n_models, dtype=np.int64)).sum(axis=1)
+
+    def get_rows(self, keys: Iterable[InstanceKey]=None) -> np.ndarray:
+        """The row indexes of the keys, by default all the rows. Rewritten keys are skipped."""
+        return self.table._get_row_idxes(keys)
+
+    def contingency(self, rows: np.ndarray=None) -> np.ndarray:
+        """
+        The number of instances with each correctness pattern.
+
+        Returns
+        -------
+        np.ndarray
+            ``(2^K, )`` counts. The pattern ``p`` has model ``k`` incorrect iff ``p >> k & 1``.
+        """
+        patterns = self.patterns if rows is None else self.patterns[rows]
+        return np.bincount(patterns, minlength=2 ** len(self.models))
+
+    def overlap_matrix(self, rows: np.ndarray=None) -> np.ndarray:
+        """
+        ``(K, K)`` counts: ``[a, b]`` is the number of instances that both models
+        get wrong. The diagonal is the number of errors of each model.
+        """
+        incorrect = (self.incorrect if rows is None else self.incorrect[rows]).astype(np.int64)
+        return incorrect.T @ incorrect
+
+    def regression_matrix(self, rows: np.ndarray=None) -> np.ndarray:
+        """
+        ``(K, K)`` counts: ``[a, b]`` is the number of instances that model ``a``
+        gets right but model ``b`` gets wrong, i.e., the regressions from ``a`` to ``b``.
+        """
+        incorrect = (self.incorrect if rows is None else self.incorrect[rows]).astype(np.int64)
+        return (1 - incorrect).T @ incorrect
+
+    def metric_means(self, rows: np.ndarray=None) -> np.ndarray:
+        """``(K, )`` the averaged metric of each model."""
+        scores = self.scores if rows is None else self.scores[rows]
+        if not len(scores):
+            return np.zeros(len(self.models), dtype=np.float64)
+        return scores.mean(axis=0, dtype=np.float64)
+
+    def delta_intervals(self, rows: np.ndarray=None, n_resamples: int=N_RESAMPLES) -> np.ndarray:
+        """
+        The paired bootstrap intervals of the metric deltas: the instances are 
+        resampled once for all the models, so ``[a, b]`` is the interval of
+        (metric of b - metric of a) on the same resampled instances.
+
+        Returns
+        -------
+        np.ndarray
+            ``(2, K, K)``, the lower and the upper bounds.
+        """
+        scores = self.scores if rows is None else self.scores[rows]
+        means = bootstrap_means(scores, n_resamples)
+        return np.stack(percentile_interval(means[:, None, :] - means[:, :, None]))
+
+    def pattern_name(self, pattern: int) -> List[str]:
+        """The models that are incorrect in the pattern."""
+        return [ model for idx, model in enumerate(self.models) if pattern >> idx & 1 ]
+
+    def evaluate(self,
+        groups: Dict[str, Iterable[InstanceKey]],
+        include_empty_patterns: bool=False,
+        with_intervals: bool=False) -> Dict[str, any]:
+        """
+        The full comparison of the models, on each group.
+
+        Parameters
+        ----------
+        groups : Dict[str, Iterable[InstanceKey]]
+            ``{ group name: instance keys }``. ``None`` denotes all the instances.
+        include_empty_patterns : bool, optional
+            Whether to list the patterns with no instances, by default False.
+        with_intervals : bool, optional
+            Whether to add the 95% intervals of the error rates (Wilson) and 
+            the metric deltas (paired bootstrap), by default False.
+
+        Returns
+        -------
+        Dict[str, any]
+
+            .. code-block:: js
+
+                {
+                    'models': List[str],
+                    'metric': str,
+                    'groups': [{
+                        'name': str,
+                        'size': The number of instances in the group,
+                        'patterns': [{ 'incorrect': models that are incorrect, 'count': int }],
+                        'error_counts': [ int ] per model,
+                        'overlaps': [ [ int ] ], both models are incorrect,
+                        'regressions': [ [ int ] ], [a][b]: a is correct but b is incorrect,
+                        'metrics': [ float ] per model,
+                        'metric_deltas': [ [ float ] ], [a][b]: metric of b - metric of a,
+                        // with_intervals only
+                        'error_rate_intervals': [ [lower, upper] ] per model,
+                        'metric_delta_intervals': [ [ [lower, upper] ] ], aligned with metric_deltas
+                    }]
+                }
+        """
+        output = []
+        for name, keys in groups.items():
+            rows = self.get_rows(keys)
+            counts = self.contingency(rows)
+            overlaps = self.overlap_matrix(rows)
+            means = self.metric_means(rows)
+            group_output = {
+                'name': name,
+                'size': int(len(rows)),
+                'patterns': [
+                    { 'incorrect': self.pattern_name(pattern), 'count': int(count) }
+                    for pattern, count in enumerate(counts.tolist()) if count or include_empty_patterns ],
+                'error_counts': np.diag(overlaps).tolist(),
+                'overlaps': overlaps.tolist(),
+                'regressions': self.regression_matrix(rows).tolist(),
+                'metrics': means.tolist(),
+                'metric_deltas': (means[None, :] - means[:, None]).tolist()
+            }
+            if with_intervals:
+                lowers, uppers = wilson_interval(np.diag(overlaps), len(rows))
+                group_output['error_rate_intervals'] = np.stack([ lowers, uppers ], axis=-1).tolist()
+                group_output['metric_delta_intervals'] = np.moveaxis(self.delta_intervals(rows), 0, -1).tolist()
+            output.append(group_output)
+        return { 'models': self.models, 'metric': self.metric, 'groups': output }
@@ -7,9 +7,12 @@ from typing import Dict, List, Union
 import datetime
 import itertools
 from .built_block import BuiltBlock
+from .error_overlap import ErrorOverlap
 from ..targets.instance import Instance
+from ..targets.label import Label
 from ..targets.interfaces import InstanceKey
 from ..utils import DSLValueError, ConfigurationError, load_json, CACHE_FOLDERS, normalize_file_path
+from ..utils.intervals import rate_interval
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
@@ -215,7 +218,8 @@ class Group(BuiltBlock):
             'cmd': self.cmd,
             'description': self.description,
             'counts': stats['counts'],
-            'stats': stats['stats']
+            'stats': stats['stats'],
+            'intervals': stats['intervals']
         }
     
     def visualize_models(self, 
@@ -327,6 +331,10 @@ class Group(BuiltBlock):
                         'error_coverage': The ratio of how many incorrect instances are covered.
                         'local_error_rate': The ratio of incorrect instances within filtered_instances.
                         'global_error_rate': count_incorrect / TOTAL_SIZE
+                    },
+                    'intervals': {
+                        'local_error_rate': The 95% Wilson interval, [lower, upper].
+                        'global_error_rate': The 95% Wilson interval, [lower, upper].
                     }
                 }
         """
@@ -339,22 +347,44 @@ class Group(BuiltBlock):
             filtered_instances = {}
         if all([ i.vid == 0 for i in filtered_instances ]):
             TOTAL_SIZE = len(instance_hash)
+            table = Label.performance_table
+            resolved_model = Instance.resolve_default_model(model)
+            if instance_hash is Instance.instance_hash and resolved_model in table and \
+                len(table.rows) == TOTAL_SIZE and table.covers(instance_hash):
+                # one reduction over the dense table, instead of checking every instance.
+                error_mask = table.incorrect_mask(resolved_model, Label.task_primary_metric)
+                count_incorrect = table.count_incorrect(
+                    resolved_model, Label.task_primary_metric, filtered_instances)
+                return cls._wrap_eval_stats(
+                    len(filtered_instances) - count_incorrect, count_incorrect, 
+                    int(error_mask.sum()), len(filtered_instances), TOTAL_SIZE)
             ERROR_INSTANCES = { i.key(): True for i in instance_hash.values() if i.is_incorrect(model) }
         else:
             TOTAL_SIZE = len(instance_hash_rewritten)
             ERROR_INSTANCES = { i.key(): True for i in instance_hash_rewritten.values() if i.is_incorrect(model) }
         count_correct = len([key for key in filtered_instances if not key in ERROR_INSTANCES])
         count_incorrect = len([key for key in filtered_instances if key in ERROR_INSTANCES])
+        return cls._wrap_eval_stats(
+            count_correct, count_incorrect, len(ERROR_INSTANCES), len(filtered_instances), TOTAL_SIZE)
+
+    @classmethod
+    def _wrap_eval_stats(cls,
+        count_correct: int, count_incorrect: int, 
+        total_incorrect: int, filtered_size: int, total_size: int) -> dict:
         return {
             'counts': {
                 'correct': count_correct,
                 'incorrect': count_incorrect
             },
             'stats': {
-                'coverage': (count_correct + count_incorrect) / TOTAL_SIZE,
-                'error_coverage': count_incorrect / len(ERROR_INSTANCES) if ERROR_INSTANCES else 0,
-                'local_error_rate': count_incorrect / len(filtered_instances) if filtered_instances else 0,
-                'global_error_rate': count_incorrect / TOTAL_SIZE
+                'coverage': (count_correct + count_incorrect) / total_size,
+                'error_coverage': count_incorrect / total_incorrect if total_incorrect else 0,
+                'local_error_rate': count_incorrect / filtered_size if filtered_size else 0,
+                'global_error_rate': count_incorrect / total_size
+            },
+            'intervals': {
+                'local_error_rate': rate_interval(count_incorrect, filtered_size),
+                'global_error_rate': rate_interval(count_incorrect, total_size)
             }
         }
     
@@ -420,6 +450,19 @@ class Group(BuiltBlock):
             return []
         model_performs, err_overlaps = {}, []
         model_a, model_b = models[0], models[1]
+        table = Label.performance_table
+        if instance_hash is Instance.instance_hash and model_a in table and model_b in table and \
+            model_a != model_b and all([ key.vid == 0 for key in filtered_instances ]) and \
+            table.covers(filtered_instances):
+            # the counts of the 2x2 correctness patterns, from the bitsets.
+            counts = ErrorOverlap(models).contingency(table._get_row_idxes(filtered_instances))
+            return [ {
+                'model_a': model_a,
+                'model_b': model_b, 
+                'perform_a': a,
+                'perform_b': b,
+                'count': int(counts[int(a == 'incorrect') + 2 * int(b == 'incorrect')])
+            } for a, b in itertools.product(['correct', 'incorrect'], repeat=2) ]
         for model in models:
             model_performs[model] = { }
             for key in filtered_instances:
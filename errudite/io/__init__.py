@@ -1,4 +1,5 @@
 from .dataset_reader import DatasetReader
+from .rewritten_store import RewrittenStore
 from .sst_reader import SSTReader
 from .squad_reader import SQUADReader
 from .snli_reader import SNLIReader
@@ -1,7 +1,9 @@
 from typing import Iterable, Iterator, Callable, List, Tuple, Dict, Union
 import os
 import glob
+import time
 import itertools
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from spacy.tokens import Span
 import numpy as np
 from collections import Counter, defaultdict
@@ -9,13 +11,21 @@ from tqdm import tqdm
 from ..utils import Registrable, convert_list, ConfigurationError, \
     load_json, dump_json, dump_caches, load_caches, CACHE_FOLDERS, set_cache_folder
 from ..targets.instance import Instance
-from ..processor import spacy_annotator, SpacyAnnotator, get_token_feature, VBs, WHs, NNs
+from ..processor import spacy_annotator, lexical_table, SpacyAnnotator, get_token_feature, VBs, WHs, NNs
+from ..processor.freq_table import FreqTable
+from ..processor.token_index import TokenIndex
 from ..targets.label import Label
-from ..targets.interfaces import PatternCoverMeta
+from ..targets.type_columns import TypeColumns, get_answer_type, get_signature, QUESTION_COLUMN, GROUNDTRUTH_COLUMN
+from ..targets.interfaces import PatternCoverMeta, InstanceKey
+from .rewritten_store import RewrittenStore
+from .prediction_columns import PredictionColumns
 
 import logging
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
+# the number of preprocessed files that are loaded at the same time.
+LOAD_WORKERS = 8
+
 class DatasetReader(Registrable):
     """
     Adjusted from https://allenai.github.io/allennlp-docs/api/allennlp.data.dataset_readers.html
@@ -32,13 +42,20 @@ class DatasetReader(Registrable):
         │   ├── save_attr.json
         │   ├── save_group.json
         │   └── save_rewrite.json
-        ├── evaluations # predictions saved by the different models, with the model name being the folder name.
+        ├── evaluations # predictions saved by the different models, as doc-free columns (PredictionColumns).
         │   └── bidaf.pkl
         ├── instances.pkl # Save all the `Instance`, with the processed Target.
+        ├── lexical_table.pkl # The ranked synonyms/antonyms used by get_synonym/get_antonym.
         │   # A dict saving the relationship between linguistic features and model performances. 
         │   # It's used for the programming by demonstration.
         ├── ling_perform_dict.pkl
+        ├── rewritten # The rewritten instances and their predictions, in append-only chunks.
+        │   ├── chunk_00000.keys.pkl
+        │   └── chunk_00000.pkl
+        ├── token_index.pkl # The token/lemma/pos posting lists, used to estimate the rewrite coverage.
+        ├── type_columns.pkl # The precomputed question/answer types, per groundtruth and per model.
         ├── train_freq.json # The training vocabulary frequency
+        ├── train_freq.pkl # The training vocabulary frequency, compiled into arrays.
         └── vocab.pkl # The SpaCy vocab information.
         
     To implement your own, just override the `self._read` method to return a list of the instances.
@@ -127,6 +144,7 @@ class DatasetReader(Registrable):
         for key, val in target_dicts.items():
             logger.info(f"Computing {key} frequency.")
             Instance.train_freq[f'{key}_vocab'] = _count_str_freq(val)
+        Instance.train_freq_table = FreqTable.compile(Instance.train_freq)
 
     def _text_to_instance(self, *inputs) -> Instance:
         raise NotImplementedError
@@ -198,6 +216,10 @@ class DatasetReader(Registrable):
             [description]
         """
         instances = list(Instance.instance_hash.values())
+        self.compute_type_columns(instances)
+        dump_caches(Instance.type_columns.serialize(), os.path.join(CACHE_FOLDERS["cache"], 'type_columns.pkl'))
+        self.compute_token_index(instances)
+        Instance.token_index.dump(os.path.join(CACHE_FOLDERS["cache"], 'token_index.pkl'))
         predictions = defaultdict(list)
         for i in instances:
             for p in i.get_entry("predictions"):
@@ -205,21 +227,146 @@ class DatasetReader(Registrable):
             i.predictions = []
         self.dump(instances)
         for pname, preds in predictions.items():
-            self.dump(preds, pname, CACHE_FOLDERS["evaluations"])
-        dump_json(Instance.train_freq, os.path.join(CACHE_FOLDERS["cache"], 'train_freq.json'), is_compact=False)
+            self.dump_predictions(pname, preds)
+        # train_freq is not reloaded when the compiled table exists, so do not overwrite the json.
+        if Instance.train_freq:
+            dump_json(Instance.train_freq, os.path.join(CACHE_FOLDERS["cache"], 'train_freq.json'), is_compact=False)
+        Instance.train_freq_table.dump(os.path.join(CACHE_FOLDERS["cache"], 'train_freq.pkl'))
+        if Instance.rewritten_store is not None:
+            Instance.rewritten_store.flush()
         dump_caches(Instance.ling_perform_dict, os.path.join(CACHE_FOLDERS["cache"], 'ling_perform_dict.pkl'))
         logger.info("Dumped the linginguistic perform dict.")
+        lexical_table.dump()
+        
+
+    def dump_predictions(self, model: str, predictions: List[Label]) -> str:
+        """
+        Save the predictions of one model to ``evaluations/[model].pkl``, as ``PredictionColumns``.
+        
+        Parameters
+        ----------
+        model : str
+            The model name.
+        predictions : List[Label]
+            The predictions on the original instances.
+        
+        Returns
+        -------
+        str
+            The file path.
+        """
+        file_path = os.path.join(CACHE_FOLDERS["evaluations"], f'{model}.pkl')
+        PredictionColumns.from_labels(model, predictions).dump(file_path)
+        return file_path
+
+    def add_model_predictions(self, model: str, file_path: str=None) -> int:
+        """
+        Add the predictions of a new model to the loaded instances, without reloading
+        the dataset. The predictions are loaded from the evaluation file, and only the 
+        model-dependent caches get updated, for this model only:
+
+        * The predictions of the instances (the previous predictions of the model are replaced)
+        * ``Label.performance_table``, with one new slice
+        * ``Instance.type_columns``, with one new column
+        * ``Instance.ling_perform_dict``, merged with the patterns of this model
+
+        The updated caches are saved, so the model is also there after a restart.
+        
+        Parameters
+        ----------
+        model : str
+            The model name.
+        file_path : str, optional
+            The prediction file, by default None. If None, use ``evaluations/[model].pkl``.
+        
+        Returns
+        -------
+        int
+            The number of added predictions.
+        """
+        file_path = file_path or os.path.join(CACHE_FOLDERS["evaluations"], f'{model}.pkl')
+        if not os.path.isfile(file_path):
+            raise(ConfigurationError(f"[ add_model_predictions ]: {file_path} does not exist."))
+        instances = list(Instance.instance_hash.values())
+        predictions = self.load_predictions(file_path, instances)
+        for instance in instances:
+            preds = [ p for p in instance.get_entry('predictions') or [] if p.model != model ]
+            if instance.key() in predictions:
+                preds.append(predictions[instance.key()])
+            instance.set_entries(predictions=preds)
+        self.compute_performance_table(instances, [ model ])
+        Instance.type_columns.remove_column(model)
+        if self.compute_type_columns(instances, [ model ]):
+            dump_caches(Instance.type_columns.serialize(), os.path.join(CACHE_FOLDERS["cache"], 'type_columns.pkl'))
+        self.compute_ling_perform_dict(instances, [ model ])
+        dump_caches(Instance.ling_perform_dict, os.path.join(CACHE_FOLDERS["cache"], 'ling_perform_dict.pkl'))
+        logger.info(f"Added {len(predictions)} predictions of [ {model} ].")
+        return len(predictions)
+
+    def load_predictions(self, file_path: str, instances: List[Instance]) -> Dict[InstanceKey, Label]:
+        """
+        Load the predictions of one model from ``evaluations/[predictor_name].pkl``.
+        The columnar files (``PredictionColumns``) are joined to the instances by key,
+        and the docs of the predictions are only annotated when they are used.
+        Files in the old format (a list of pickled labels) are aligned with 
+        the instances by position.
         
+        Parameters
+        ----------
+        file_path : str
+            The path of the prediction file.
+        instances : List[Instance]
+            The instances, used to align the old format files.
+        
+        Returns
+        -------
+        Dict[InstanceKey, Label]
+            ``{ InstanceKey: prediction }``
+        """
+        return self._join_predictions(file_path, self._read_predictions(load_caches(file_path)), instances)
 
-    def load_preprocessed(self, selected_predictors: List[str]=None) -> None:
+    def _read_predictions(self, raw: any) -> Union[Dict[InstanceKey, Label], List[Label]]:
+        # the columnar files are decoded without the instances.
+        if PredictionColumns.is_columnar(raw):
+            return PredictionColumns.create_from_json(raw).to_labels()
+        return raw
+
+    def _join_predictions(self, 
+        file_path: str, 
+        predictions: Union[Dict[InstanceKey, Label], List[Label]], 
+        instances: List[Instance]) -> Dict[InstanceKey, Label]:
+        # the old format files are aligned by position, and decoded with the vocab of the instances.
+        if type(predictions) != dict:
+            predictions = { instance.key(): p.from_bytes() 
+                for instance, p in zip(instances, predictions) if p is not None }
+        logger.info(f"Loaded {len(predictions)} predictions from {file_path}.")
+        return predictions
+
+    def load_preprocessed(self, 
+        selected_predictors: List[str]=None, 
+        n_workers: int=LOAD_WORKERS, 
+        use_processes: bool=False) -> None:
         """
         Re-store all the preprocessed information. In specific, it reloads:
 
         * Instances
-        * Set the predictions from models as entries of the instances, and set 
+        * Set the predictions from models as entries of the instances, joined by the instance keys 
+          (the docs of the predictions are annotated lazily), and set 
           ``Instance.instance_hash``, ``Instance.instance_hash_rewritten``, and ``Instance.qid_hash``.
+        * Fill ``Label.performance_table`` with the metrics of all the predictions.
+        * Open ``Instance.rewritten_store``, and add the keys of the saved rewritten instances 
+          to ``Instance.qid_hash``. The rewritten instances are loaded when they are queried.
+        * Get the ``Instance.type_columns``, which saves the precomputed question/answer types.
+          Only the models without saved types get their predictions classified.
+        * Get the ``Instance.token_index``, the posting lists of the token attributes. 
+          It is rebuilt if the instances are changed.
         * Get the ``Instance.ling_perform_dict``, which saves the relationship between linguistic features 
-          and model performances, and ``Instance.train_freq``, which saves the training vocabulary frequency.
+          and model performances, and ``Instance.train_freq_table``, which saves the training vocabulary 
+          frequency compiled into arrays. If ``train_freq.pkl`` is not yet there, it is compiled from 
+          ``train_freq.json`` and saved.
+
+        The files are independent, so they are read and decoded concurrently, and only joined 
+        to the instances at the end. The loading time of each file is logged.
         
         Parameters
         ----------
@@ -227,33 +374,107 @@ class DatasetReader(Registrable):
             If set, only load the predictions from the selected predictors. 
             Otherwise, load all the predictors in `cache_path/evaluations`.
             By default None
+        n_workers : int, optional
+            The number of files that are loaded at the same time, by default 8.
+        use_processes : bool, optional
+            Whether to unpickle the prediction files and ``ling_perform_dict.pkl`` in 
+            separate processes, by default False. Unpickling holds the GIL, so this helps 
+            when there are many large prediction files, at the cost of sending the 
+            decoded data back. ``instances.pkl`` is always decoded in this process,
+            because the docs are restored with the vocab of the annotator.
         
         Returns
         -------
         None
         """
-
-        instances = self.load()
-        predictions = {}
+        start = time.perf_counter()
+        timings = {}
+        def timed(name: str, func: Callable, *args) -> any:
+            func_start = time.perf_counter()
+            output = func(*args)
+            timings[name] = time.perf_counter() - func_start
+            logger.info(f"Loaded [ {name} ] in {timings[name]:.2f}s.")
+            return output
+        prediction_files = {}
         for file in glob.glob(os.path.join(CACHE_FOLDERS["evaluations"], "*.pkl")):
-            file = os.path.basename(file)
-            model = file.split(".")[0]
+            model = os.path.basename(file).split(".")[0]
             if selected_predictors and model not in selected_predictors:
                 continue
-            predictions[model] = self.load(file, CACHE_FOLDERS["evaluations"])
-            Instance.set_default_model(model)
-        for idx, instance in enumerate(instances):
-            instance.set_entries(predictions=[ model_preds[idx] for model_preds in predictions.values() ])
-        Instance.build_instance_hashes(instances)
+            prediction_files[model] = file
         train_freq_file = os.path.join(CACHE_FOLDERS["cache"], 'train_freq.json')
+        train_freq_table_file = os.path.join(CACHE_FOLDERS["cache"], 'train_freq.pkl')
         ling_perform_dict_file = os.path.join(CACHE_FOLDERS["cache"], 'ling_perform_dict.pkl')
-        if os.path.isfile(train_freq_file):
-            Instance.train_freq = load_json(train_freq_file)
-        if os.path.isfile(ling_perform_dict_file):
-            Instance.ling_perform_dict = load_caches(ling_perform_dict_file)
+        type_columns_file = os.path.join(CACHE_FOLDERS["cache"], 'type_columns.pkl')
+        token_index_file = os.path.join(CACHE_FOLDERS["cache"], 'token_index.pkl')
+        process_pool = ProcessPoolExecutor(max_workers=n_workers) if use_processes else None
+        def read(file_path: str) -> any:
+            if process_pool:
+                return process_pool.submit(load_caches, file_path).result()
+            return load_caches(file_path)
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, n_workers)) as executor:
+                instances_future = executor.submit(timed, 'instances', self.load)
+                prediction_futures = { model: executor.submit(timed, f'evaluations/{model}', 
+                    lambda f: self._read_predictions(read(f)), file) 
+                    for model, file in prediction_files.items() }
+                train_freq_future, ling_perform_dict_future, type_columns_future, token_index_future = \
+                    None, None, None, None
+                # the compiled table skips parsing the large json dicts.
+                if os.path.isfile(train_freq_table_file):
+                    train_freq_future = executor.submit(timed, 'train_freq', FreqTable.load, train_freq_table_file)
+                elif os.path.isfile(train_freq_file):
+                    train_freq_future = executor.submit(timed, 'train_freq', load_json, train_freq_file)
+                if os.path.isfile(ling_perform_dict_file):
+                    ling_perform_dict_future = executor.submit(timed, 'ling_perform_dict', read, ling_perform_dict_file)
+                if os.path.isfile(type_columns_file):
+                    type_columns_future = executor.submit(timed, 'type_columns', 
+                        lambda f: TypeColumns.create_from_json(load_caches(f)), type_columns_file)
+                if os.path.isfile(token_index_file):
+                    token_index_future = executor.submit(timed, 'token_index', TokenIndex.load, token_index_file)
+                # join everything to the instances.
+                instances = instances_future.result()
+                predictions = {}
+                for model, future in prediction_futures.items():
+                    predictions[model] = self._join_predictions(prediction_files[model], future.result(), instances)
+                    Instance.set_default_model(model)
+                train_freq = train_freq_future.result() if train_freq_future else None
+                if ling_perform_dict_future:
+                    Instance.ling_perform_dict = ling_perform_dict_future.result()
+                if type_columns_future:
+                    Instance.type_columns = type_columns_future.result()
+                if token_index_future:
+                    Instance.token_index = token_index_future.result()
+        finally:
+            if process_pool:
+                process_pool.shutdown()
+        logger.info(f"Loaded {len(timings)} files in {time.perf_counter() - start:.2f}s " + 
+            f"({sum(timings.values()):.2f}s in total, the slowest is " + 
+            f"[ {max(timings, key=timings.get) if timings else None} ]).")
+        for instance in instances:
+            key = instance.key()
+            instance.set_entries(predictions=[ 
+                model_preds[key] for model_preds in predictions.values() if key in model_preds ])
+        Instance.build_instance_hashes(instances)
+        self.compute_performance_table(instances)
+        # the rewritten instances are loaded on demand.
+        Instance.rewritten_store = RewrittenStore()
+        Instance.rewritten_store.open()
+        Instance.rewritten_store.register_keys()
+        if isinstance(train_freq, FreqTable):
+            Instance.train_freq_table = train_freq
+        elif train_freq is not None:
+            Instance.train_freq = train_freq
+            Instance.train_freq_table = FreqTable.compile(Instance.train_freq)
+            Instance.train_freq_table.dump(train_freq_table_file)
+        # only the new or changed columns get classified.
+        if self.compute_type_columns(instances):
+            dump_caches(Instance.type_columns.serialize(), type_columns_file)
+        if self.compute_token_index(instances):
+            Instance.token_index.dump(token_index_file)
 
     def _compute_span_info(self, 
-        instance: Instance, spans: Span, feature_list: List[str], target: str, info_idxes):
+        instance: Instance, spans: Span, feature_list: List[str], target: str, info_idxes, 
+        models: List[str]=None):
         if target not in instance.entries:
             target_name = f'prediction(model="{target}")'
             target = 'predictions'
@@ -275,6 +496,8 @@ class DatasetReader(Registrable):
         predictions = instance.get_entry('predictions') or []    
         for prediction in predictions:
             model = prediction.model
+            if models is not None and model not in models:
+                continue
             if target == 'predictions': 
                 if model not in target_name:
                     continue
@@ -286,7 +509,7 @@ class DatasetReader(Registrable):
             #print(info_idxes[target][pattern][model])
         return info_idxes
 
-    def _compute_ling_perform_dict_per_instance(self, instance: Instance, info_idxes: dict):
+    def _compute_ling_perform_dict_per_instance(self, instance: Instance, info_idxes: dict, models: List[str]=None):
         if not instance or not isinstance(instance, Instance):
             return info_idxes
         for entry_name in Instance.instance_entries:
@@ -298,6 +521,8 @@ class DatasetReader(Registrable):
                 entries = entries[:3]
             for entry in entries:
                 if isinstance(entry, Label) and not entry.is_groundtruth:
+                    if models is not None and entry.model not in models:
+                        continue
                     entry_name = entry.model
                 doc =  getattr(entry, 'doc', None)
                 if not doc:
@@ -309,7 +534,7 @@ class DatasetReader(Registrable):
                         spans = doc[ start_idx : start_idx+span_length ]
                         for feature_list in itertools.product(TAG_LISTS, repeat=span_length):
                             info_idxes=self._compute_span_info(
-                                instance, spans, feature_list, entry_name, info_idxes)
+                                instance, spans, feature_list, entry_name, info_idxes, models)
         return info_idxes
 
 
@@ -334,7 +559,121 @@ class DatasetReader(Registrable):
                 info_idxes_out[target][pattern] = model_perform_data
         return info_idxes_out
 
-    def compute_ling_perform_dict(self, instances: List[Instance]) -> None:
+    def compute_type_columns(self, instances: List[Instance], models: List[str]=None) -> List[str]:
+        """
+        Compute the question types, the answer types of the groundtruths and the 
+        answer types of each model's predictions in batch, and save them as 
+        dictionary-encoded columns in ``Instance.type_columns``. This is where 
+        the questions and answers get classified: they are not classified when 
+        constructed. Columns that are already computed are skipped, unless the 
+        instances are changed, or the texts of the column are changed (e.g., 
+        the predictions of a model are regenerated).
+        
+        Parameters
+        ----------
+        instances : List[Instance]
+            A list of instances. Only the original ones (``vid=0``) are used.
+        models : List[str], optional
+            The models to compute answer types for, by default None. 
+            If None, use all the models in the predictions.
+        
+        Returns
+        -------
+        List[str]
+            The names of the newly computed columns.
+        """
+        instances = [ i for i in instances if i.vid == 0 ]
+        type_columns = Instance.type_columns
+        type_columns.set_rows([ i.key() for i in instances ])
+        if models is None:
+            models = set()
+            for i in instances:
+                models.update([ p.model for p in i.get_entry("predictions") or [] ])
+        computed = []
+        questions = [ i.get_entry('question') for i in instances ]
+        signature = get_signature([ q.doc.text if q and q.doc else None for q in questions ])
+        if not type_columns.is_current(QUESTION_COLUMN, signature):
+            type_columns.remove_column(QUESTION_COLUMN)
+            values = { i.key(): getattr(q, 'question_type', None) for i, q in zip(instances, questions) }
+            if any(values.values()):
+                type_columns.add_column(QUESTION_COLUMN, values, signature)
+                computed.append(QUESTION_COLUMN)
+        def _get_answer_type(answers):
+            answers = convert_list(answers) if answers else []
+            return get_answer_type(answers) if answers else None
+        for name in [ GROUNDTRUTH_COLUMN ] + sorted(models):
+            if name == GROUNDTRUTH_COLUMN:
+                answers = [ convert_list(i.get_entry('groundtruths') or []) for i in instances ]
+            else:
+                answers = [ convert_list(i.get_entry('prediction', name) or []) for i in instances ]
+            signature = get_signature([ '\x02'.join([ a.label for a in answer ]) for answer in answers ])
+            if type_columns.is_current(name, signature):
+                continue
+            type_columns.remove_column(name)
+            # the answer types are classified on the docs: annotate them in one batch.
+            Label.materialize_docs(list(itertools.chain.from_iterable(answers)))
+            values = { i.key(): _get_answer_type(a) for i, a in zip(instances, answers) }
+            if any(values.values()):
+                type_columns.add_column(name, values, signature)
+                computed.append(name)
+        if computed:
+            logger.info(f"Computed the type columns: {computed}.")
+        return computed
+
+    def compute_performance_table(self, instances: List[Instance], models: List[str]=None) -> List[str]:
+        """
+        Save the metrics of the predictions on the original instances to the dense
+        ``Label.performance_table``. Only the given models get their slices (re)filled,
+        unless the instances are changed.
+        
+        Parameters
+        ----------
+        instances : List[Instance]
+            A list of instances. Only the original ones (``vid=0``) are used.
+        models : List[str], optional
+            The models to add, by default None. 
+            If None, use all the models in the predictions.
+        
+        Returns
+        -------
+        List[str]
+            The models that are added.
+        """
+        instances = [ i for i in instances if i.vid == 0 ]
+        table = Label.performance_table
+        if table.set_rows([ i.key() for i in instances ]):
+            models = None
+        if models is None:
+            models = set()
+            for i in instances:
+                models.update([ p.model for p in i.get_entry("predictions") or [] ])
+        for model in sorted(models):
+            table.add_model(model, { i.key(): i.get_entry('prediction', model) for i in instances })
+        return sorted(models)
+
+    def compute_token_index(self, instances: List[Instance]) -> bool:
+        """
+        Build the posting lists of the token attributes for all the entries of
+        the original instances, and save them to ``Instance.token_index``. 
+        Skipped if the index is already built for the same instances.
+        
+        Parameters
+        ----------
+        instances : List[Instance]
+            A list of instances. Only the original ones (``vid=0``) are used.
+        
+        Returns
+        -------
+        bool
+            Whether or not the index is (re)built.
+        """
+        instances = [ i for i in instances if i.vid == 0 ]
+        if Instance.token_index.rows == [ i.key() for i in instances ]:
+            return False
+        Instance.token_index = TokenIndex.compile(instances, Instance.instance_entries)
+        return True
+
+    def compute_ling_perform_dict(self, instances: List[Instance], models: List[str]=None) -> None:
         """
         Compute the relationship between linguistic features and model performances. 
         It's used for the programming by demonstration. 
@@ -343,6 +682,10 @@ class DatasetReader(Registrable):
         ----------
         instances : List[Instance]
             A list of instances.
+        models : List[str], optional
+            If set, only compute the performances of these models, and merge them into 
+            the existing ``Instance.ling_perform_dict``. By default None, which recomputes
+            all the models.
 
         Returns
         -------
@@ -368,13 +711,33 @@ class DatasetReader(Registrable):
         err_sizes = defaultdict(int)
         # save the errors
         logger.info("Computing linguistic performance distribution per instance...")
+        if models is not None:
+            # the prediction docs of the models are all needed, so annotate them in one pass.
+            Label.materialize_docs([ i.get_entry('prediction', m) for i in instances for m in models ])
         for i in tqdm(instances):
             predictions = i.get_entry("predictions") or []
             for p in predictions:
+                if models is not None and p.model not in models:
+                    continue
                 if p.is_incorrect():
                    err_sizes[p.model] += 1
-            info_idxes = self._compute_ling_perform_dict_per_instance(i, info_idxes)
+            info_idxes = self._compute_ling_perform_dict_per_instance(i, info_idxes, models)
         logger.info("Computing the final distribution...")
-        Instance.ling_perform_dict = self._stats_of_info(info_idxes, total_size, err_sizes)
+        ling_perform_dict = self._stats_of_info(info_idxes, total_size, err_sizes)
+        if models is None:
+            Instance.ling_perform_dict = ling_perform_dict
+            return
+        # drop the previous entries of the models, and merge in the new ones.
+        for target_info in Instance.ling_perform_dict.values():
+            for pattern_info in target_info.values():
+                for model in models:
+                    pattern_info.pop(model, None)
+        for target, target_info in ling_perform_dict.items():
+            if target not in Instance.ling_perform_dict:
+                Instance.ling_perform_dict[target] = defaultdict(None)
+            for pattern, pattern_info in target_info.items():
+                if pattern not in Instance.ling_perform_dict[target]:
+                    Instance.ling_perform_dict[target][pattern] = {}
+                Instance.ling_perform_dict[target][pattern].update(pattern_info)
         #dump_caches(info_idxes_out, CACHE_FOLDERS["cache"] + 'feature_perform_idx.pkl')
 
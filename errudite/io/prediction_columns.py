@@ -0,0 +1,186 @@
+from typing import List, Dict
+import importlib
+import numpy as np
+
+from ..utils import dump_caches, load_caches
+from ..targets.label import Label
+from ..targets.interfaces import InstanceKey
+
+import logging
+logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+# the attributes saved as the dedicated columns.
+BASE_ATTRS = [ 'qid', 'vid', 'label', 'model', 'doc', 'perform' ]
+FORMAT_NAME = 'prediction_columns'
+
+
+def _get_class_path(obj: any) -> str:
+    return f'{obj.__class__.__module__}.{obj.__class__.__name__}'
+
+def _load_class(class_path: str) -> type:
+    module_name, class_name = class_path.rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class PredictionColumns(object):
+    """
+    The predictions of one model, saved as columns instead of pickled ``Label``
+    objects: the keys (``qid``, ``vid``), the predicted texts, the metrics in
+    ``Label.perform`` (e.g., ``confidence``, ``f1``), and the other attributes
+    of the labels (e.g., ``span_start``, ``answer_type``). No spacy doc is saved,
+    so loading is a plain columnar read: the docs of the restored labels are
+    annotated lazily, when a DSL command (or the serializer) first uses them.
+
+    The predictions are joined to the instances by their keys, not by their
+    positions in the file.
+
+    Attributes
+    ----------
+    model : str
+        The model name.
+    class_paths : List[str]
+        The label classes, e.g., ``errudite.targets.qa.answer.QAAnswer``.
+        ``class_codes`` indexes into it.
+    qids : List[str]
+        The qid of each prediction.
+    vids : np.ndarray
+        The vid of each prediction.
+    texts : List[str]
+        The predicted labels.
+    has_doc : np.ndarray
+        Whether the label has a doc. ``False`` for labels that are not annotated,
+        e.g., ``PredefinedLabel``.
+    metrics : Dict[str, np.ndarray]
+        ``{ metric: float64 scores }``, ``NaN`` for missing.
+    attrs : Dict[str, Union[list, np.ndarray]]
+        ``{ attribute name: values }``. Integer columns are saved as ``np.ndarray``.
+    class_attrs : List[List[str]]
+        The attribute names of each label class, aligned with ``class_paths``.
+    """
+    def __init__(self, model: str=None) -> None:
+        self.model: str = model
+        self.class_paths: List[str] = []
+        self.class_codes = np.zeros(0, dtype=np.int16)
+        self.qids: List[str] = []
+        self.vids = np.zeros(0, dtype=np.int32)
+        self.texts: List[str] = []
+        self.has_doc = np.zeros(0, dtype=bool)
+        self.metrics: Dict[str, np.ndarray] = {}
+        self.attrs: Dict[str, any] = {}
+        self.class_attrs: List[List[str]] = []
+
+    def __len__(self) -> int:
+        return len(self.qids)
+
+    @classmethod
+    def from_labels(cls, model: str, labels: List[Label]) -> 'PredictionColumns':
+        """
+        Split the predictions of one model into columns.
+
+        Parameters
+        ----------
+        model : str
+            The model name.
+        labels : List[Label]
+            The predictions. ``None`` s are skipped.
+
+        Returns
+        -------
+        PredictionColumns
+            The columns.
+        """
+        columns = cls(model)
+        labels = [ l for l in labels if l is not None ]
+        columns.class_paths = sorted(set([ _get_class_path(l) for l in labels ]))
+        class_idxes = { c: idx for idx, c in enumerate(columns.class_paths) }
+        columns.class_codes = np.array([ class_idxes[_get_class_path(l)] for l in labels ], dtype=np.int16)
+        columns.qids = [ l.qid for l in labels ]
+        columns.vids = np.array([ l.vid for l in labels ], dtype=np.int32)
+        columns.texts = [ l.label for l in labels ]
+        # lazy labels are not annotated yet, but they do need a doc.
+        columns.has_doc = np.array([
+            not l.has_doc() or l.__dict__['doc'] is not None for l in labels ], dtype=bool)
+        metric_names, attr_names = [], []
+        columns.class_attrs = [ [] for _ in columns.class_paths ]
+        for l, code in zip(labels, columns.class_codes.tolist()):
+            metric_names += [ m for m in l.perform if m not in metric_names ]
+            class_attrs = columns.class_attrs[code]
+            class_attrs += [ a for a in l.__dict__ if a not in BASE_ATTRS and a not in class_attrs ]
+            attr_names += [ a for a in class_attrs if a not in attr_names ]
+        for metric in metric_names:
+            columns.metrics[metric] = np.array(
+                [ l.perform.get(metric, np.nan) for l in labels ], dtype=np.float64)
+        for attr in attr_names:
+            values = [ l.__dict__.get(attr, None) for l in labels ]
+            if values and all([ type(v) == int for v in values ]):
+                values = np.array(values, dtype=np.int64)
+            columns.attrs[attr] = values
+        return columns
+
+    def to_labels(self) -> Dict[InstanceKey, Label]:
+        """
+        Restore the ``Label`` objects, without their docs.
+
+        Returns
+        -------
+        Dict[InstanceKey, Label]
+            ``{ InstanceKey: prediction }``
+        """
+        classes = [ _load_class(c) for c in self.class_paths ]
+        vids = self.vids.tolist()
+        has_doc = self.has_doc.tolist()
+        metrics = { m: values.tolist() for m, values in self.metrics.items() }
+        attrs = { a: values.tolist() if type(values) == np.ndarray else values
+            for a, values in self.attrs.items() }
+        outputs = {}
+        for idx, code in enumerate(self.class_codes.tolist()):
+            label = classes[code].__new__(classes[code])
+            # the lazy attributes that were not computed yet stay missing.
+            label.__dict__.update({ a: attrs[a][idx] for a in self.class_attrs[code] \
+                if attrs[a][idx] is not None or a not in classes[code].lazy_attrs })
+            label.__dict__.update(
+                qid=self.qids[idx], vid=vids[idx],
+                label=self.texts[idx], model=self.model,
+                perform={ m: scores[idx] for m, scores in metrics.items() if scores[idx] == scores[idx] })
+            if not has_doc[idx]:
+                label.doc = None
+            outputs[InstanceKey(qid=self.qids[idx], vid=vids[idx])] = label
+        return outputs
+
+    def serialize(self) -> Dict[str, any]:
+        return {
+            'format': FORMAT_NAME,
+            'model': self.model,
+            'class_paths': self.class_paths,
+            'class_codes': self.class_codes,
+            'qids': self.qids,
+            'vids': self.vids,
+            'texts': self.texts,
+            'has_doc': self.has_doc,
+            'metrics': self.metrics,
+            'attrs': self.attrs,
+            'class_attrs': self.class_attrs
+        }
+
+    @classmethod
+    def is_columnar(cls, raw: any) -> bool:
+        """If the loaded file is in the columnar format, not a list of pickled labels."""
+        return type(raw) == dict and raw.get('format', None) == FORMAT_NAME
+
+    @classmethod
+    def create_from_json(cls, raw: Dict[str, any]) -> 'PredictionColumns':
+        columns = cls(raw['model'])
+        for key in [ 'class_paths', 'class_codes', 'qids', 'vids', 'texts', 'has_doc', 'metrics', 'attrs', 'class_attrs' ]:
+            setattr(columns, key, raw[key])
+        return columns
+
+    def dump(self, file_path: str) -> None:
+        dump_caches(self.serialize(), file_path)
+        logger.info(f"Dumped {len(self)} predictions of [ {self.model} ] to {file_path}.")
+
+    @classmethod
+    def load(cls, file_path: str) -> 'PredictionColumns':
+        raw = load_caches(file_path)
+        if not cls.is_columnar(raw):
+            return None
+        return cls.create_from_json(raw)
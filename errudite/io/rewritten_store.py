@@ -0,0 +1,267 @@
+from typing import List, Dict, Tuple
+import os
+import copy
+import glob
+from collections import OrderedDict
+from ..utils import dump_caches, load_caches, CACHE_FOLDERS
+from ..targets.instance import Instance
+from ..targets.interfaces import InstanceKey
+
+import logging
+logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+
+class RewrittenStore(object):
+    """
+    An append-only, chunked on-disk store for the rewritten instances
+    (``vid != 0``), together with their targets and the predictions of all
+    the models. It lets the rewritten instances survive restarts without
+    re-running the models.
+
+    Every ``flush`` writes one new chunk: ``chunk_[idx].pkl`` holds the
+    instances, and ``chunk_[idx].keys.pkl`` holds their ``(qid, vid, rid)``.
+    The keys file is written last, so a chunk without it (e.g. from an
+    interrupted write) is ignored. Chunks are never rewritten: removing an
+    instance appends a tombstone, and a later entry of the same key always
+    wins. Opening the store only reads the keys files; the instances are
+    loaded by chunk, on demand.
+
+    .. code-block:: bash
+
+        .
+        └── rewritten
+            ├── chunk_00000.keys.pkl
+            ├── chunk_00000.pkl
+            └── ...
+
+    Parameters
+    ----------
+    folder : str, optional
+        The folder of the store, by default None. If None,
+        use ``rewritten/`` in the cache folder.
+    chunk_size : int, optional
+        The max number of pending entries before they are flushed
+        to a new chunk, by default 1000
+    max_loaded_chunks : int, optional
+        The max number of chunks kept in memory, by default 8
+    """
+    def __init__(self,
+        folder: str=None,
+        chunk_size: int=1000,
+        max_loaded_chunks: int=8) -> None:
+        self.folder = folder or os.path.join(CACHE_FOLDERS["cache"], 'rewritten/')
+        self.chunk_size = chunk_size
+        self.max_loaded_chunks = max_loaded_chunks
+        # { InstanceKey: (chunk idx, position in chunk) }
+        self.index: Dict[InstanceKey, Tuple[int, int]] = {}
+        # { InstanceKey: rid }
+        self.rids: Dict[InstanceKey, str] = {}
+        self.n_chunks: int = 0
+        # [ (InstanceKey, rid, Instance or None for the tombstones) ]
+        self.pending: List[Tuple[InstanceKey, str, Instance]] = []
+        self.loaded_chunks: OrderedDict = OrderedDict()
+
+    def __contains__(self, key: InstanceKey) -> bool:
+        return key in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def _chunk_path(self, chunk_idx: int, is_keys: bool=False) -> str:
+        suffix = '.keys.pkl' if is_keys else '.pkl'
+        return os.path.join(self.folder, f'chunk_{chunk_idx:05d}{suffix}')
+
+    def open(self) -> int:
+        """
+        Read the keys of all the complete chunks, and build the index.
+
+        Returns
+        -------
+        int
+            The number of stored rewritten instances.
+        """
+        if not os.path.exists(self.folder):
+            os.makedirs(self.folder)
+        self.index, self.rids, self.loaded_chunks = {}, {}, OrderedDict()
+        chunk_idxes = sorted([
+            int(os.path.basename(f).split('.')[0].split('_')[-1])
+            for f in glob.glob(os.path.join(self.folder, 'chunk_*.keys.pkl')) ])
+        for chunk_idx in chunk_idxes:
+            keys = load_caches(self._chunk_path(chunk_idx, is_keys=True))
+            if keys is None:
+                continue
+            for position, (qid, vid, rid, is_removed) in enumerate(keys):
+                key = InstanceKey(qid=qid, vid=vid)
+                if is_removed:
+                    self.index.pop(key, None)
+                    self.rids.pop(key, None)
+                else:
+                    self.index[key] = (chunk_idx, position)
+                    self.rids[key] = rid
+        self.n_chunks = chunk_idxes[-1] + 1 if chunk_idxes else 0
+        logger.info(f"Opened {len(self.index)} rewritten instances from {self.folder}.")
+        return len(self.index)
+
+    def keys(self) -> List[Tuple[InstanceKey, str]]:
+        """
+        Get the keys of all the stored rewritten instances.
+
+        Returns
+        -------
+        List[Tuple[InstanceKey, str]]
+            ``[ (InstanceKey, rid) ]``
+        """
+        return [ (key, self.rids[key]) for key in self.index ]
+
+    def append(self, instance: Instance) -> None:
+        """
+        Add a rewritten instance. It is written to disk with the next ``flush``,
+        which is triggered automatically every ``chunk_size`` entries.
+
+        Parameters
+        ----------
+        instance : Instance
+            The rewritten instance, with its predictions set.
+
+        Returns
+        -------
+        None
+        """
+        if not instance or instance.vid == 0:
+            return
+        self.pending.append((instance.key(), instance.rid, instance))
+        if len(self.pending) >= self.chunk_size:
+            self.flush()
+
+    def remove(self, key: InstanceKey) -> None:
+        """
+        Remove a rewritten instance, by appending a tombstone.
+
+        Parameters
+        ----------
+        key : InstanceKey
+            The key of the instance.
+
+        Returns
+        -------
+        None
+        """
+        if key not in self.index and not any([ p[0] == key for p in self.pending ]):
+            return
+        self.pending.append((key, self.rids.get(key, None), None))
+        if len(self.pending) >= self.chunk_size:
+            self.flush()
+
+    def _to_bytes_copy(self, instance: Instance) -> Instance:
+        # to_bytes replaces the docs in place, so the byte version is built on 
+        # copies of the instance and its targets; the live ones keep their docs.
+        output = copy.copy(instance)
+        for entry in output.get_local_entries():
+            got_entry = getattr(output, entry, None)
+            if type(got_entry) == list:
+                setattr(output, entry, [ copy.copy(g) for g in got_entry ])
+            elif got_entry is not None:
+                setattr(output, entry, copy.copy(got_entry))
+        return output.to_bytes()
+
+    def flush(self) -> None:
+        """
+        Write all the pending entries to a new chunk.
+
+        Returns
+        -------
+        None
+        """
+        if not self.pending:
+            return
+        if not os.path.exists(self.folder):
+            os.makedirs(self.folder)
+        chunk_idx = self.n_chunks
+        pending, self.pending = self.pending, []
+        dump_caches(
+            [ self._to_bytes_copy(i) if i else None for _, _, i in pending ],
+            self._chunk_path(chunk_idx))
+        dump_caches(
+            [ (key.qid, key.vid, rid, i is None) for key, rid, i in pending ],
+            self._chunk_path(chunk_idx, is_keys=True))
+        for position, (key, rid, i) in enumerate(pending):
+            if i is None:
+                self.index.pop(key, None)
+                self.rids.pop(key, None)
+            else:
+                self.index[key] = (chunk_idx, position)
+                self.rids[key] = rid
+        self.n_chunks += 1
+        logger.info(f"Flushed {len(pending)} rewritten entries to {self._chunk_path(chunk_idx)}.")
+
+    def _load_chunk(self, chunk_idx: int) -> List[Instance]:
+        if chunk_idx in self.loaded_chunks:
+            self.loaded_chunks.move_to_end(chunk_idx)
+            return self.loaded_chunks[chunk_idx]
+        chunk = load_caches(self._chunk_path(chunk_idx)) or []
+        self.loaded_chunks[chunk_idx] = chunk
+        while len(self.loaded_chunks) > self.max_loaded_chunks:
+            self.loaded_chunks.popitem(last=False)
+        return chunk
+
+    def get(self, key: InstanceKey) -> Instance:
+        """
+        Load one rewritten instance from its chunk.
+
+        Parameters
+        ----------
+        key : InstanceKey
+            The key of the instance.
+
+        Returns
+        -------
+        Instance
+            The instance, or ``None`` if it is not stored.
+        """
+        for pending_key, _, instance in reversed(self.pending):
+            if pending_key == key:
+                return instance
+        if key not in self.index:
+            return None
+        chunk_idx, position = self.index[key]
+        chunk = self._load_chunk(chunk_idx)
+        if position >= len(chunk) or not chunk[position]:
+            return None
+        # from_bytes is in place and idempotent, so the chunk 
+        # keeps the byte version only until an instance is requested.
+        return chunk[position].from_bytes()
+
+    def register_keys(self) -> None:
+        """
+        Add the keys of all the stored rewritten instances to ``Instance.qid_hash``,
+        so the new versions get the right vids. The instances themselves
+        are loaded by ``Instance.get`` on demand.
+
+        Returns
+        -------
+        None
+        """
+        for key in sorted(self.index, key=lambda k: (k.qid, k.vid)):
+            if key not in Instance.qid_hash[key.qid]:
+                Instance.qid_hash[key.qid].append(key)
+
+    def load_all(self) -> List[Instance]:
+        """
+        Load all the stored rewritten instances, and save them
+        to ``Instance.instance_hash_rewritten``.
+
+        Returns
+        -------
+        List[Instance]
+            The loaded instances.
+        """
+        instances = []
+        for key in sorted(self.index, key=lambda k: self.index[k]):
+            if key in Instance.instance_hash_rewritten:
+                instances.append(Instance.instance_hash_rewritten[key])
+                continue
+            instance = self.get(key)
+            if instance:
+                Instance.save(instance)
+                instances.append(instance)
+        return instances
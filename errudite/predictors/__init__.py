@@ -1,4 +1,5 @@
 from .predictor import Predictor
+from .predictor_service import PredictorService
 from .qa.predictor_qa import PredictorQA
 from .nli.predictor_nli import PredictorNLI
 from .sentiment_analysis.predictor_sentiment_analysis import PredictorSA
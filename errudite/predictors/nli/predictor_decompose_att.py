@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, List
 import traceback
 import numpy as np
 from .predictor_nli import PredictorNLI
@@ -31,16 +31,27 @@ class PredictorDecomposeAtt(PredictorNLI, PredictorAllennlp, Predictor):
             description=description)
         PredictorNLI.__init__(self, name, description, self.predictor)
 
+    def _format_prediction(self, predicted: Dict[str, any]) -> Dict[str, float]:
+        labels = ['entailment', 'contradiction', 'neutral']
+        label_probs = predicted['label_probs']
+        return {
+            'confidence': max(label_probs),
+            'text': labels[np.argmax(label_probs)],
+        }
+
     def predict(self, premise: str, hypothesis: str) -> Dict[str, float]:
         try:
-            labels = ['entailment', 'contradiction', 'neutral']
             predicted = self._predict_json(
                 premise=premise, 
                 hypothesis=hypothesis)
-            label_probs = predicted['label_probs']
-            return {
-                'confidence': max(label_probs),
-                'text': labels[np.argmax(label_probs)],
-            }
+            return self._format_prediction(predicted)
+        except:
+            raise
+
+    def predict_batch(self, inputs: List[Dict[str, str]]) -> List[Dict[str, float]]:
+        try:
+            predicted = self._predict_batch_json([
+                { 'premise': i['premise'], 'hypothesis': i['hypothesis'] } for i in inputs ])
+            return [ self._format_prediction(p) for p in predicted ]
         except:
-            raise
\ No newline at end of file
+            raise
@@ -64,7 +64,57 @@ class PredictorNLI(Predictor):
         answer = None
         if not predictor:
             return answer
-        predicted = predictor.predict(premise.get_text(), hypothesis.get_text())
+        predicted = predictor.cached_predict(premise=premise.get_text(), hypothesis=hypothesis.get_text())
+        answer = cls._wrap_prediction(predictor, predicted, premise, hypothesis, groundtruth)
+        if answer:
+            answer.compute_perform(groundtruths=groundtruth)
+        return answer
+
+    @classmethod
+    def model_predict_batch(cls, 
+        predictor: 'PredictorNLI', 
+        premise: List['Target'], 
+        hypothesis: List['Target'], 
+        groundtruth: List['Label']) -> List['Label']:
+        """
+        The batch version of ``model_predict``. It runs the model on all the 
+        inputs with ``predictor.cached_predict_batch``, and computes the performances 
+        of the predictions in one pass with ``Label.compute_perform_batch``.
+        
+        Parameters
+        ----------
+        predictor : Predictor
+            A predictor object, with the predict method implemented.
+        premise : List[Target]
+            The premise targets. 
+        hypothesis : List[Target]
+            The hypothesis targets, aligned with the premises. 
+        groundtruth : List[Label]
+            The groundtruths, aligned with the premises.
+        
+        Returns
+        -------
+        List[Label]
+            The predicted outputs, with performance saved. ``None`` if 
+            the prediction failed.
+        """
+        if not predictor:
+            return [ None ] * len(premise)
+        predicted_list = predictor.cached_predict_batch([
+            { 'premise': p.get_text(), 'hypothesis': h.get_text() } 
+            for p, h in zip(premise, hypothesis) ])
+        answers = [ cls._wrap_prediction(predictor, predicted, p, h, g) 
+            for predicted, p, h, g in zip(predicted_list, premise, hypothesis, groundtruth) ]
+        Label.compute_perform_batch(answers, [ g.label if g else None for g in groundtruth ])
+        return answers
+
+    @classmethod
+    def _wrap_prediction(cls, 
+        predictor: 'PredictorNLI', 
+        predicted: Dict[str, float],
+        premise: 'Target', 
+        hypothesis: 'Target', 
+        groundtruth: 'Label') -> 'Label':
         if not predicted:
             return None
         answer = PredefinedLabel(
@@ -72,6 +122,5 @@ class PredictorNLI(Predictor):
             qid=premise.qid,
             text=predicted['text'], 
             vid=max([premise.vid, hypothesis.vid, groundtruth.vid] ))
-        answer.compute_perform(groundtruths=groundtruth)
         answer.set_perform(confidence=predicted['confidence'])
         return answer
\ No newline at end of file
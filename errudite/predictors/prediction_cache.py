@@ -0,0 +1,244 @@
+from typing import List, Dict, Any
+import os
+import json
+import time
+import pickle
+import sqlite3
+import hashlib
+import threading
+from ..utils import CACHE_FOLDERS
+
+import logging
+logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+CACHE_FILE_NAME = 'prediction_cache.sqlite'
+# 256MB of pickled predictions, the suggested size when the cache is enabled.
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+# evict down to this ratio of the max size, so evictions are not run on every insert.
+EVICT_TO_RATIO = 0.9
+# sqlite limits the number of variables in one statement.
+QUERY_CHUNK_SIZE = 500
+
+
+def get_model_fingerprint(model_path: str) -> str:
+    """
+    The fingerprint of a model archive. For local files, it's the path, the
+    size and the modified time, so a retrained archive at the same path gets
+    a new fingerprint without hashing the whole file. Online paths are used as-is.
+
+    Parameters
+    ----------
+    model_path : str
+        The local or the online model path.
+
+    Returns
+    -------
+    str
+        The fingerprint. ``None`` if the path is None.
+    """
+    if not model_path:
+        return None
+    if os.path.exists(model_path):
+        stat = os.stat(model_path)
+        return f'{os.path.abspath(model_path)}:{stat.st_size}:{int(stat.st_mtime)}'
+    return model_path
+
+
+class PredictionCache(object):
+    """
+    A persistent cache of the raw model outputs (i.e., the outputs of
+    ``Predictor.predict``), so repeated rewrite previews, the re-runs of
+    ``predict_formalize`` and the rewrite rules that yield identical texts skip
+    the model entirely. The predictions are keyed by the predictor name,
+    the model fingerprint, and the normalized inputs, and saved in a sqlite
+    file under the cache folder. When the file grows over ``max_size``, the
+    least recently used predictions are evicted.
+
+    The cache is opt-in: it is disabled unless ``max_size`` is set (see ``set_max_size``),
+    because a cached output is only valid as long as the model behind the 
+    fingerprint is deterministic and unchanged.
+
+    The inputs are normalized by their canonical json encoding: the texts are
+    kept as-is, because the predicted offsets (e.g., ``char_start``) refer to
+    the exact input texts.
+
+    Parameters
+    ----------
+    max_size : int, optional
+        The maximum total size of the pickled predictions, in bytes,
+        by default 0, i.e., the cache is disabled. ``DEFAULT_MAX_SIZE`` is 256MB.
+    file_path : str, optional
+        The sqlite file, by default None, i.e., ``[cache folder]/prediction_cache.sqlite``,
+        resolved when the cache is first used.
+    """
+    def __init__(self, max_size: int=0, file_path: str=None) -> None:
+        self.max_size: int = max_size
+        self.file_path: str = file_path
+        self.conn: sqlite3.Connection = None
+        self.conn_path: str = None
+        self.total_size: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.lock = threading.RLock()
+
+    def _get_conn(self) -> sqlite3.Connection:
+        file_path = self.file_path or os.path.join(CACHE_FOLDERS["cache"], CACHE_FILE_NAME)
+        if self.conn is not None and self.conn_path == file_path:
+            return self.conn
+        self.close()
+        os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+        # the predictor services call the cache from their worker threads.
+        self.conn = sqlite3.connect(file_path, check_same_thread=False)
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS predictions (
+            key TEXT PRIMARY KEY, value BLOB, size INTEGER, accessed REAL)''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS accessed_idx ON predictions (accessed)')
+        self.conn.commit()
+        self.conn_path = file_path
+        self.total_size = self.conn.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM predictions').fetchone()[0]
+        logger.info(f"Opened the prediction cache {file_path}: {self.total_size} bytes.")
+        return self.conn
+
+    def is_enabled(self) -> bool:
+        return self.max_size > 0
+
+    def set_max_size(self, max_size: int=DEFAULT_MAX_SIZE) -> None:
+        """
+        Enable (or resize) the cache. The saved predictions over the new size are evicted.
+
+        Parameters
+        ----------
+        max_size : int, optional
+            The maximum total size in bytes, by default ``DEFAULT_MAX_SIZE``.
+            If 0, the cache is disabled, and the saved predictions are kept in the file.
+
+        Returns
+        -------
+        None
+        """
+        with self.lock:
+            self.max_size = max_size
+            if self.is_enabled():
+                conn = self._get_conn()
+                if self.total_size > self.max_size:
+                    self._evict(conn)
+                    conn.commit()
+            logger.info(f"Set the prediction cache size to {max_size} bytes.")
+
+    def get_key(self, predictor: 'Predictor', inputs: Dict[str, Any]) -> str:
+        """
+        The cache key of one prediction.
+
+        Parameters
+        ----------
+        predictor : Predictor
+            The predictor.
+        inputs : Dict[str, Any]
+            The kwargs of ``predictor.predict``.
+
+        Returns
+        -------
+        str
+            A sha1 hex digest.
+        """
+        raw = json.dumps([ predictor.name, predictor.get_fingerprint(), inputs ],
+            sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Get the cached predictions, and mark them as recently used.
+
+        Parameters
+        ----------
+        keys : List[str]
+            The keys, from ``get_key``.
+
+        Returns
+        -------
+        Dict[str, Any]
+            ``{ key: prediction }``, only the cached ones.
+        """
+        if not self.is_enabled() or not keys:
+            return {}
+        outputs = {}
+        keys = list(set(keys))
+        with self.lock:
+            conn = self._get_conn()
+            for start in range(0, len(keys), QUERY_CHUNK_SIZE):
+                chunk = keys[start:start+QUERY_CHUNK_SIZE]
+                rows = conn.execute(
+                    f'SELECT key, value FROM predictions WHERE key IN ({",".join(["?"] * len(chunk))})',
+                    chunk).fetchall()
+                outputs.update({ key: pickle.loads(value) for key, value in rows })
+            if outputs:
+                now = time.time()
+                conn.executemany('UPDATE predictions SET accessed = ? WHERE key = ?',
+                    [ (now, key) for key in outputs ])
+                conn.commit()
+            self.hits += len(outputs)
+            self.misses += len(keys) - len(outputs)
+        return outputs
+
+    def set_many(self, predictions: Dict[str, Any]) -> None:
+        """
+        Save the predictions, and evict the least recently used ones
+        if the cache is too large.
+
+        Parameters
+        ----------
+        predictions : Dict[str, Any]
+            ``{ key: prediction }``. ``None`` predictions are not saved.
+
+        Returns
+        -------
+        None
+        """
+        if not self.is_enabled():
+            return
+        now = time.time()
+        rows = []
+        for key, prediction in predictions.items():
+            if prediction is None:
+                continue
+            value = pickle.dumps(prediction, protocol=pickle.HIGHEST_PROTOCOL)
+            rows.append((key, value, len(value), now))
+        if not rows:
+            return
+        with self.lock:
+            conn = self._get_conn()
+            keys = [ r[0] for r in rows ]
+            for start in range(0, len(keys), QUERY_CHUNK_SIZE):
+                chunk = keys[start:start+QUERY_CHUNK_SIZE]
+                self.total_size -= conn.execute(
+                    f'SELECT COALESCE(SUM(size), 0) FROM predictions WHERE key IN ({",".join(["?"] * len(chunk))})',
+                    chunk).fetchone()[0]
+            conn.executemany('INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)', rows)
+            self.total_size += sum([ r[2] for r in rows ])
+            if self.total_size > self.max_size:
+                self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        target_size = self.max_size * EVICT_TO_RATIO
+        evicted, evicted_size = [], 0
+        for key, size in conn.execute('SELECT key, size FROM predictions ORDER BY accessed'):
+            if self.total_size - evicted_size <= target_size:
+                break
+            evicted.append((key,))
+            evicted_size += size
+        conn.executemany('DELETE FROM predictions WHERE key = ?', evicted)
+        self.total_size -= evicted_size
+        logger.info(f"Evicted {len(evicted)} predictions ({evicted_size} bytes) from the prediction cache.")
+
+    def clear(self) -> None:
+        with self.lock:
+            conn = self._get_conn()
+            conn.execute('DELETE FROM predictions')
+            conn.commit()
+            self.total_size = 0
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+        self.conn, self.conn_path = None, None
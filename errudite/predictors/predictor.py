@@ -1,5 +1,7 @@
 from typing import List, Dict, Any
 from ..utils import Registrable
+from ..targets.label import Label
+from .prediction_cache import PredictionCache, get_model_fingerprint
 
 class Predictor(Registrable):
     """A base class for predictors.
@@ -26,7 +28,13 @@ class Predictor(Registrable):
         .. code-block:: js
             
             { perform_name: the averaged performance score. }
+    prediction_cache : PredictionCache
+        A class attribute. The persistent cache of the model outputs, shared by 
+        all the predictors and consulted by ``cached_predict``. Disabled by
+        default; enable it with ``Predictor.prediction_cache.set_max_size()``.
     """
+    prediction_cache = PredictionCache()
+
     def __init__(self, 
         name: str, 
         description: str, 
@@ -52,6 +60,75 @@ class Predictor(Registrable):
         """
         raise NotImplementedError
 
+    def predict_batch(self, inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Run the prediction on a batch of inputs. By default, this calls 
+        ``self.predict`` on each of the inputs. Subclasses whose model 
+        supports batched inference should override it.
+
+        Parameters
+        ----------
+        inputs : List[Dict[str, Any]]
+            A list of kwargs of ``self.predict``.
+
+        Returns
+        -------
+        List[Dict[str, Any]]
+            The predictions, aligned with the inputs.
+        """
+        return [ self.predict(**i) for i in inputs ]
+
+    def get_fingerprint(self) -> str:
+        """The fingerprint of the model, from ``self.model_path`` (or ``self.model_online_path``)
+        if the subclass saves it, otherwise the class path of the predictor."""
+        if getattr(self, '_fingerprint', None) is None:
+            self._fingerprint = get_model_fingerprint(
+                getattr(self, 'model_path', None) or getattr(self, 'model_online_path', None)) or \
+                f'{self.__class__.__module__}.{self.__class__.__name__}'
+        return self._fingerprint
+
+    def cached_predict(self, **inputs) -> Dict[str, Any]:
+        """
+        ``self.predict``, through ``Predictor.prediction_cache``.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The prediction.
+        """
+        return self.cached_predict_batch([ inputs ])[0]
+
+    def cached_predict_batch(self, inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        ``self.predict_batch``, through ``Predictor.prediction_cache``: only the inputs
+        that are not cached are run by the model, and their outputs are then cached.
+
+        Parameters
+        ----------
+        inputs : List[Dict[str, Any]]
+            A list of kwargs of ``self.predict``.
+
+        Returns
+        -------
+        List[Dict[str, Any]]
+            The predictions, aligned with the inputs.
+        """
+        cache = Predictor.prediction_cache
+        if not cache.is_enabled():
+            return self.predict_batch(inputs)
+        keys = [ cache.get_key(self, i) for i in inputs ]
+        cached = cache.get_many(keys)
+        # identical inputs in the same batch are only predicted once.
+        missing = {}
+        for key, i in zip(keys, inputs):
+            if key not in cached and key not in missing:
+                missing[key] = i
+        if missing:
+            predicted = dict(zip(missing.keys(), self.predict_batch(list(missing.values()))))
+            cache.set_many(predicted)
+            cached.update(predicted)
+        return [ cached[key] for key in keys ]
+
     def evaluate_performance(self, instances: List['Instance']) -> None:
         """Save the performance of the predictor.
         It iterates through metric names in ``self.perform_metrics``, and average the 
@@ -71,7 +148,11 @@ class Predictor(Registrable):
         """
         instances = list(filter(lambda i: i.vid==0, instances))
         n_total = len(instances)
-        if n_total != 0:
+        keys = [ i.key() for i in instances ]
+        if n_total != 0 and self.name in Label.performance_table and \
+            Label.performance_table.covers(keys):
+            self.perform.update(Label.performance_table.average(self.name, self.perform_metrics, keys))
+        elif n_total != 0:
             for metric in self.perform_metrics:
                 self.perform[metric] = sum([
                     i.get_entry('prediction', self.name).perform[metric] for i in instances]) / n_total
@@ -150,4 +231,33 @@ class Predictor(Registrable):
         NotImplementedError
             This needs to be implemented per task.
         """
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    @classmethod
+    def model_predict_batch(cls, 
+        predictor: 'Predictor', 
+        **target_lists) -> List['Label']:
+        """
+        The batch version of ``model_predict``. Each kwarg is a list of targets, 
+        and all the lists are aligned. By default, this calls ``model_predict``
+        on each group of targets. Task classes should override it so the 
+        model runs on all the inputs with ``predictor.predict_batch``.
+        
+        Parameters
+        ----------
+        predictor : Predictor
+            A predictor object, with the predict method implemented.
+        target_lists : List[Target]
+            Lists of targets in kwargs format
+
+        Returns
+        -------
+        List[Label]
+            The predicted outputs, with performance saved, and aligned with the 
+            targets. ``None`` if the prediction failed.
+        """
+        names = list(target_lists.keys())
+        return [
+            cls.model_predict(predictor, **dict(zip(names, targets)))
+            for targets in zip(*[ target_lists[n] for n in names ])
+        ]
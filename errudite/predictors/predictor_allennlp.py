@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, List
 import traceback
 import numpy as np
 from allennlp.models.archival import load_archive
@@ -37,6 +37,9 @@ class PredictorAllennlp(Predictor):
         None
         """
         model = None
+        # saved for the fingerprint of the model.
+        self.model_path = model_path
+        self.model_online_path = model_online_path
         model_path = model_path or model_online_path
         if model_path:
             if torch.cuda.is_available():
@@ -52,4 +55,11 @@ class PredictorAllennlp(Predictor):
             predicted = self.predictor.predict_json(inputs)
             return predicted
         except:
-            raise
\ No newline at end of file
+            raise
+
+    def _predict_batch_json(self, inputs: List[Dict[str, str]]) -> List[Dict[str, float]]:
+        try:
+            predicted = self.predictor.predict_batch_json(inputs)
+            return predicted
+        except:
+            raise
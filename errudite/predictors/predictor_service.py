@@ -0,0 +1,137 @@
+from typing import List, Dict, Any
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from .predictor import Predictor
+
+import logging
+logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+# the sentinel that stops a worker.
+_STOP = object()
+
+
+class PredictorService(object):
+    """
+    A local service in front of one ``Predictor``, so that concurrent single-example
+    requests (e.g., parallel UI requests, or all the candidates of a rewrite preview)
+    share the model forward passes. Requests are put into a queue, and each worker
+    collects them into micro-batches: it waits for at most ``max_wait_ms`` after the
+    first request, or until ``max_batch_size`` requests are collected, and runs them
+    with one ``predictor.cached_predict_batch`` call. Callers get ``Future`` s back.
+
+    Parameters
+    ----------
+    predictor : Predictor
+        The wrapped predictor.
+    max_batch_size : int, optional
+        The maximum number of requests in one ``predict_batch`` call, by default 32.
+    max_wait_ms : float, optional
+        How long a worker waits to fill a batch after the first request, by default 10.
+    n_workers : int, optional
+        The number of worker threads, by default 1. More than one only helps if the
+        model releases the GIL (e.g., torch) and has the memory to run batches in parallel.
+    """
+    def __init__(self,
+        predictor: Predictor,
+        max_batch_size: int=32,
+        max_wait_ms: float=10,
+        n_workers: int=1) -> None:
+        self.predictor: Predictor = predictor
+        self.max_batch_size: int = max(1, max_batch_size)
+        self.max_wait: float = max_wait_ms / 1000
+        self.requests: queue.Queue = queue.Queue()
+        self.workers: List[threading.Thread] = []
+        for idx in range(max(1, n_workers)):
+            worker = threading.Thread(
+                target=self._run, name=f'predictor-service-{predictor.name}-{idx}', daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def submit(self, **inputs) -> Future:
+        """
+        Queue one request.
+
+        Parameters
+        ----------
+        inputs :
+            The kwargs of ``self.predictor.predict``.
+
+        Returns
+        -------
+        Future
+            The future of the prediction, i.e., the output of ``predictor.predict``.
+        """
+        future = Future()
+        self.requests.put((inputs, future))
+        return future
+
+    def submit_batch(self, inputs: List[Dict[str, Any]]) -> List[Future]:
+        """
+        Queue multiple requests at once. They are batched with the requests
+        from the other callers.
+
+        Parameters
+        ----------
+        inputs : List[Dict[str, Any]]
+            A list of kwargs of ``self.predictor.predict``.
+
+        Returns
+        -------
+        List[Future]
+            The futures, aligned with the inputs.
+        """
+        return [ self.submit(**i) for i in inputs ]
+
+    def predict(self, **inputs) -> Dict[str, Any]:
+        """The blocking version of ``submit``."""
+        return self.submit(**inputs).result()
+
+    def predict_batch(self, inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """The blocking version of ``submit_batch``."""
+        return [ f.result() for f in self.submit_batch(inputs) ]
+
+    def _collect(self, first: tuple) -> List[tuple]:
+        batch = [ first ]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                request = self.requests.get(timeout=timeout) if timeout > 0 else self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is _STOP:
+                # leave it for the loop, after this batch is done.
+                self.requests.put(_STOP)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            request = self.requests.get()
+            if request is _STOP:
+                return
+            batch = [ (inputs, future) for inputs, future in self._collect(request) \
+                if future.set_running_or_notify_cancel() ]
+            if not batch:
+                continue
+            try:
+                outputs = self.predictor.cached_predict_batch([ inputs for inputs, _ in batch ])
+                for (_, future), output in zip(batch, outputs):
+                    future.set_result(output)
+            except Exception as e:
+                logger.error(f"[ {self.predictor.name} ]: batch of {len(batch)} failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def shutdown(self, wait: bool=True) -> None:
+        """Stop the workers. The queued requests are still run first."""
+        for _ in self.workers:
+            self.requests.put(_STOP)
+        if wait:
+            for worker in self.workers:
+                worker.join()
+        self.workers = []
@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, List
 import traceback
 from ...utils.evaluator import qa_score
 from ...targets.label import Label
@@ -35,15 +35,28 @@ class PredictorBiDAF(PredictorQA, PredictorAllennlp, Predictor):
         PredictorQA.__init__(self, name, description, self.predictor)
         Label.set_task_evaluator(qa_score, 'f1')
 
+    def _format_prediction(self, predicted: Dict[str, any]) -> Dict[str, float]:
+        span_start, span_end = predicted['best_span'][0], predicted['best_span'][1]
+        return {
+            'confidence': predicted['span_start_probs'][span_start] * predicted['span_end_probs'][span_end],
+            'text': predicted['best_span_str'],
+            'span_start': predicted['best_span'][0]
+        }
+
     def predict(self, qtext: str, ptext: str) -> Dict[str, float]:
         try:
             predicted = self._predict_json(passage=ptext, question=qtext)
-            span_start, span_end = predicted['best_span'][0], predicted['best_span'][1]
-            return {
-                'confidence': predicted['span_start_probs'][span_start] * predicted['span_end_probs'][span_end],
-                'text': predicted['best_span_str'],
-                'span_start': predicted['best_span'][0]
-            }
+            return self._format_prediction(predicted)
+        except Exception as e:
+            logger.error(e)
+            return None
+
+    def predict_batch(self, inputs: List[Dict[str, str]]) -> List[Dict[str, float]]:
+        try:
+            predicted = self._predict_batch_json([
+                { 'passage': i['ptext'], 'question': i['qtext'] } for i in inputs ])
+            return [ self._format_prediction(p) for p in predicted ]
         except Exception as e:
+            # one failing input fails the whole batch; retry one by one.
             logger.error(e)
-            return None
\ No newline at end of file
+            return Predictor.predict_batch(self, inputs)
@@ -27,6 +27,7 @@ class PredictorDrQA(PredictorQA):
         Predictor.by_name("drqa")
     """
     def __init__(self, name: str, model_path: str, description: str='') -> None:
+        self.model_path = model_path
         model = DrQAReader.Predictor(model=model_path, tokenizer='spacy', num_workers=0)
         PredictorQA.__init__(self, name, description, model)
         
@@ -62,10 +62,63 @@ class PredictorQA(Predictor):
         QAAnswer
             The predicted output, with performance saved.
         """
-        answer = None
         if not predictor:
-            return answer
-        predicted = predictor.predict(question.get_text(), context.get_text())
+            return None
+        predicted = predictor.cached_predict(qtext=question.get_text(), ptext=context.get_text())
+        return cls._wrap_prediction(predictor, predicted, question, context, groundtruths)
+
+    @classmethod
+    def model_predict_batch(cls, 
+        predictor: 'Predictor', 
+        questions: List['Question'], 
+        contexts: List['Context'], 
+        groundtruths: List[List['QAAnswer']]) -> List['QAAnswer']:
+        """
+        The batch version of ``model_predict``. It runs the model on all the 
+        inputs with ``predictor.cached_predict_batch``, wraps the outputs into Labels, 
+        and computes their performances in one pass with ``Label.compute_perform_batch``.
+        
+        Parameters
+        ----------
+        predictor : Predictor
+            A predictor object, with the predict method implemented.
+        questions : List[Question]
+            Question targets. 
+        contexts : List[Context]
+            Context targets, aligned with the questions.
+        groundtruths : List[List[QAAnswer]]
+            The groundtruth lists, aligned with the questions.
+        
+        Returns
+        -------
+        List[QAAnswer]
+            The predicted outputs, with performance saved. ``None`` if 
+            the prediction failed.
+        """
+        if not predictor:
+            return [ None ] * len(questions)
+        predicted_list = predictor.cached_predict_batch([
+            { 'qtext': q.get_text(), 'ptext': c.get_text() } 
+            for q, c in zip(questions, contexts) ])
+        answers = [ 
+            cls._wrap_prediction(predictor, predicted, question, context, gs, compute_perform=False) 
+            for predicted, question, context, gs in \
+            zip(predicted_list, questions, contexts, groundtruths) ]
+        Label.compute_perform_batch(answers, 
+            [ [ g.label for g in gs ] if gs else None for gs in groundtruths ])
+        for answer, gs in zip(answers, groundtruths):
+            if answer and gs:
+                answer.set_perform(sent=1 if any([ g.sid == answer.sid for g in gs ]) else 0)
+        return answers
+
+    @classmethod
+    def _wrap_prediction(cls, 
+        predictor: 'Predictor', 
+        predicted: Dict[str, float],
+        question: 'Question', 
+        context: 'Context', 
+        groundtruths: List['QAAnswer'],
+        compute_perform: bool=True) -> 'QAAnswer':
         if not predicted:
             return None
         answer = QAAnswer(
@@ -79,8 +132,7 @@ class PredictorQA(Predictor):
                 context, 
                 char_start=predicted['char_start'] if "char_start" in predicted else None, 
                 span_start=predicted['span_start'] if "span_start" in predicted else None)
-        if groundtruths:
+        if groundtruths and compute_perform:
             answer.compute_perform(groundtruths=groundtruths)
-        if predicted:
-            answer.set_perform(confidence=predicted['confidence'])
-        return answer
\ No newline at end of file
+        answer.set_perform(confidence=predicted['confidence'])
+        return answer
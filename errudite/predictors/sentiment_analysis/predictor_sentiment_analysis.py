@@ -57,7 +57,51 @@ class PredictorSA(Predictor):
         answer = None
         if not predictor:
             return answer
-        predicted = predictor.predict(query.get_text())
+        predicted = predictor.cached_predict(query=query.get_text())
+        answer = cls._wrap_prediction(predictor, predicted, query, groundtruth)
+        if answer:
+            answer.compute_perform(groundtruths=groundtruth)
+        return answer
+
+    @classmethod
+    def model_predict_batch(cls, 
+        predictor: 'Predictor', 
+        query: List['Target'], 
+        groundtruth: List['Label']) -> List['Label']:
+        """
+        The batch version of ``model_predict``. It runs the model on all the 
+        inputs with ``predictor.cached_predict_batch``, and computes the performances 
+        of the predictions in one pass with ``Label.compute_perform_batch``.
+        
+        Parameters
+        ----------
+        predictor : Predictor
+            A predictor object, with the predict method implemented.
+        query : List[Target]
+            The sentences, transferred to the targets. 
+        groundtruth : List[Label]
+            The groundtruths, aligned with the queries.
+        
+        Returns
+        -------
+        List[Label]
+            The predicted outputs, with performance saved. ``None`` if 
+            the prediction failed.
+        """
+        if not predictor:
+            return [ None ] * len(query)
+        predicted_list = predictor.cached_predict_batch([ { 'query': q.get_text() } for q in query ])
+        answers = [ cls._wrap_prediction(predictor, predicted, q, g) 
+            for predicted, q, g in zip(predicted_list, query, groundtruth) ]
+        Label.compute_perform_batch(answers, [ g.label if g else None for g in groundtruth ])
+        return answers
+
+    @classmethod
+    def _wrap_prediction(cls, 
+        predictor: 'Predictor', 
+        predicted: Dict[str, float],
+        query: 'Target', 
+        groundtruth: 'Label') -> 'Label':
         if not predicted:
             return None
         idx = predictor.predictor._model.vocab.get_token_index(
@@ -71,6 +115,5 @@ class PredictorSA(Predictor):
             text=predicted['text'], 
             vid=max([query.vid, query.vid, groundtruth.vid] ), 
             metas={"loss": loss.item()})
-        answer.compute_perform(groundtruths=groundtruth)
         answer.set_perform(confidence=predicted['confidence'])
         return answer
\ No newline at end of file
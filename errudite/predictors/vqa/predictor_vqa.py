@@ -1,6 +1,8 @@
-from typing import List, Dict
+from typing import List, Dict, Any
 from ..predictor import Predictor
+from ...targets.label import Label
 from ...targets.vqa.answer import VQAAnswer
+from ...utils.helpers import convert_list
 
 @Predictor.register("vqa_task_class")
 class PredictorVQA(Predictor):
@@ -13,8 +15,31 @@ class PredictorVQA(Predictor):
         Predictor.__init__(self, name, description, model, perform_metrics)
 
     def predict(self, qtext: str, img_id: str) -> Dict[str, float]:
+        """
+        Run the prediction on one question. Subclasses implement it with the
+        positional arguments ``(question text, image id)``.
+
+        Parameters
+        ----------
+        qtext : str
+            The question text.
+        img_id : str
+            The image id.
+
+        Returns
+        -------
+        Dict[str, float]
+            The prediction.
+        """
         return None
 
+    def predict_batch(self, inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        The inputs are keyed by ``qtext`` and ``img_id`` (so the cache keys are fixed),
+        but passed to ``self.predict`` positionally, as the subclasses may name them differently.
+        """
+        return [ self.predict(i['qtext'], i['img_id']) for i in inputs ]
+
     @classmethod
     def model_predict(cls, 
         predictor: 'PredictorVQA',
@@ -41,18 +66,62 @@ class PredictorVQA(Predictor):
         answer = None
         if not predictor:
             return answer
-        predicted = predictor.predict(question.doc.text, question.img_id)
+        predicted = predictor.cached_predict(qtext=question.doc.text, img_id=question.img_id)
+        answer = cls._wrap_prediction(predictor, predicted, question, groundtruths)
+        if answer:
+            answer.compute_performance(groundtruths=groundtruths)
+        return answer
+
+    @classmethod
+    def model_predict_batch(cls, 
+        predictor: 'PredictorVQA',
+        question: List['Question'], 
+        groundtruths: List[List['VQAAnswer']]) -> List['VQAAnswer']:
+        """
+        The batch version of ``model_predict``. It runs the model on all the 
+        inputs with ``predictor.cached_predict_batch``, and computes the performances 
+        of the predictions in one pass with ``Label.compute_perform_batch``.
+        
+        Parameters
+        ----------
+        predictor : Predictor
+            A predictor object, with the predict method implemented.
+        question : List[Question]
+            The question targets. 
+        groundtruths : List[List[VQAAnswer]]
+            The groundtruth lists, aligned with the questions.
+        
+        Returns
+        -------
+        List[VQAAnswer]
+            The predicted outputs, with performance saved. ``None`` if 
+            the prediction failed.
+        """
+        if not predictor:
+            return [ None ] * len(question)
+        predicted_list = predictor.cached_predict_batch([
+            { 'qtext': q.doc.text, 'img_id': q.img_id } for q in question ])
+        answers = [ cls._wrap_prediction(predictor, predicted, q, gs) 
+            for predicted, q, gs in zip(predicted_list, question, groundtruths) ]
+        # the same groundtruth texts as ``VQAAnswer.compute_performance``.
+        Label.compute_perform_batch(answers, [ 
+            sum([ [ g.label ] * g.count for g in convert_list(gs) ], []) if gs else None 
+            for gs in groundtruths ])
+        return answers
+
+    @classmethod
+    def _wrap_prediction(cls, 
+        predictor: 'PredictorVQA', 
+        predicted: Dict[str, float],
+        question: 'Question', 
+        groundtruths: List['VQAAnswer']) -> 'VQAAnswer':
         if not predicted:
             return None
         answer = VQAAnswer(
             model=predictor.name, 
             qid=question.qid,
             count=1,
-            text=predicted.text, 
+            text=predicted['text'], 
             vid=max([question.vid] + [g.vid for g in groundtruths]))
-        
-        answer.add_attributes(
-            predicted=predicted, 
-            groundtruths=groundtruths)
-        answer.compute_performance(groundtruths=groundtruths)
+        answer.set_perform(confidence=predicted.get('confidence', None))
         return answer
\ No newline at end of file
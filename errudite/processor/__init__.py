@@ -1,7 +1,9 @@
 from .spacy_annotator import SpacyAnnotator
 from .helpers import *
 from .ling_consts import *
+from .lexical_table import LexicalTable
 
 spacy_annotator = SpacyAnnotator() # use_whitespace=True
 #spacy_annotator_quick = SpacyAnnotator(disable=['parser', 'ner', 'textcat'])
+lexical_table = LexicalTable(spacy_annotator.model.vocab)
 DUMMY_FLAG = spacy_annotator.model.vocab.add_flag(lambda text: True)
\ No newline at end of file
@@ -0,0 +1,125 @@
+from typing import Dict, Union
+import numpy as np
+from spacy.attrs import LEMMA, IS_PUNCT, ORTH
+from spacy.strings import hash_string
+from spacy.tokens import Doc, Span, Token
+
+import logging
+logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+from ..utils import dump_caches, load_caches
+
+NEWLINE_HASH = hash_string('\n')
+
+
+def get_lemma_hashes(doc: Union[Doc, Span, Token]) -> np.ndarray:
+    """
+    Get the string-store hashes of the lemmas in a doc, with the
+    punctuations and the line breaks removed.
+
+    Parameters
+    ----------
+    doc : Union[Doc, Span, Token]
+        The doc to get lemmas from.
+
+    Returns
+    -------
+    np.ndarray
+        An ``uint64`` array of the lemma hashes.
+    """
+    if type(doc) == Token:
+        arr = np.array([[doc.lemma, doc.is_punct, doc.orth]], dtype=np.uint64)
+    elif type(doc) == Span:
+        arr = doc.doc.to_array([LEMMA, IS_PUNCT, ORTH])[doc.start:doc.end]
+    elif type(doc) == Doc:
+        arr = doc.to_array([LEMMA, IS_PUNCT, ORTH])
+    else:
+        return np.zeros(0, dtype=np.uint64)
+    arr = arr.reshape(-1, 3)
+    return arr[(arr[:, 1] == 0) & (arr[:, 2] != NEWLINE_HASH), 0].astype(np.uint64)
+
+
+class FreqTable(object):
+    """
+    The training vocabulary frequency, compiled into arrays keyed by the
+    spacy string-store hash of the lemmas. For each target type, the hashes
+    are sorted so the frequencies of a whole token array can be gathered
+    with one ``np.searchsorted``.
+
+    Attributes
+    ----------
+    keys : Dict[str, np.ndarray]
+        ``{ target_type: sorted uint64 lemma hashes }``
+    values : Dict[str, np.ndarray]
+        ``{ target_type: int64 frequencies }``, aligned with the keys.
+    """
+    def __init__(self) -> None:
+        self.keys: Dict[str, np.ndarray] = {}
+        self.values: Dict[str, np.ndarray] = {}
+
+    def __contains__(self, target_type: str) -> bool:
+        return target_type in self.keys
+
+    def __bool__(self) -> bool:
+        return len(self.keys) > 0
+
+    @classmethod
+    def compile(cls, train_freq: Dict[str, Dict[str, int]]) -> 'FreqTable':
+        """
+        Compile the frequency dicts into arrays.
+
+        Parameters
+        ----------
+        train_freq : Dict[str, Dict[str, int]]
+            ``{ target_type: { lemma: frequency } }``,
+            i.e., ``Instance.train_freq``.
+
+        Returns
+        -------
+        FreqTable
+            The compiled table.
+        """
+        table = cls()
+        for target_type, freqs in train_freq.items():
+            keys = np.fromiter((hash_string(l) for l in freqs.keys()),
+                dtype=np.uint64, count=len(freqs))
+            values = np.fromiter(freqs.values(), dtype=np.int64, count=len(freqs))
+            order = np.argsort(keys)
+            table.keys[target_type] = keys[order]
+            table.values[target_type] = values[order]
+        return table
+
+    def gather(self, target_type: str, hashes: np.ndarray) -> np.ndarray:
+        """
+        Get the frequencies of an array of lemma hashes.
+        Lemmas not in the training data get 0.
+
+        Parameters
+        ----------
+        target_type : str
+            The frequency dict to query, e.g., ``question_vocab``.
+        hashes : np.ndarray
+            The lemma hashes, from ``get_lemma_hashes``.
+
+        Returns
+        -------
+        np.ndarray
+            The frequencies, aligned with the hashes.
+        """
+        keys, values = self.keys[target_type], self.values[target_type]
+        if len(keys) == 0 or len(hashes) == 0:
+            return np.zeros(len(hashes), dtype=np.int64)
+        idxes = np.searchsorted(keys, hashes)
+        idxes[idxes == len(keys)] = 0
+        found = keys[idxes] == hashes
+        return np.where(found, values[idxes], 0)
+
+    def dump(self, file_path: str) -> None:
+        dump_caches({ 'keys': self.keys, 'values': self.values }, file_path)
+
+    @classmethod
+    def load(cls, file_path: str) -> 'FreqTable':
+        data = load_caches(file_path)
+        table = cls()
+        table.keys, table.values = data['keys'], data['values']
+        return table
@@ -0,0 +1,181 @@
+from typing import Dict, List, Tuple, Iterable
+import os
+import numpy as np
+
+import logging
+logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+from ..utils import dump_caches, load_caches, build_cached_path, normalize_file_path, CACHE_FOLDERS
+
+# spacy coarse POS -> wordnet POS. Anything else searches all wordnet POS.
+WN_POS = { 'NOUN': 'n', 'VERB': 'v', 'ADJ': 'a', 'ADV': 'r' }
+SEARCH_TYPES = ['synonym', 'antonym']
+
+
+class LexicalTable(object):
+    """
+    A precomputed lexical substitution table, that maps ``(lemma, pos)`` to
+    the ranked synonyms and antonyms from WordNet. Candidates are ranked
+    by the cosine similarity of their vocab vectors to the lemma's vector,
+    so no spaCy pipeline is run when building or querying the table.
+
+    The table is filled lazily on lookup misses, can be precomputed for the
+    whole WordNet via ``build``, and is persisted to ``lexical_table.pkl``
+    in the cache folder. If the cache folder changes, the table in the new 
+    folder is loaded and merged before the next lookup or save, so the 
+    saved table is never overwritten by a partial one.
+
+    Parameters
+    ----------
+    vocab : spacy.vocab.Vocab
+        The vocab of the spacy model, which provides the vectors.
+    file_name : str, optional
+        The file name of the persisted table in the cache folder,
+        by default ``lexical_table.pkl``.
+
+    Attributes
+    ----------
+    table : Dict[Tuple[str, str], Dict[str, List[str]]]
+        ``{ (lemma, pos): { 'synonym': [ ... ], 'antonym': [ ... ] } }``,
+        with the candidates sorted by similarity in descending order.
+    """
+    def __init__(self, vocab, file_name: str='lexical_table.pkl') -> None:
+        self.vocab = vocab
+        self.file_name = file_name
+        self.table: Dict[Tuple[str, str], Dict[str, List[str]]] = {}
+        # the path that the table is loaded from.
+        self.loaded_path: str = None
+        self.is_dirty = False
+
+    def _get_path(self) -> str:
+        # the same as ``build_cached_path``, without the warning for a missing file.
+        return normalize_file_path(os.path.join(CACHE_FOLDERS["cache"], self.file_name))
+
+    @property
+    def is_loaded(self) -> bool:
+        """If the table in the current cache folder is loaded."""
+        return self.loaded_path == self._get_path()
+
+    @staticmethod
+    def _normalize_pos(pos: str) -> str:
+        return pos if pos in WN_POS else None
+
+    def _get_vector(self, text: str) -> np.ndarray:
+        """Get the vocab vector of a (potentially multi-word, ``_`` connected)
+        WordNet lemma name. Multi-word names get the average of their words."""
+        words = [ w for w in text.replace('_', ' ').split(' ') if w ]
+        vectors = [ self.vocab.get_vector(w) for w in words if self.vocab.has_vector(w) ]
+        if not vectors:
+            return None
+        return np.mean(vectors, axis=0)
+
+    def _rank(self, lemma: str, candidates: Iterable[str]) -> List[str]:
+        """Rank the candidates by their cosine similarity to the lemma.
+        Candidates without vectors are put in the end, in alphabetical order."""
+        candidates = sorted(set(candidates))
+        if len(candidates) < 2:
+            return candidates
+        vector = self._get_vector(lemma)
+        if vector is None:
+            return candidates
+        norm = np.linalg.norm(vector)
+        scores = np.full(len(candidates), -np.inf, dtype=np.float32)
+        for idx, candidate in enumerate(candidates):
+            cvector = self._get_vector(candidate)
+            if cvector is None:
+                continue
+            cnorm = np.linalg.norm(cvector)
+            if norm and cnorm:
+                scores[idx] = np.dot(vector, cvector) / (norm * cnorm)
+        # stable sort keeps the alphabetical order for ties.
+        order = np.argsort(-scores, kind='stable')
+        return [ candidates[i] for i in order ]
+
+    def _compute(self, lemma: str, pos: str) -> Dict[str, List[str]]:
+        from nltk.corpus import wordnet as wn
+        words = { s: set() for s in SEARCH_TYPES }
+        for syn in wn.synsets(lemma, WN_POS.get(pos, None)):
+            for l in syn.lemmas():
+                words['synonym'].add(l.name())
+                if l.antonyms():
+                    words['antonym'].add(l.antonyms()[0].name())
+        for s in SEARCH_TYPES:
+            words[s].discard(lemma)
+        return { s: self._rank(lemma, words[s]) for s in SEARCH_TYPES }
+
+    def lookup(self, lemma: str, pos: str, search_type: str) -> List[str]:
+        """
+        Get the ranked synonyms or antonyms of a lemma.
+
+        Parameters
+        ----------
+        lemma : str
+            The lemma of the word.
+        pos : str
+            The spacy coarse POS tag (``token.pos_``). If it does not map
+            to a WordNet POS, all the POS are searched.
+        search_type : str
+            "synonym" or "antonym".
+
+        Returns
+        -------
+        List[str]
+            The candidates, sorted by similarity in descending order.
+        """
+        if not self.is_loaded:
+            self.load()
+        key = (lemma, self._normalize_pos(pos))
+        if key not in self.table:
+            self.table[key] = self._compute(*key)
+            self.is_dirty = True
+        return self.table[key][search_type]
+
+    def build(self, pos_list: List[str]=list(WN_POS.keys())) -> None:
+        """
+        Precompute the table for all the lemmas in WordNet,
+        in the given POS, and save it to the cache folder.
+
+        Parameters
+        ----------
+        pos_list : List[str], optional
+            The spacy coarse POS tags to precompute, by default all
+            the ones with WordNet counterparts.
+
+        Returns
+        -------
+        None
+        """
+        from nltk.corpus import wordnet as wn
+        if not self.is_loaded:
+            self.load()
+        for pos in pos_list:
+            if pos not in WN_POS:
+                continue
+            for lemma in wn.all_lemma_names(WN_POS[pos]):
+                if (lemma, pos) not in self.table:
+                    self.table[(lemma, pos)] = self._compute(lemma, pos)
+            logger.info(f'Built the lexical table for [ {pos} ].')
+        self.is_dirty = True
+        self.dump()
+
+    def dump(self) -> None:
+        """Save the table to the cache folder, if it has been changed."""
+        if not self.is_dirty:
+            return
+        if not self.is_loaded:
+            self.load()
+        dump_caches(self.table, self.loaded_path)
+        self.is_dirty = False
+
+    def load(self) -> None:
+        """Load the table from the cache folder, and merge it
+        into the entries that are already computed."""
+        self.loaded_path = build_cached_path(self.file_name)
+        try:
+            table = load_caches(self.loaded_path)
+        except Exception as e:
+            table = None
+            logger.warning(e.args)
+        if table:
+            table.update(self.table)
+            self.table = table
@@ -1,6 +1,8 @@
 import pkg_resources
 from pathlib import Path
-from typing import List
+from collections import OrderedDict
+from typing import List, Dict, Tuple
+import numpy as np
 
 import logging
 logging.basicConfig(level=logging.INFO)
@@ -13,6 +15,7 @@ try:
     from spacy.cli.download import download as spacy_download
     from spacy import util
     from spacy.tokens import Doc, Token
+    from spacy.attrs import LEMMA, TAG, POS, HEAD, DEP, ENT_IOB, ENT_TYPE # pylint: disable=E0611
     try:
         spacy_version = int(spacy.__version__[0])
     except:
@@ -40,17 +43,26 @@ class SpacyAnnotator(object):
     Keyword Arguments:
         lang {str} -- language (default: {'en'})
         disable {List[str]} -- If only using tokenizer, can disable ['parser', 'ner', 'textcat'] (default: {None})
+        cache_size {int} -- The max number of annotated docs kept by ``process_text``. 
+            Set to 0 to disable the cache. (default: {4096})
     """
 
     # if should disable certain steps: ['parser', 'ner', 'textcat']
     def __init__(self, 
         disable: List[str]=[], 
         use_whitespace: bool=False,
-        lang: str='en_core_web_sm'): # en_coref_sm
+        lang: str='en_core_web_sm', # en_coref_sm
+        cache_size: int=4096):
+        self.lang = lang
+        self.use_whitespace = use_whitespace
         self.model = SpacyAnnotator.load_lang_model(lang, disable=disable)
         self.load()
         if use_whitespace:
             self.model.tokenizer = WhitespaceTokenizer(self.model.vocab)
+        # { (text, pipeline config): Doc }, in the least recently used order.
+        self.cache_size = cache_size
+        self.cache: OrderedDict = OrderedDict()
+        self.cache_stats = { 'hits': 0, 'misses': 0 }
     
     def dump(self):
         dump_caches(build_cached_path('vocab.pkl'),  self.model.vocab.to_bytes())
@@ -65,16 +77,197 @@ class SpacyAnnotator(object):
             self.model.vocab.from_bytes(vocab)
 
     
-    def process_text(self, sentence: str) -> Doc: 
-        """Annotate a sentence with spacy
+    def get_config(self) -> Tuple:
+        """The pipeline config that the annotated docs depend on.
+        
+        Returns:
+            Tuple -- (lang, pipe names, use_whitespace)
+        """
+        return (self.lang, tuple(self.model.pipe_names), self.use_whitespace)
+
+    def process_text(self, sentence: str, use_cache: bool=True, copy: bool=False) -> Doc: 
+        """Annotate a sentence with spacy. The docs are cached by 
+        (sentence, pipeline config), so annotating the same text again 
+        returns the shared doc.
         
         Arguments:
             sentence {str} -- a string sentence
         
+        Keyword Arguments:
+            use_cache {bool} -- If read from and write to the cache (default: {True})
+            copy {bool} -- If return a copy of the cached doc, for 
+                callers that modify the doc in place (default: {False})
+        
+        Returns:
+            Doc -- Annotated.
+        """
+        if not use_cache or self.cache_size <= 0:
+            return self.model(sentence)
+        key = (sentence, self.get_config())
+        if key in self.cache:
+            self.cache_stats['hits'] += 1
+            self.cache.move_to_end(key)
+            doc = self.cache[key]
+        else:
+            self.cache_stats['misses'] += 1
+            doc = self.model(sentence)
+            self.cache[key] = doc
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return Doc(doc.vocab).from_bytes(doc.to_bytes()) if copy else doc
+
+    def process_texts(self,
+        sentences: List[str],
+        batch_size: int=1000,
+        use_cache: bool=True) -> List[Doc]:
+        """Annotate a list of sentences with one ``nlp.pipe`` pass.
+        Sentences that are already cached are not re-annotated, and the
+        newly annotated docs are added to the cache, so the following
+        ``process_text`` calls on the same sentences are cache hits.
+
+        Arguments:
+            sentences {List[str]} -- a list of string sentences
+
+        Keyword Arguments:
+            batch_size {int} -- The batch size of ``nlp.pipe`` (default: {1000})
+            use_cache {bool} -- If read from and write to the cache (default: {True})
+
+        Returns:
+            List[Doc] -- Annotated, aligned with the sentences.
+        """
+        use_cache = use_cache and self.cache_size > 0
+        config = self.get_config()
+        docs: Dict[str, Doc] = {}
+        to_annotate = []
+        for sentence in sentences:
+            key = (sentence, config)
+            if use_cache and key in self.cache:
+                self.cache_stats['hits'] += 1
+                self.cache.move_to_end(key)
+                docs[sentence] = self.cache[key]
+            elif sentence not in docs:
+                docs[sentence] = None
+                to_annotate.append(sentence)
+        if to_annotate:
+            self.cache_stats['misses'] += len(to_annotate) if use_cache else 0
+            annotated = self.model.pipe(to_annotate, batch_size=batch_size)
+            for sentence, doc in zip(to_annotate, annotated):
+                docs[sentence] = doc
+                if use_cache:
+                    self.cache[(sentence, config)] = doc
+            while use_cache and len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return [ docs[sentence] for sentence in sentences ]
+
+    def process_text_incremental(self, 
+        sentence: str, 
+        ori_doc: Doc, 
+        use_cache: bool=True) -> Doc:
+        """Annotate a rewritten version of an annotated doc. Only the sentences
+        that are changed by the rewrite are re-annotated; the unchanged 
+        sentences before and after them are copied from ``ori_doc``, and 
+        spliced with the re-annotated ones into a new doc.
+
+        The changed region is located by the common prefix and suffix of the 
+        two texts, and extended to the boundaries of the sentences it touches. 
+        If ``ori_doc`` is not parsed, or the splicing does not reproduce the 
+        sentence, fall back to annotating the whole sentence.
+        
+        Arguments:
+            sentence {str} -- the rewritten string
+            ori_doc {Doc} -- the annotated original doc
+        
+        Keyword Arguments:
+            use_cache {bool} -- If read from and write to the cache (default: {True})
+        
         Returns:
             Doc -- Annotated.
         """
-        return self.model(sentence)
+        use_cache = use_cache and self.cache_size > 0
+        key = (sentence, self.get_config())
+        if use_cache and key in self.cache:
+            return self.process_text(sentence)
+        try:
+            doc = self._splice_changed_sentences(sentence, ori_doc)
+        except Exception as e:
+            logger.warn(f"[ process_text_incremental ]: {e}")
+            doc = None
+        if doc is None:
+            return self.process_text(sentence, use_cache=use_cache)
+        if use_cache:
+            self.cache_stats['misses'] += 1
+            self.cache[key] = doc
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return doc
+
+    def _splice_changed_sentences(self, sentence: str, ori_doc: Doc) -> Doc:
+        if not ori_doc or not ori_doc.is_parsed or not sentence:
+            return None
+        ori_text = ori_doc.text
+        max_common = min(len(ori_text), len(sentence))
+        prefix = 0
+        while prefix < max_common and ori_text[prefix] == sentence[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < max_common - prefix and ori_text[-suffix-1] == sentence[-suffix-1]:
+            suffix += 1
+        sents = list(ori_doc.sents)
+        # the changed sentences: from the one containing (or right after) the 
+        # first changed char, to the one containing the last changed char.
+        first = next((idx for idx, s in enumerate(sents) 
+            if s.end_char + len(s[-1].whitespace_) > prefix), len(sents) - 1)
+        last = next((idx for idx, s in reversed(list(enumerate(sents))) 
+            if s.start_char < len(ori_text) - suffix), first)
+        last = max(first, last)
+        if first == 0 and last == len(sents) - 1:
+            return None
+        start_token, end_token = sents[first].start, sents[last].end
+        start_char = sents[first].start_char
+        # keep the chars after the last changed sentence as the suffix.
+        tail_len = len(ori_text) - (sents[last + 1].start_char \
+            if last + 1 < len(sents) else len(ori_text))
+        middle_text = sentence[start_char:len(sentence) - tail_len]
+        if not middle_text.strip():
+            return None
+        middle = self.model(middle_text)
+        attrs = [LEMMA, TAG, POS, HEAD, DEP, ENT_IOB, ENT_TYPE]
+        parts = [ ori_doc[:start_token], middle, ori_doc[end_token:] ]
+        words, spaces, arrays = [], [], []
+        for part in parts:
+            if len(part) == 0:
+                continue
+            words += [ t.text for t in part ]
+            spaces += [ bool(t.whitespace_) for t in part ]
+            arrays.append(part.as_doc().to_array(attrs) if type(part) != Doc else part.to_array(attrs))
+        doc = Doc(self.model.vocab, words=words, spaces=spaces)
+        doc.from_array(attrs, np.vstack(arrays))
+        tensors = [ getattr(p, 'tensor', None) for p in parts if len(p) > 0 ]
+        if all([ t is not None and len(t.shape) == 2 for t in tensors ]) and \
+            len(set([ t.shape[1] for t in tensors ])) == 1:
+            doc.tensor = np.vstack(tensors)
+        if doc.text != sentence:
+            return None
+        return doc
+
+    def get_cache_stats(self) -> Dict[str, float]:
+        """Get the stats of the annotation cache.
+        
+        Returns:
+            Dict[str, float] -- hits, misses, size, and hit_rate.
+        """
+        total = self.cache_stats['hits'] + self.cache_stats['misses']
+        return {
+            'hits': self.cache_stats['hits'],
+            'misses': self.cache_stats['misses'],
+            'size': len(self.cache),
+            'hit_rate': self.cache_stats['hits'] / total if total else 0
+        }
+
+    def clear_cache(self) -> None:
+        """Empty the annotation cache, and reset the stats."""
+        self.cache = OrderedDict()
+        self.cache_stats = { 'hits': 0, 'misses': 0 }
     
 
     def remove_stopwords(self, sentence_str: str=None, tokens: List[Token]=None, use_lemma: bool=True) -> str:
@@ -90,7 +283,7 @@ class SpacyAnnotator(object):
         """
         if not tokens and sentence_str:
             #sentence_str = normalize_answer(sentence_str)
-            tokens = self.model(sentence_str)
+            tokens = self.process_text(sentence_str)
         elif not tokens:
             tokens = []
         #word_tokenize(sentence_str)
@@ -0,0 +1,205 @@
+from typing import List, Dict, Tuple, Union
+import numpy as np
+from spacy.attrs import LOWER, LEMMA, POS, TAG, ENT_TYPE
+from spacy.tokens import Doc
+
+import logging
+logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+from . import spacy_annotator
+from ..utils import dump_caches, load_caches
+
+#: The matcher token attributes that are indexed.
+INDEXED_ATTRS = { 'LOWER': LOWER, 'LEMMA': LEMMA, 'POS': POS, 'TAG': TAG, 'ENT_TYPE': ENT_TYPE }
+# a token with these ops does not have to appear in the match.
+OPTIONAL_OPS = [ '?', '*', '!' ]
+
+
+class TokenIndex(object):
+    """
+    Posting lists of the token attributes (``LOWER``, ``LEMMA``, ``POS``, ``TAG``
+    and ``ENT_TYPE``) of the original instances, one index per target entry
+    (e.g., ``question``, ``context``). They are used to count the instances a
+    matcher pattern may cover, without running the matcher.
+
+    Every posting table is saved in the CSR format: the sorted attribute
+    value ids (the spacy string-store ids, same as ``Doc.to_array``), the
+    offsets, and the flat sorted row indexes, so a lookup is one
+    ``np.searchsorted`` and one slice.
+
+    Attributes
+    ----------
+    rows : List['InstanceKey']
+        The keys of the instances. The row index is the position in this list.
+    postings : Dict[str, Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]]
+        ``{ target: { attr: (value ids, offsets, rows) } }``
+    """
+    def __init__(self) -> None:
+        self.rows: List['InstanceKey'] = []
+        self.postings: Dict[str, Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]] = {}
+
+    def __contains__(self, target: str) -> bool:
+        return target in self.postings
+
+    def __bool__(self) -> bool:
+        return len(self.rows) > 0
+
+    @classmethod
+    def compile(cls, instances: List['Instance'], targets: List[str]) -> 'TokenIndex':
+        """
+        Build the posting lists from the docs of the instances.
+
+        Parameters
+        ----------
+        instances : List[Instance]
+            The original instances.
+        targets : List[str]
+            The entries to index. Entries that are not a
+            ``Target`` with a doc (e.g., the groundtruths) are skipped.
+
+        Returns
+        -------
+        TokenIndex
+            The compiled index.
+        """
+        index = cls()
+        index.rows = [ instance.key() for instance in instances ]
+        attr_ids = list(INDEXED_ATTRS.values())
+        for target in targets:
+            values = { attr: [] for attr in INDEXED_ATTRS }
+            rows = { attr: [] for attr in INDEXED_ATTRS }
+            n_docs = 0
+            for row, instance in enumerate(instances):
+                entry = instance.get_entry(target)
+                doc = getattr(entry, 'doc', None)
+                if type(doc) != Doc or len(doc) == 0:
+                    continue
+                n_docs += 1
+                arr = doc.to_array(attr_ids).reshape(-1, len(attr_ids)).astype(np.uint64)
+                for idx, attr in enumerate(INDEXED_ATTRS):
+                    unique_values = np.unique(arr[:, idx])
+                    values[attr].append(unique_values)
+                    rows[attr].append(np.full(len(unique_values), row, dtype=np.int32))
+            if not n_docs:
+                continue
+            index.postings[target] = {}
+            for attr in INDEXED_ATTRS:
+                attr_values = np.concatenate(values[attr])
+                attr_rows = np.concatenate(rows[attr])
+                # rows are appended in order, so a stable sort keeps them sorted per value.
+                order = np.argsort(attr_values, kind='stable')
+                attr_values, attr_rows = attr_values[order], attr_rows[order]
+                keys, offsets = np.unique(attr_values, return_index=True)
+                offsets = np.append(offsets, len(attr_values)).astype(np.int64)
+                index.postings[target][attr] = (keys, offsets, attr_rows)
+            logger.info(f"Indexed the tokens of {n_docs} {target}s.")
+        return index
+
+    def lookup(self, target: str, attr: str, value: Union[str, int]) -> np.ndarray:
+        """
+        Get the rows of the instances whose target has a token with the attribute value.
+
+        Parameters
+        ----------
+        target : str
+            The indexed entry.
+        attr : str
+            The attribute, in ``INDEXED_ATTRS``.
+        value : Union[str, int]
+            The attribute value, e.g., ``NOUN`` for ``POS``, or its string-store id.
+
+        Returns
+        -------
+        np.ndarray
+            The sorted ``int32`` row indexes.
+        """
+        if target not in self.postings or attr not in self.postings[target]:
+            return np.zeros(0, dtype=np.int32)
+        if type(value) == str:
+            value = spacy_annotator.model.vocab.strings[value]
+        keys, offsets, rows = self.postings[target][attr]
+        idx = np.searchsorted(keys, np.uint64(value))
+        if idx >= len(keys) or keys[idx] != np.uint64(value):
+            return np.zeros(0, dtype=np.int32)
+        return rows[offsets[idx]:offsets[idx+1]]
+
+    def _lookup_token(self, target: str, token_pattern: Union[Dict, List[Dict]]) -> Tuple[np.ndarray, bool]:
+        # alternatives (pattern sets) are unioned; the attributes of one token are intersected.
+        if type(token_pattern) in [ list, tuple ]:
+            outputs = [ self._lookup_token(target, p) for p in token_pattern ]
+            outputs = [ o for o in outputs if o is not None ]
+            if not outputs:
+                return None
+            rows = np.unique(np.concatenate([ o[0] for o in outputs ]))
+            return rows, all([ o[1] for o in outputs ]) and len(outputs) == len(token_pattern)
+        rows, n_attrs, is_exact = None, 0, True
+        for attr, value in token_pattern.items():
+            if attr == 'OP':
+                continue
+            if type(attr) != str or attr.upper() not in INDEXED_ATTRS or type(value) != str:
+                # e.g., the dummy flags or DEP: cannot be narrowed down with the index.
+                is_exact = False
+                continue
+            attr_rows = self.lookup(target, attr.upper(), value)
+            rows = attr_rows if rows is None else np.intersect1d(rows, attr_rows, assume_unique=True)
+            n_attrs += 1
+        if rows is None:
+            return None
+        return rows, is_exact and n_attrs == 1
+
+    def estimate(self, target: str, pattern: List[Dict]) -> Tuple[np.ndarray, bool]:
+        """
+        Get the rows of the instances that may match a matcher pattern. Every token
+        in the pattern that is required (i.e., without the ``?``, ``*`` or ``!`` op)
+        has to appear in the target, so the candidate rows are the intersection of
+        the posting lists of these tokens. It is an upper bound of the actual
+        matches, as the index does not keep the token order.
+
+        Parameters
+        ----------
+        target : str
+            The indexed entry.
+        pattern : List[Dict]
+            The matcher pattern, e.g., ``ReplacePattern.pattern.before``.
+
+        Returns
+        -------
+        Tuple[np.ndarray, bool]
+            ``(rows, is_exact)``. ``is_exact`` is True when the pattern is one
+            token with one indexed attribute, so the rows are exactly the matches.
+            ``(None, False)`` if the target is not indexed, or the pattern has no
+            required token to look up.
+        """
+        if target not in self.postings or not pattern:
+            return None, False
+        rows, is_exact = None, len(pattern) == 1
+        for token_pattern in pattern:
+            ops = [ p.get('OP', None) for p in token_pattern ] \
+                if type(token_pattern) in [ list, tuple ] else [ token_pattern.get('OP', None) ]
+            if any([ op in OPTIONAL_OPS for op in ops ]):
+                is_exact = False
+                continue
+            output = self._lookup_token(target, token_pattern)
+            if output is None:
+                is_exact = False
+                continue
+            token_rows, is_token_exact = output
+            is_exact = is_exact and is_token_exact
+            rows = token_rows if rows is None else np.intersect1d(rows, token_rows, assume_unique=True)
+        if rows is None:
+            return None, False
+        return rows, is_exact
+
+    def get_keys(self, rows: np.ndarray) -> List['InstanceKey']:
+        return [ self.rows[r] for r in rows ]
+
+    def dump(self, file_path: str) -> None:
+        dump_caches({ 'rows': self.rows, 'postings': self.postings }, file_path)
+
+    @classmethod
+    def load(cls, file_path: str) -> 'TokenIndex':
+        data = load_caches(file_path)
+        index = cls()
+        if data:
+            index.rows, index.postings = data['rows'], data['postings']
+        return index
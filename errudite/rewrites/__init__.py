@@ -2,6 +2,7 @@ from .rewrite import Rewrite
 from .remove_clue import RemoveClue
 from .remove_context_sent import RemoveContextSentence
 from .replace_pattern import ReplacePattern
+from .pattern_rule_engine import PatternRuleEngine
 from .replace_str import ReplaceStr
 from .resolve_coref import ResolveCoref
 from .semantic_rule import SemanticRule
@@ -0,0 +1,302 @@
+from typing import List, Dict, Iterable, Tuple
+import weakref
+import numpy as np
+
+from ..targets.instance import Instance
+from ..targets.label import Label
+from ..targets.interfaces import InstanceKey
+
+import logging
+logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+# the per-model stats summed by ``FlipStats.evaluate``, in this order.
+STAT_NAMES = [ 'flip_to_correct', 'flip_to_incorrect', 'unflip', 'prediction_changed', 'delta_confidence' ]
+
+
+class FlipStats(object):
+    """
+    The flip statistics of all the rewritten instances, for all the models.
+    Every rewritten instance is one row, aligned with its original instance,
+    and every model is one column:
+
+    * ``delta_performs``: ``int(rewritten perform == 1) - int(original perform == 1)``
+    * ``delta_confidences``: rewritten confidence - original confidence
+    * ``prediction_changed``: whether the predicted labels are different
+
+    Rows are added (and dropped) incrementally by ``update``, when rewrite rules
+    get new rewritten instances, so the counts of any (rewrite, group, model)
+    combinations are computed with array operations, without visiting the instances.
+
+    .. code-block:: python
+
+        from errudite.rewrites import Rewrite
+        Rewrite.flip_stats.update(Rewrite.values())
+        output = Rewrite.flip_stats.evaluate(rids, { 'all': None })
+
+    Attributes
+    ----------
+    models : List[str]
+        The model of each column.
+    rows : Dict[InstanceKey, int]
+        ``{ rewritten InstanceKey: row index }``, only the live rows.
+    row_refs : Dict[InstanceKey, weakref.ref]
+        The rewritten instance each live row is computed from. A key that 
+        now points to another instance (e.g., a reused vid) gets its row recomputed.
+    rids : List[str]
+        The rids. ``row_rids`` indexes into it.
+    qids : List[str]
+        The qids. ``row_qids`` indexes into it.
+    """
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self, models: List[str]=None) -> None:
+        self.models: List[str] = list(models or [])
+        self.perform_name: str = Label.task_primary_metric
+        self.rows: Dict[InstanceKey, int] = {}
+        self.row_refs: Dict[InstanceKey, weakref.ref] = {}
+        self.rid_keys: Dict[str, set] = {}
+        self.rids: List[str] = []
+        self.rid_idxes: Dict[str, int] = {}
+        self.qids: List[str] = []
+        self.qid_idxes: Dict[str, int] = {}
+        n_models = len(self.models)
+        self.row_rids = np.zeros(0, dtype=np.int32)
+        self.row_qids = np.zeros(0, dtype=np.int32)
+        self.is_live = np.zeros(0, dtype=bool)
+        self.delta_performs = np.zeros((0, n_models), dtype=np.int8)
+        self.delta_confidences = np.zeros((0, n_models), dtype=np.float32)
+        self.prediction_changed = np.zeros((0, n_models), dtype=bool)
+
+    def _encode(self, value: str, values: List[str], idxes: Dict[str, int]) -> int:
+        if value not in idxes:
+            idxes[value] = len(values)
+            values.append(value)
+        return idxes[value]
+
+    def _is_current(self, key: InstanceKey) -> bool:
+        # only the loaded instances can be replaced; the rest are not loaded just to check.
+        instance = Instance.instance_hash_rewritten.get(key, None)
+        ref = self.row_refs.get(key, None)
+        return instance is None or (ref is not None and ref() is instance)
+
+    def _drop_row(self, key: InstanceKey) -> None:
+        if key in self.rows:
+            self.is_live[self.rows.pop(key)] = False
+        self.row_refs.pop(key, None)
+
+    def remove(self, rid: str) -> None:
+        """
+        Drop all the rows of a rewrite rule, e.g., when the rule is deleted, 
+        so a rule recreated with the same rid starts from scratch.
+
+        Parameters
+        ----------
+        rid : str
+            The rewrite rule id.
+
+        Returns
+        -------
+        None
+        """
+        for key in self.rid_keys.pop(rid, set()):
+            row = self.rows.get(key, None)
+            # the row can belong to another rule that re-added the key.
+            if row is not None and self.rids[self.row_rids[row]] == rid:
+                self._drop_row(key)
+
+    def _compute_row(self, key: InstanceKey) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        ori_key = InstanceKey(qid=key.qid, vid=0)
+        if not Instance.exists(ori_key) or not Instance.exists(key):
+            return None
+        ori, rewritten = Instance.get(ori_key), Instance.get(key)
+        delta_perform = np.zeros(len(self.models), dtype=np.int8)
+        delta_confidence = np.zeros(len(self.models), dtype=np.float32)
+        changed = np.zeros(len(self.models), dtype=bool)
+        for idx, model in enumerate(self.models):
+            p0 = ori.get_entry('prediction', model)
+            p1 = rewritten.get_entry('prediction', model)
+            # same as ``Instance.get_perform``: 0 if the prediction is missing.
+            perform0 = p0.get_perform(self.perform_name) if p0 else 0
+            perform1 = p1.get_perform(self.perform_name) if p1 else 0
+            delta_perform[idx] = int(perform1 == 1) - int(perform0 == 1)
+            delta_confidence[idx] = \
+                (p1.perform.get('confidence', 0) if p1 else 0) - \
+                (p0.perform.get('confidence', 0) if p0 else 0)
+            changed[idx] = bool(p0 and p1 and p0.label != p1.label)
+        return delta_perform, delta_confidence, changed
+
+    def update(self, rewrites: Iterable['Rewrite'], models: List[str]=None) -> int:
+        """
+        Sync the rows with the rewritten instances of the given rewrite rules:
+        add rows for their new instances, and drop the rows of their removed
+        instances. The rows of the other rules are kept. If the models or 
+        the primary metric are changed, all the rows are recomputed.
+
+        Parameters
+        ----------
+        rewrites : Iterable[Rewrite]
+            The rewrite rules to sync, e.g., ``Rewrite.values()``.
+        models : List[str], optional
+            The models, by default None. If None, use the models in 
+            ``Label.performance_table`` (or, if it's empty, the models with 
+            predictions in ``Instance.instance_hash``).
+
+        Returns
+        -------
+        int
+            The number of newly added rows.
+        """
+        rewrites = list(rewrites)
+        if models is None:
+            # the models in the performance table, so the hot-added models are included.
+            models = list(Label.performance_table.models) or self.models
+            if not models and Instance.instance_hash:
+                first = next(iter(Instance.instance_hash.values()))
+                models = [ p.model for p in first.get_entry('predictions') or [] ]
+        if list(models) != self.models or Label.task_primary_metric != self.perform_name:
+            self.reset(models)
+        # drop the removed instances, and the ones replaced by new instances of the same key.
+        live_keys = { rewrite.rid: set(rewrite.instance_keys) for rewrite in rewrites }
+        for rid in live_keys:
+            if rid not in self.rid_keys:
+                continue
+            removed = self.rid_keys[rid] - live_keys[rid]
+            removed |= set([ key for key in self.rid_keys[rid] & live_keys[rid] if not self._is_current(key) ])
+            for key in removed:
+                self._drop_row(key)
+            self.rid_keys[rid] -= removed
+        # add the new instances.
+        new_rows = []
+        for rid, keys in live_keys.items():
+            known = self.rid_keys.setdefault(rid, set())
+            for key in keys - known:
+                row = self._compute_row(key)
+                if row is None:
+                    continue
+                known.add(key)
+                new_rows.append((key, rid, row))
+        if not new_rows:
+            return 0
+        n_rows = len(self.is_live)
+        for idx, (key, _, _) in enumerate(new_rows):
+            if key in self.rows: # re-added by another rule.
+                self.is_live[self.rows[key]] = False
+            self.rows[key] = n_rows + idx
+            self.row_refs[key] = weakref.ref(Instance.get(key))
+        self.row_rids = np.concatenate([ self.row_rids, np.array(
+            [ self._encode(rid, self.rids, self.rid_idxes) for _, rid, _ in new_rows ], dtype=np.int32) ])
+        self.row_qids = np.concatenate([ self.row_qids, np.array(
+            [ self._encode(key.qid, self.qids, self.qid_idxes) for key, _, _ in new_rows ], dtype=np.int32) ])
+        self.is_live = np.concatenate([ self.is_live, np.ones(len(new_rows), dtype=bool) ])
+        for name, idx in [ ('delta_performs', 0), ('delta_confidences', 1), ('prediction_changed', 2) ]:
+            setattr(self, name, np.concatenate([
+                getattr(self, name),
+                np.stack([ row[idx] for _, _, row in new_rows ]).reshape(len(new_rows), len(self.models)) ]))
+        logger.info(f"Added {len(new_rows)} rows to the flip stats.")
+        return len(new_rows)
+
+    def _get_mask(self, rid: str, qids: Iterable[str]=None) -> np.ndarray:
+        if rid not in self.rid_idxes:
+            return np.zeros(len(self.is_live), dtype=bool)
+        mask = self.is_live & (self.row_rids == self.rid_idxes[rid])
+        if qids is not None:
+            mask &= self._get_qid_mask(qids)[self.row_qids]
+        return mask
+
+    def _get_qid_mask(self, qids: Iterable[str]) -> np.ndarray:
+        qid_mask = np.zeros(len(self.qids), dtype=bool)
+        idxes = [ self.qid_idxes[qid] for qid in qids if qid in self.qid_idxes ]
+        qid_mask[idxes] = True
+        return qid_mask
+
+    def get_delta_performance(self, rid: str, qids: Iterable[str]=None, model: str=None) -> Dict[str, any]:
+        """
+        The vectorized version of ``Rewrite.get_delta_performance``.
+
+        Parameters
+        ----------
+        rid : str
+            The rewrite rule id.
+        qids : Iterable[str], optional
+            Only include the instances of these qids, by default None.
+        model : str, optional
+            The model, by default None. If None, resolve to ``Instance.model``.
+
+        Returns
+        -------
+        Dict[str, any]
+            The same output as ``Rewrite.get_delta_performance``.
+        """
+        model = Instance.resolve_default_model(model)
+        mask = self._get_mask(rid, qids)
+        total_size = len(Instance.instance_hash)
+        output = {
+            'delta_confidences': [],
+            'delta_f1s': [],
+            'prediction_changed': 0,
+            'total_size': total_size,
+            'filtered_size': len(qids) if qids else total_size,
+        }
+        if model not in self.models:
+            return output
+        midx = self.models.index(model)
+        output['delta_confidences'] = self.delta_confidences[mask, midx].tolist()
+        output['delta_f1s'] = self.delta_performs[mask, midx].tolist()
+        output['prediction_changed'] = int(self.prediction_changed[mask, midx].sum())
+        return output
+
+    def evaluate(self,
+        rids: List[str],
+        qid_groups: Dict[str, Iterable[str]]=None,
+        models: List[str]=None) -> Dict[str, np.ndarray]:
+        """
+        Count the flips of every (rewrite, group, model) combination in one pass.
+
+        Parameters
+        ----------
+        rids : List[str]
+            The rewrite rule ids.
+        qid_groups : Dict[str, Iterable[str]], optional
+            ``{ group name: qids }``. A ``None`` qid list includes all the
+            instances. By default None, which is ``{ 'all': None }``.
+        models : List[str], optional
+            The models, by default None. If None, use all the models.
+
+        Returns
+        -------
+        Dict[str, np.ndarray]
+            ``{ stat name: (n_rids, n_groups, n_models) array }``, for the stats in
+            ``STAT_NAMES`` and ``rewritten``. ``delta_confidence`` is the sum;
+            divide it by ``rewritten`` for the mean.
+        """
+        qid_groups = qid_groups or { 'all': None }
+        models = models or self.models
+        rid_codes = np.array([ self.rid_idxes.get(rid, -1) for rid in rids ], dtype=np.int32)
+        # only the live rows of the queried rules.
+        rows = np.where(self.is_live & np.isin(self.row_rids, rid_codes))[0]
+        # (n_rows, n_rids): which rule each row belongs to.
+        by_rid = (self.row_rids[rows][:, None] == rid_codes[None, :]).astype(np.float64)
+        # (n_groups, n_rows): which groups each row belongs to.
+        by_group = np.zeros((len(qid_groups), len(rows)), dtype=np.float64)
+        for gidx, qids in enumerate(qid_groups.values()):
+            by_group[gidx] = 1 if qids is None else self._get_qid_mask(qids)[self.row_qids[rows]]
+        # (n_rows, n_models, n_stats + 1)
+        stats = np.zeros((len(rows), len(models), len(STAT_NAMES) + 1), dtype=np.float64)
+        for idx, model in enumerate(models):
+            if model not in self.models:
+                continue
+            midx = self.models.index(model)
+            delta = self.delta_performs[rows, midx]
+            stats[:, idx, 0] = delta > 0
+            stats[:, idx, 1] = delta < 0
+            stats[:, idx, 2] = delta == 0
+            stats[:, idx, 3] = self.prediction_changed[rows, midx]
+            stats[:, idx, 4] = self.delta_confidences[rows, midx]
+            stats[:, idx, 5] = 1
+        counts = np.einsum('pr,gp,pms->rgms', by_rid, by_group, stats, optimize=True)
+        output = {}
+        for idx, name in enumerate(STAT_NAMES + [ 'rewritten' ]):
+            output[name] = counts[..., idx] if name == 'delta_confidence' \
+                else np.rint(counts[..., idx]).astype(np.int64)
+        return output
@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Tuple
 import numpy as np
 import sys
 """
@@ -62,86 +62,93 @@ def change_matched_token_form(a_token: Token,
 
 
 
-def sequence_matcher(source: List[str], target: List[str], cost=None, merge: bool=True) -> Dict:
-    """A self-implemented edited token computation, not really working super correctly.
+def _edit_tables(pairs: List[Tuple[List[str], List[str]]], cost=None) -> Tuple[np.ndarray, np.ndarray]:
+    """Fill the edit distance tables of multiple (source, target) pairs at once.
+    The pairs are padded to the same size, and the cells on one anti-diagonal 
+    (``i + j = d``) only depend on the previous two anti-diagonals, so each 
+    anti-diagonal is computed for all the pairs with one vectorized step.
     
     Arguments:
-        source {List[str]} -- source str
-        target {List[str]} -- target str
+        pairs {List[Tuple[List[str], List[str]]]} -- (source, target) token lists
     
     Keyword Arguments:
-        cost {[type]} -- Not used at all (default: {None})
-        merge {bool} -- if merge consecutive changes (default: {True})
+        cost {Dict} -- The optional {insert, delete, replace} cost dicts. (default: {None})
     
     Returns:
-        Dict -- {distance: edit distance float, edits: List[OpcodeMeta]}
+        Tuple[np.ndarray, np.ndarray] -- distance and operation, in shape of
+            (len(pairs), max source length + 1, max target length + 1)
     """
+    n_pairs = len(pairs)
+    M = max([ len(source) for source, _ in pairs ] + [0])
+    N = max([ len(target) for _, target in pairs ] + [0])
+    # encode the tokens, so the equality can be computed in batch.
+    token_ids = {}
+    src_ids = np.full((n_pairs, M), -1, dtype=np.int64)
+    tgt_ids = np.full((n_pairs, N), -2, dtype=np.int64)
+    for b, (source, target) in enumerate(pairs):
+        src_ids[b, :len(source)] = [ token_ids.setdefault(t, len(token_ids)) for t in source ]
+        tgt_ids[b, :len(target)] = [ token_ids.setdefault(t, len(token_ids)) for t in target ]
+    equal = src_ids[:, :, None] == tgt_ids[:, None, :]
+    if cost is None:
+        insert_cost = np.ones((n_pairs, M))
+        delete_cost = np.ones((n_pairs, N))
+        replace_cost = np.full((n_pairs, M, N), 2.0)
+    else:
+        default = sys.float_info.max / 1000.0
+        insert_cost = np.full((n_pairs, M), default)
+        delete_cost = np.full((n_pairs, N), default)
+        replace_cost = np.full((n_pairs, M, N), default)
+        for b, (source, target) in enumerate(pairs):
+            insert_cost[b, :len(source)] = [ cost['insert'].setdefault(t, default) for t in source ]
+            delete_cost[b, :len(target)] = [ cost['delete'].setdefault(t, default) for t in target ]
+            for i, s in enumerate(source):
+                for j, t in enumerate(target):
+                    if s != t:
+                        replace_cost[b, i, j] = cost['replace'].setdefault((s, t), default)
+    distance = np.zeros((n_pairs, M + 1, N + 1))
+    operation = np.zeros((n_pairs, M + 1, N + 1), dtype=np.int8)
+    distance[:, 0, :] = np.arange(N + 1)
+    distance[:, :, 0] = np.arange(M + 1)[None, :]
+    for d in range(2, M + N + 1):
+        i = np.arange(max(1, d - N), min(M, d - 1) + 1)
+        if len(i) == 0:
+            continue
+        j = d - i
+        cost_insert = distance[:, i - 1, j] + insert_cost[:, i - 1]
+        cost_delete = distance[:, i, j - 1] + delete_cost[:, j - 1]
+        is_equal = equal[:, i - 1, j - 1]
+        cost_sub = distance[:, i - 1, j - 1] + np.where(is_equal, 0, replace_cost[:, i - 1, j - 1])
+        min_cost = np.minimum(np.minimum(cost_insert, cost_delete), cost_sub)
+        distance[:, i, j] = min_cost
+        # the same tie breaking as the per-cell comparison: sub > insert > delete.
+        operation[:, i, j] = np.where((cost_sub == min_cost) & ~is_equal, 3,
+            np.where(cost_insert == min_cost, 2,
+            np.where(cost_delete == min_cost, 1, 0)))
+    return distance, operation
 
-    # here, source is p, target is q
-    '''
-    0 for exact matching
-    1 for deleting from B to match A
-    2 for inserting to B to match A
-    3 for substituting to match A
-    !!Adjusted from squad analysis code.
-    '''
-    
+
+def _backtrace_edits(source: List[str], target: List[str], 
+    distance: np.ndarray, operation: np.ndarray, merge: bool=True) -> Dict:
     m, n = len(source), len(target)
-    distance = np.zeros( (m + 1, n + 1) )
-    operation = np.zeros( (m + 1, n + 1) )
-    distance[0, :] = np.array(range(n + 1) )
-    distance[:, 0] = np.array(range(m + 1) )
-    node_delete_op, node_insert_op, node_sub_op = list(), list(), list()
     edits_op = list()
-    for i in range(1, m + 1):
-        for j in range(1, n + 1):
-            if cost is None:
-                cost_insert = distance[i - 1, j] + 1
-                cost_delete = distance[i, j - 1] + 1
-                if source[i - 1] == target[j - 1]:
-                    cost_sub = distance[i - 1, j - 1]
-                else:
-                    cost_sub = distance[i - 1, j - 1] + 2
-            else:
-                cost_insert = distance[i - 1, j] + \
-                    cost['insert'].setdefault(source[i - 1], sys.float_info.max / 1000.0)
-                cost_delete = distance[i, j - 1] + \
-                    cost['delete'].setdefault(target[j - 1], sys.float_info.max / 1000.0)
-                if source[i - 1] == target[j - 1]:
-                    cost_sub = distance[i - 1, j - 1]
-                else:
-                    cost_sub = distance[i - 1, j - 1] + \
-                    cost['replace'].setdefault( (source[i - 1], target[j - 1] ), sys.float_info.max / 1000.0)
-
-            min_cost = min(cost_insert, cost_delete, cost_sub)
-            distance[i, j] = min_cost
-
-            if cost_sub == min_cost and source[i - 1] != target[j - 1]:
-                operation[i, j] = 3
-            elif cost_insert == min_cost:
-                operation[i, j] = 2
-            elif cost_delete == min_cost:
-                operation[i, j] = 1
     # backtrace
     # note that we have a slightly different version of editing...
     cur_i, cur_j = m, n
     while (cur_i > 0 and cur_j > 0):
         if operation[cur_i, cur_j] == 1:
-            edits_op.insert(0, {'etype': 'insert', 'source': cur_i - 1, 'target': cur_j - 1})
-            node_delete_op.append( target[cur_j - 1])
+            edits_op.append({'etype': 'insert', 'source': cur_i - 1, 'target': cur_j - 1})
             cur_j = cur_j - 1
         elif operation[cur_i, cur_j] == 2:
-            edits_op.insert(0, {'etype': 'delete', 'source': cur_i - 1, 'target': cur_j - 1})
-            node_insert_op.append(source[cur_i - 1])
+            edits_op.append({'etype': 'delete', 'source': cur_i - 1, 'target': cur_j - 1})
             cur_i = cur_i - 1
         else:
             if source[cur_i - 1] != target[cur_j - 1]:
-                edits_op.insert(0, {'etype': 'replace', 'source': cur_i - 1, 'target': cur_j - 1})
-                node_sub_op.append( (source[cur_i - 1], target[cur_j - 1]))
+                edits_op.append({'etype': 'replace', 'source': cur_i - 1, 'target': cur_j - 1})
             else:
-                edits_op.insert(0, {'etype': 'equal', 'source': cur_i - 1, 'target': cur_j - 1})
+                edits_op.append({'etype': 'equal', 'source': cur_i - 1, 'target': cur_j - 1})
             cur_i -= 1
             cur_j -= 1
+    edits_op.reverse()
     # merge continuously same ones
     revised_ops = []
     op = ''
@@ -159,11 +166,56 @@ def sequence_matcher(source: List[str], target: List[str], cost=None, merge: boo
         to_end = edit['target'] + 1
         if idx == len(edits_op) - 1: # save the last one
             revised_ops.append(OpcodeMeta(op=op, fromIdxes=(from_start, from_end), toIdxes=(to_start, to_end)))
-    
-    #print(source)
-    #print(target)
-    #print(edits_op)
     return {'dist': min(distance[m, n], 8), 'edits': revised_ops}
+
+
+def sequence_matcher_batch(pairs: List[Tuple[List[str], List[str]]], cost=None, merge: bool=True) -> List[Dict]:
+    """The batch version of ``sequence_matcher``. The edit distance tables of all the 
+    pairs are filled together, one anti-diagonal at a time.
+    
+    Arguments:
+        pairs {List[Tuple[List[str], List[str]]]} -- (source, target) token lists
+    
+    Keyword Arguments:
+        cost {[type]} -- The optional {insert, delete, replace} cost dicts (default: {None})
+        merge {bool} -- if merge consecutive changes (default: {True})
+    
+    Returns:
+        List[Dict] -- [{dist: edit distance float, edits: List[OpcodeMeta]}], aligned with the pairs.
+    """
+    pairs = [ (list(source), list(target)) for source, target in pairs ]
+    if not pairs:
+        return []
+    distance, operation = _edit_tables(pairs, cost)
+    return [ 
+        _backtrace_edits(source, target, distance[b], operation[b], merge) 
+        for b, (source, target) in enumerate(pairs) ]
+
+
+def sequence_matcher(source: List[str], target: List[str], cost=None, merge: bool=True) -> Dict:
+    """A self-implemented edited token computation, not really working super correctly.
+    
+    Arguments:
+        source {List[str]} -- source str
+        target {List[str]} -- target str
+    
+    Keyword Arguments:
+        cost {[type]} -- The optional {insert, delete, replace} cost dicts (default: {None})
+        merge {bool} -- if merge consecutive changes (default: {True})
+    
+    Returns:
+        Dict -- {distance: edit distance float, edits: List[OpcodeMeta]}
+    """
+
+    # here, source is p, target is q
+    '''
+    0 for exact matching
+    1 for deleting from B to match A
+    2 for inserting to B to match A
+    3 for substituting to match A
+    !!Adjusted from squad analysis code.
+    '''
+    return sequence_matcher_batch([ (source, target) ], cost=cost, merge=merge)[0]
 '''
 def find_similar_token(word: Token) -> str:
     """Find synonyms from wordnet, given a token's text and POS. If cannot find one, return itself.
@@ -0,0 +1,200 @@
+from typing import List, Dict, Tuple
+from collections import OrderedDict
+from spacy.tokens import Doc
+from spacy.matcher import Matcher # pylint: disable=E0611
+
+from .replace_pattern import ReplacePattern
+from ..processor import spacy_annotator
+from ..targets.instance import Instance
+from ..targets.interfaces import RewriteOutputMeta
+from ..utils import convert_doc
+
+import logging
+logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+
+class PatternRuleEngine(object):
+    """
+    Run multiple ``ReplacePattern`` rules with one combined ``Matcher``.
+    All the rules are registered in the same matcher under their rids, so
+    every target doc is scanned once, and the matches are dispatched to
+    the on-match rewriter of each rule.
+
+    .. code-block:: python
+
+        from errudite.rewrites.pattern_rule_engine import PatternRuleEngine
+        engine = PatternRuleEngine(list(rules.values()))
+        rewritten = engine.rewrite_instances(instances)
+
+    Parameters
+    ----------
+    rules : List[ReplacePattern], optional
+        The rules to be registered, by default None
+
+    Attributes
+    ----------
+    rules : Dict[str, ReplacePattern]
+        ``{ rid: rule }``, the registered rules.
+    """
+    def __init__(self, rules: List[ReplacePattern]=None) -> None:
+        self.matcher = Matcher(spacy_annotator.model.vocab)
+        self.rules: Dict[str, ReplacePattern] = OrderedDict()
+        for rule in rules or []:
+            self.add_rule(rule)
+
+    def __contains__(self, rid: str) -> bool:
+        return rid in self.rules
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def add_rule(self, rule: ReplacePattern) -> bool:
+        """
+        Register a rule to the combined matcher.
+
+        Parameters
+        ----------
+        rule : ReplacePattern
+            The rule.
+
+        Returns
+        -------
+        bool
+            If the rule is registered. Rules without a valid pattern are skipped.
+        """
+        if rule.rid in self.rules:
+            return True
+        if not getattr(rule, 'pattern', None) or not rule.pattern.before:
+            return False
+        try:
+            if not rule._add_to_matcher(self.matcher):
+                return False
+        except Exception as e:
+            logger.warn(f"[ add_rule ]: cannot register {rule.rid}: {e}")
+            return False
+        self.rules[rule.rid] = rule
+        return True
+
+    def remove_rule(self, rid: str) -> bool:
+        """
+        Remove a rule from the combined matcher.
+
+        Parameters
+        ----------
+        rid : str
+            The rule id.
+
+        Returns
+        -------
+        bool
+            If the rule was registered.
+        """
+        if rid not in self.rules:
+            return False
+        if rid in self.matcher:
+            self.matcher.remove(rid)
+        del self.rules[rid]
+        return True
+
+    def rewrite_doc(self, doc: Doc) -> Dict[str, str]:
+        """
+        Scan a doc once, and get the rewrites of all the rules.
+
+        Parameters
+        ----------
+        doc : Doc
+            The target doc.
+
+        Returns
+        -------
+        Dict[str, str]
+            ``{ rid: rewritten text }``, only for the rules that matched the doc.
+            When one rule matches multiple times, keep the first rewrite,
+            same as ``ReplacePattern._rewrite_target``.
+        """
+        if not doc or not type(doc) == Doc or not self.rules:
+            return {}
+        outputs = {}
+        for rid, text in ReplacePattern.collect_paraphrases(self.matcher, doc, self.rules):
+            if rid not in outputs:
+                outputs[rid] = text
+        return outputs
+
+    def _group_rules_by_target(self) -> List[List[ReplacePattern]]:
+        groups = OrderedDict()
+        for rule in self.rules.values():
+            target_key = rule.target_cmd if type(rule.target_cmd) == str else id(rule.target_cmd)
+            if target_key not in groups:
+                groups[target_key] = []
+            groups[target_key].append(rule)
+        return list(groups.values())
+
+    def rewrite_targets(self,
+        instances: List[Instance]) -> List[Dict[str, Tuple[Doc, str]]]:
+        """
+        Rewrite the targets of a list of instances with all the rules.
+        The rules with the same ``target_cmd`` share one target selection pass,
+        and one scan per target doc.
+
+        Parameters
+        ----------
+        instances : List[Instance]
+            The instances.
+
+        Returns
+        -------
+        List[Dict[str, Tuple[Doc, str]]]
+            Aligned with the instances: ``{ rid: (target doc, rewritten text) }``,
+            only for the rules that rewrote the instance target.
+        """
+        instances = list(instances)
+        outputs = [ {} for _ in instances ]
+        for rules in self._group_rules_by_target():
+            # all the rules in the group select the same targets.
+            targets = rules[0].bbw.test_instances(
+                [ { instance.rid: instance } for instance in instances ])
+            if not targets:
+                continue
+            rids = set([ rule.rid for rule in rules ])
+            for idx, instance in enumerate(instances):
+                if instance.key() not in targets:
+                    continue
+                target = targets[instance.key()]
+                if type(target) == str and instance.get_entry(target) != None:
+                    target = instance.get_entry(target)
+                doc = convert_doc(target, strict_format='doc')
+                for rid, text in self.rewrite_doc(doc).items():
+                    if rid in rids:
+                        outputs[idx][rid] = (doc, text)
+        return outputs
+
+    def rewrite_instances(self,
+        instances: List[Instance]) -> Dict[str, List[RewriteOutputMeta]]:
+        """
+        Rewrite a list of instances with all the rules. This is the same as calling
+        ``rule.rewrite_instances(instances)`` for each rule, but costs one scan
+        of the target docs.
+
+        Parameters
+        ----------
+        instances : List[Instance]
+            The instances.
+
+        Returns
+        -------
+        Dict[str, List[RewriteOutputMeta]]
+            ``{ rid: rewritten outputs aligned with the instances }``
+        """
+        instances = list(instances)
+        rewritten_targets = self.rewrite_targets(instances)
+        outputs = {}
+        for rid, rule in self.rules.items():
+            try:
+                rule._batch_rewritten = {
+                    instance.key(): rewritten[rid][1]
+                    for instance, rewritten in zip(instances, rewritten_targets)
+                    if rid in rewritten }
+                outputs[rid] = rule.rewrite_instances(instances)
+            finally:
+                rule._batch_rewritten = None
+        return outputs
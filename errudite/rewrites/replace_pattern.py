@@ -1,5 +1,5 @@
 import functools
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from spacy.tokens import Token
 from spacy.matcher import Matcher # pylint: disable=E0611
 
@@ -60,6 +60,8 @@ class ReplacePattern (Rewrite):
         self.from_cmd = str_to_func(from_cmd)
         self.to_cmd = str_to_func(to_cmd)
         self.matcher = Matcher(spacy_annotator.model.vocab)
+        # { InstanceKey: rewritten str }, precomputed by ``PatternRuleEngine``.
+        self._batch_rewritten: Dict['InstanceKey', str] = None
         
         if self.from_cmd and self.to_cmd:
             self.pattern = PatternMeta(
@@ -85,6 +87,11 @@ class ReplacePattern (Rewrite):
             (all([get_str_from_pattern(p) != None for p in self.normalize_pattern(self.pattern.before) ]) and \
             all([get_str_from_pattern(p) != None for p in self.normalize_pattern(self.pattern.after) ]))
 
+    def get_match_pattern(self) -> List[Dict]:
+        if not getattr(self, 'pattern', None) or not self.pattern.before:
+            return None
+        return self.normalize_pattern(self.pattern.before)
+
     def normalize_pattern(self, pattern_arr):
         pattern_arr = convert_list(pattern_arr)
         if not pattern_arr or type(pattern_arr) not in [ list, tuple ]:
@@ -138,7 +145,7 @@ class ReplacePattern (Rewrite):
             atokens = merge_list(self.convert_one_pattern(pattern.before))
             btokens = merge_list(self.convert_one_pattern(pattern.after))
             from_idx, to_idx = 0, 0
-            output = sequence_matcher(atokens, btokens, merge=False)['rewrites']
+            output = sequence_matcher(atokens, btokens, merge=False)['edits']
             output_refactored = []
             for o in output:
                 cur_from_idx = from_idx
@@ -216,44 +223,90 @@ class ReplacePattern (Rewrite):
         return functools.partial(_on_match_rewrite, pattern=pattern)
 
     def add_matcher(self):
-        if self.rid in self.matcher:
+        return self._add_to_matcher(self.matcher)
+
+    def _add_to_matcher(self, matcher: Matcher) -> bool:
+        """Register the pattern of this rule to a matcher, under ``self.rid``.
+        The matches are rewritten by ``collect_paraphrases``, so one matcher 
+        can hold multiple rules.
+
+        Arguments:
+            matcher {Matcher} -- The matcher. Either ``self.matcher``, or a 
+                combined one shared by multiple rules.
+        
+        Returns:
+            bool -- If the rule is registered.
+        """
+        if self.rid in matcher:
             return True
-        match_func = self.get_match_func(self.pattern)
-        if match_func:
-            def on_match(matcher, doc, i, matches):
-                output = match_func(matcher, doc, i, matches)
-                if not output:
-                    return False
-                matched_id, paraphrase_text = output
-                rule_id = spacy_annotator.model.vocab.strings[matched_id]
-                if (rule_id, paraphrase_text) not in doc._.paraphrases \
-                    and paraphrase_text.lower() != doc.text.lower(): 
-                    # TODO: change this to only include unique ones?
-                    doc._.paraphrases.append((rule_id, paraphrase_text))
+        if self._get_match_func():
             if type(self.pattern.before) in [tuple, list] and \
                 len(self.pattern.before) > 0 and \
                 type(self.pattern.before[0]) in [tuple, list]:
-                self.matcher.add(self.rid, on_match, *self.pattern.before)
+                matcher.add(self.rid, None, *self.pattern.before)
             else:
-                self.matcher.add(self.rid, on_match, self.pattern.before)
+                matcher.add(self.rid, None, self.pattern.before)
             return True
         else:
             return False
+
+    def _get_match_func(self):
+        if getattr(self, '_match_func', None) is None:
+            self._match_func = self.get_match_func(self.pattern)
+        return self._match_func
+
+    @staticmethod
+    def collect_paraphrases(
+        matcher: Matcher, 
+        doc: Doc, 
+        rules: Dict[str, 'ReplacePattern']) -> List[Tuple[str, str]]:
+        """Scan a doc with a matcher, and rewrite each match with its rule.
+        The paraphrases are kept in a local list, not on the doc: the targets 
+        with the same text share one cached doc.
+
+        Arguments:
+            matcher {Matcher} -- The matcher, with the rules registered.
+            doc {Doc} -- The target doc.
+            rules {Dict[str, ReplacePattern]} -- ``{ rid: rule }``. Matches of other rids are skipped.
+        
+        Returns:
+            List[Tuple[str, str]] -- The distinct ``(rid, rewritten text)``, in the match order.
+        """
+        paraphrases = []
+        matches = matcher(doc)
+        for i, (match_id, _, _) in enumerate(matches):
+            rule_id = spacy_annotator.model.vocab.strings[match_id]
+            if rule_id not in rules:
+                continue
+            output = rules[rule_id]._get_match_func()(matcher, doc, i, matches)
+            if not output:
+                continue
+            paraphrase_text = output[1]
+            if (rule_id, paraphrase_text) not in paraphrases \
+                and paraphrase_text.lower() != doc.text.lower(): 
+                # TODO: change this to only include unique ones?
+                paraphrases.append((rule_id, paraphrase_text))
+        return paraphrases
    
     def _rewrite_target(self, instance) -> str:
+        if self._batch_rewritten is not None:
+            return self._batch_rewritten.get(instance.key(), None)
+        outputs = self._rewrite_target_variants(instance, max_variants=1)
+        return outputs[0] if outputs else None
+
+    def _rewrite_target_variants(self, instance, max_variants: int=None) -> List[str]:
+        """All the distinct paraphrases of the target, one per match of the pattern."""
+        if self._batch_rewritten is not None:
+            rewritten = self._batch_rewritten.get(instance.key(), None)
+            return [ rewritten ] if rewritten else []
         if not self.add_matcher():
-            return None
+            return []
         doc = self._get_target(instance)
         if not doc or not type(doc) == Doc:
             #print('Not a rewriteable doc!!')
-            return None
-        doc._.paraphrases = []
-        self.matcher(doc)
-        outputs = [d for d in list(doc._.paraphrases) if d[0] == self.rid]
-        doc._.paraphrases = []
-        if len(outputs) > 0:
-            return outputs[0][1]
-        return None
+            return []
+        outputs = [ d[1] for d in self.collect_paraphrases(self.matcher, doc, { self.rid: self }) ]
+        return outputs[:max_variants] if max_variants else outputs
 
     def __repr__(self) -> str:
         """Override the print func
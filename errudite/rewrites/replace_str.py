@@ -1,9 +1,10 @@
-from typing import List, Dict
+from typing import List, Dict, Union
 from spacy.tokens import Token
 
 
 from .rewrite import Rewrite
 from ..targets.instance import Instance
+from ..processor import spacy_annotator
 
 #from backend.utils.helpers import convert_list
 #from backend.build_block.prim_funcs.overlap import overlap
@@ -63,8 +64,9 @@ class ReplaceStr (Rewrite):
     def is_pure_str_replace(self):
         return True
 
-    def _rewrite_target(self, instance: Instance) -> str: 
-        # if the editing happened.
+    def _rewrite_target(self, instance: Instance) -> Union[str, List[str]]: 
+        # if the editing happened. ``to_cmd`` can give a list 
+        # (e.g., ``get_synonyms``), and each one is a variant.
         ori_str = self._get_target(instance)
         if ori_str:
             ori_str = ori_str.text
@@ -80,10 +82,19 @@ class ReplaceStr (Rewrite):
             to_str = to_data[instance.key()] if instance.key()  in to_data and to_data[instance.key()] != None else self.to_cmd
         except:
             to_str = self.to_cmd
+        if from_str != None and type(to_str) in [ list, tuple ]:
+            return [ ori_str.replace(from_str, t) for t in to_str if t != None ]
         if from_str != None and to_str != None:
             return ori_str.replace(from_str, to_str)
         return None
     
+    def get_match_pattern(self) -> List[Dict]:
+        """The tokens of ``from_cmd``. The string can also be replaced within a 
+        token, so the coverage from this pattern is only an estimate."""
+        if type(self.from_cmd) != str or not self.from_cmd.strip():
+            return None
+        return [ { 'LOWER': t.lower_ } for t in spacy_annotator.model.tokenizer(self.from_cmd) ]
+
     def get_json(self):
         return {
             'rid': self.rid,
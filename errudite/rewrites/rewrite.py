@@ -8,10 +8,12 @@ from typing import List, Dict, Callable, TypeVar
 from collections import defaultdict
 from ..processor import spacy_annotator
 from ..utils import Registrable, Store, convert_doc, load_json, dump_json, CACHE_FOLDERS, normalize_file_path
+from ..utils.intervals import rate_interval, mean_interval, wilson_interval
 
 from ..targets.instance import Instance
 from ..targets.interfaces import RewriteOutputMeta, InstanceKey
 from ..build_blocks.wrapper import BuildBlockWrapper
+from .flip_stats import FlipStats
 
 import logging
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
@@ -44,6 +46,9 @@ class Rewrite(Registrable, Store):
     examples : List[str]
         The example strings.
     """
+    #: ``FlipStats`` The flip statistics of the saved rewrite rules, on all the models.
+    flip_stats: FlipStats = FlipStats()
+
     def __init__(self, 
         rid: str,
         category: str, 
@@ -59,6 +64,8 @@ class Rewrite(Registrable, Store):
         self.bbw.parse_cmd_to_operator(target_cmd, 'attr')
         self._set_main_target(target_cmd)
         self.examples: List[str] = []
+        # { InstanceKey: target }, precomputed by ``rewrite_instances``.
+        self._batch_targets: Dict[InstanceKey, any] = None
     
     def key(self) -> str:
         """Return the key of the rewrite rule, which is ``rid``.
@@ -82,12 +89,28 @@ class Rewrite(Registrable, Store):
         Returns
         -------
         InstanceKey
-            The key for the rewritten instance. If not existing, return None.
+            The key for the rewritten instance (the first variant, if there 
+            are multiple; see ``self.retrive_instance_keys``). If not existing, return None.
         """
-        qids = { k.qid: k for k in self.instance_keys }
-        if qid in qids:
-            return qids[qid]
-        return None
+        keys = self.retrive_instance_keys(qid)
+        return keys[0] if keys else None
+
+    def retrive_instance_keys(self, qid: str) -> List[InstanceKey]:
+        """Given a qid, retrive all its versions rewritten by this rewrite rule. 
+        A rule can rewrite one instance into multiple variants (see
+        ``self.rewrite_one_instance_variants``), each saved with its own vid.
+        
+        Parameters
+        ----------
+        qid : str
+            The instance qid.
+        
+        Returns
+        -------
+        List[InstanceKey]
+            The keys for the rewritten instances, sorted by vid.
+        """
+        return sorted([ k for k in self.instance_keys if k.qid == qid ], key=lambda k: k.vid)
     
     def add_instance(self, key: InstanceKey) -> bool:
         """Add an instance key to ``self.instance_keys``
@@ -154,7 +177,9 @@ class Rewrite(Registrable, Store):
     def rewrite_instances(self, 
         instances: List[Instance]) -> List[RewriteOutputMeta]:
         """
-        Rewrite a list of instances. This function calls 
+        Rewrite a list of instances. This function selects the targets 
+        of all the instances with one pass of ``target_cmd`` (so the batch 
+        versions of the DSL functions can be used), and then calls 
         ``self.rewrite_one_instance`` for each instance.
 
         
@@ -166,12 +191,47 @@ class Rewrite(Registrable, Store):
         Returns
         -------
         List[RewriteOutputMeta]
-            The list of rewritten returns.
+            The list of rewritten returns, aligned with the instances.
+        """
+        instances = list(instances)
+        try:
+            self._batch_targets = self.bbw.test_instances(
+                [ { instance.rid: instance } for instance in instances if instance ])
+            return [
+                self.rewrite_one_instance(instance)
+                for instance in instances
+            ]
+        finally:
+            self._batch_targets = None
+
+    def rewrite_instances_variants(self, 
+        instances: List[Instance], max_variants: int=None) -> List[List[RewriteOutputMeta]]:
+        """
+        Rewrite a list of instances, with possibly multiple variants per instance.
+        Same as ``self.rewrite_instances``, but calls ``self.rewrite_one_instance_variants``.
+        
+        Parameters
+        ----------
+        instances : List[Instance]
+            The list of instances to be rewritten.
+        max_variants : int, optional
+            The max number of variants per instance, by default None (no limit).
+        
+        Returns
+        -------
+        List[List[RewriteOutputMeta]]
+            The rewritten variants, aligned with the instances.
         """
-        return [
-            self.rewrite_one_instance(instance)
-            for instance in instances
-        ]
+        instances = list(instances)
+        try:
+            self._batch_targets = self.bbw.test_instances(
+                [ { instance.rid: instance } for instance in instances if instance ])
+            return [
+                self.rewrite_one_instance_variants(instance, max_variants)
+                for instance in instances
+            ]
+        finally:
+            self._batch_targets = None
 
     def _get_target(self, instance: Instance) -> Doc:
         """Get the target to be rewritten from the instance.
@@ -188,9 +248,11 @@ class Rewrite(Registrable, Store):
         """
         if not instance:
             return None
-            
-        data = self.bbw.test_instances([{ instance.rid: instance }])
-        if instance.key() in data:
+        if self._batch_targets is not None:
+            data = self._batch_targets
+        else:
+            data = self.bbw.test_instances([{ instance.rid: instance }])
+        if data and instance.key() in data:
             key = data[instance.key()]
             if type(key) == str and instance.get_entry(key) != None:
                 return convert_doc(instance.get_entry(key), strict_format='doc')
@@ -211,27 +273,75 @@ class Rewrite(Registrable, Store):
             A named tuple, with rid and the rewritten text of the instance target.
             If the instance cannot be rewritten, return None.
         """
+        outputs = self.rewrite_one_instance_variants(instance, max_variants=1)
+        return outputs[0] if outputs else None
+
+    def rewrite_one_instance_variants(self, 
+        instance: Instance, max_variants: int=None) -> List[RewriteOutputMeta]:
+        """Rewrite an instance into one or more variants, e.g., one per synonym. 
+        The variants are from ``self._rewrite_target_variants``.
+        
+        Parameters
+        ----------
+        instance : Instance
+            The instance to be rewritten.
+        max_variants : int, optional
+            The max number of variants, by default None (no limit).
+        
+        Returns
+        -------
+        List[RewriteOutputMeta]
+            The distinct rewritten texts of the instance target, with the rid.
+            If the instance cannot be rewritten, return [].
+        """
         self._set_main_target(self.target_cmd, instance)
         if not self.target:
-            return None
-        if self.retrive_instance_key(instance.qid):
-            return None
+            return []
+        if self.retrive_instance_keys(instance.qid):
+            return []
         ori_doc = instance.get_entry(self.target)
         if not ori_doc:
-            return None
+            return []
         ori_text = ori_doc.doc.text
         ori_text_to_rewrite = self._get_target(instance)
         if not ori_text_to_rewrite:
-            return None
+            return []
         if type(ori_text_to_rewrite) in [Doc, Span]:
             ori_text_to_rewrite = ori_text_to_rewrite.doc.text
-        rewritten_str = self._rewrite_target(instance)
-        if not rewritten_str:
-            return None
-        output_text = ori_text.replace(ori_text_to_rewrite, rewritten_str).strip()
-        if output_text.strip() != ori_text.strip():
-            return RewriteOutputMeta(rid=self.rid, text=output_text)
-        return None
+        outputs = []
+        for rewritten_str in self._rewrite_target_variants(instance, max_variants):
+            if not rewritten_str:
+                continue
+            output_text = ori_text.replace(ori_text_to_rewrite, rewritten_str).strip()
+            if output_text.strip() != ori_text.strip() and \
+                output_text not in [ o.text for o in outputs ]:
+                outputs.append(RewriteOutputMeta(rid=self.rid, text=output_text))
+            if max_variants and len(outputs) >= max_variants:
+                break
+        return outputs
+
+    def _rewrite_target_variants(self, instance: Instance, max_variants: int=None) -> List[str]:
+        """
+        Rewrite the target into one or more strings. By default, it calls 
+        ``self._rewrite_target``, which can return either one string or a list of them.
+        
+        Parameters
+        ----------
+        instance : Instance
+            The instance to be rewritten.
+        max_variants : int, optional
+            The max number of variants needed, by default None (no limit).
+            Only a hint; the output is truncated by the caller.
+        
+        Returns
+        -------
+        List[str]
+            The rewritten target strings.
+        """
+        rewritten = self._rewrite_target(instance)
+        if not rewritten:
+            return []
+        return list(rewritten) if type(rewritten) in [ list, tuple ] else [ rewritten ]
 
     def _rewrite_target(self, instance: Instance) -> str:
         """
@@ -247,7 +357,7 @@ class Rewrite(Registrable, Store):
         -------
         str
             The rewritten instance string. If cannot be rewritten,
-            return None
+            return None. It can also be a list of strings, one per variant.
         
         Raises
         ------
@@ -256,6 +366,20 @@ class Rewrite(Registrable, Store):
         """
         raise NotImplementedError
 
+    def get_match_pattern(self) -> List[Dict]:
+        """
+        The matcher pattern that a target has to match to be rewritten, used by
+        ``TokenIndex.estimate`` to count the instances a rule may cover without 
+        rewriting them.
+        
+        Returns
+        -------
+        List[Dict]
+            The pattern, in the format of the spacy matcher. ``None`` if the
+            rule cannot be described with a pattern (e.g., a custom function).
+        """
+        return None
+
     def print_rewrite(self, prev, next, curr, curr_new):
         raise NotImplementedError
     
@@ -333,6 +457,8 @@ class Rewrite(Registrable, Store):
             qids = list(np.unique([i.qid for i in filtered_instances]))
         else:
             qids = None
+        counts = self.count_flips(Rewrite.get_delta_performance(self,
+            qids, instance_hash, instance_hash_rewritten, model)['delta_f1s'])
         return {
             'rid': self.rid,
             'description': self.description,
@@ -342,8 +468,8 @@ class Rewrite(Registrable, Store):
             'category': self.category,
             'target': self.target,
             'examples': getattr(self, 'examples', []),
-            'counts': self.count_flips(Rewrite.get_delta_performance(self,
-                qids, instance_hash, instance_hash_rewritten, model)['delta_f1s'])
+            'counts': counts,
+            'intervals': Rewrite.flip_intervals([ counts ])[0]
         }
     
     def visualize_models(self, 
@@ -566,8 +692,13 @@ class Rewrite(Registrable, Store):
         instance_hash: Dict[str, 'Instance']={}, 
         instance_hash_rewritten: Dict[str, 'Instance']={},
         model: str=None) -> List[float]:
-        """Evaluate the current rewrite
+        """Evaluate the current rewrite. If the default hashes are used and the
+        rewrite is saved, the stats are read from ``Rewrite.flip_stats``.
         """
+        if not instance_hash and not instance_hash_rewritten and \
+            cls.exists(rewrite.rid) and cls.get(rewrite.rid) is rewrite:
+            cls.flip_stats.update([ rewrite ])
+            return cls.flip_stats.get_delta_performance(rewrite.rid, qids, model)
         instance_hash = instance_hash or Instance.instance_hash
         instance_hash_rewritten = instance_hash_rewritten or Instance.instance_hash_rewritten
         delta_f1s, delta_confidences, prediction_changed = [], [], 0
@@ -646,6 +777,12 @@ class Rewrite(Registrable, Store):
                         'coverage': Ratio of instances rewritten.
                         'changed_coverage': The instances with predictions changed, over all instances.
                         'changed_rate': The instances with predictions changed, over all instances REWRITTEN.
+                    },
+                    'intervals': {
+                        'changed_rate': The 95% Wilson interval, [lower, upper].
+                        'flip_to_correct_rate': The 95% Wilson interval of the flips over the rewritten.
+                        'flip_to_incorrect_rate': The 95% Wilson interval of the flips over the rewritten.
+                        'delta_perform': The 95% bootstrap interval of the average delta performance.
                     }
                 }
         """
@@ -653,16 +790,24 @@ class Rewrite(Registrable, Store):
         instance_hash_rewritten = instance_hash_rewritten or Instance.instance_hash_rewritten
         info = cls.get_delta_performance(rewrite,
             qids, instance_hash, instance_hash_rewritten, model)
+        rewritten = len(info['delta_f1s'])
+        flips = cls.count_flips(info['delta_f1s'])
         return {
             'counts': {
-                'rewritten': len(info['delta_f1s']),
+                'rewritten': rewritten,
                 'prediction_changed': info['prediction_changed'],
-                'flips': cls.count_flips(info['delta_f1s'])
+                'flips': flips
             },
             'stats': {
-                'coverage': len(info['delta_f1s']) / len(instance_hash) if instance_hash else 0,
+                'coverage': rewritten / len(instance_hash) if instance_hash else 0,
                 'changed_coverage': info['prediction_changed'] / len(instance_hash) if instance_hash else 0,
-                'changed_rate': info['prediction_changed'] / len(info['delta_f1s']) if info['delta_f1s'] else 0,
+                'changed_rate': info['prediction_changed'] / rewritten if rewritten else 0,
+            },
+            'intervals': {
+                'changed_rate': rate_interval(info['prediction_changed'], rewritten),
+                'flip_to_correct_rate': rate_interval(flips['flip_to_correct'], rewritten),
+                'flip_to_incorrect_rate': rate_interval(flips['flip_to_incorrect'], rewritten),
+                'delta_perform': mean_interval(info['delta_f1s'])
             }
         }
     
@@ -694,6 +839,37 @@ class Rewrite(Registrable, Store):
             'unflip': len([d for d in delta_performs if d == 0])
         }
 
+    @classmethod
+    def flip_intervals(cls, counts_list: List[Dict[str, int]]) -> List[Dict[str, List[float]]]:
+        """The 95% Wilson intervals of the flip rates, for multiple outputs
+        of ``count_flips`` at once.
+        
+        Parameters
+        ----------
+        counts_list : List[Dict[str, int]]
+            The outputs of ``count_flips``.
+        
+        Returns
+        -------
+        List[Dict[str, List[float]]]
+            .. code-block:: js
+            
+                [{
+                    'flip_to_correct_rate': [lower, upper],
+                    'flip_to_incorrect_rate': [lower, upper]
+                }]
+        """
+        totals = np.array([ sum(c.values()) for c in counts_list ])
+        correct_lowers, correct_uppers = wilson_interval(
+            np.array([ c['flip_to_correct'] for c in counts_list ]), totals)
+        incorrect_lowers, incorrect_uppers = wilson_interval(
+            np.array([ c['flip_to_incorrect'] for c in counts_list ]), totals)
+        return [ {
+            'flip_to_correct_rate': [ cl, cu ],
+            'flip_to_incorrect_rate': [ il, iu ]
+        } for cl, cu, il, iu in zip(correct_lowers.tolist(), correct_uppers.tolist(), 
+            incorrect_lowers.tolist(), incorrect_uppers.tolist()) ]
+
     @classmethod
     def print_stats(self, rewrite: 'Rewrite', counts: Dict[str, int]) -> None:
         """Print the information.
@@ -773,6 +949,7 @@ class Rewrite(Registrable, Store):
                     rewrite._clear_rule()
                 for key in rewrite.get_instances():
                     Instance.remove_saved(key)
+                cls.flip_stats.remove(rewrite.rid)
                 Rewrite._remove_by_name(name)
                 return True
             return False
@@ -2,6 +2,7 @@ import math
 import functools
 import os
 import random
+import time
 import numpy as np 
 from typing import List, Dict
 from spacy.tokens import Token, Doc, Span
@@ -9,8 +10,15 @@ from spacy.matcher import Matcher # pylint: disable=E0611
 
 from .rewrite import Rewrite
 from .replace_pattern import ReplacePattern
+from .pattern_rule_engine import PatternRuleEngine
 from ..targets.interfaces import TextPairMeta, PatternMeta
 
+import logging
+logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+# ORTH is much more specific than any others.
+CONCRETE_LEVEL = {'POS': 1, 'ORTH': 4, 'LOWER': 4, 'DEP': 2, 'TAG': 2}
+
 @Rewrite.register("SemanticRule")
 class SemanticRule(ReplacePattern):
     def __init__(self, pattern: PatternMeta, target_cmd: str):
@@ -44,7 +52,6 @@ class SemanticRule(ReplacePattern):
             int -- A concrete score
         """
 
-        concrete_level = {'POS': 1, 'ORTH': 4, 'LOWER': 4, 'DEP': 2, 'TAG': 2}
         score = 0
         # p_arr:  [{ORTH: 'Google', POS: 'NOUN'}, {ORTH: 'Now'}])
         for p_arr in [
@@ -52,8 +59,8 @@ class SemanticRule(ReplacePattern):
             self.normalize_pattern(self.pattern.after)]:
             for p in p_arr:  # {ORTH: 'Google', POS: 'NOUN'}
                 score += max([
-                    concrete_level[label]
-                    if label in concrete_level else 1 for label in p.keys()])
+                    CONCRETE_LEVEL[label]
+                    if label in CONCRETE_LEVEL else 1 for label in p.keys()])
         return score
 
     def __repr__(self) -> str:
@@ -177,15 +184,32 @@ class SemanticRule(ReplacePattern):
     @classmethod
     def filter_rules_via_sample_augment(cls, 
         rules: Dict[str, 'SemanticRule'],
-        samples: List['Instance']) -> None:
+        samples: List['Instance'],
+        keep_top_n: int=5,
+        deadline: float=None,
+        chunk_size: int=10) -> None:
+        if not rules:
+            return rules
         rule_names = list(rules.keys())
         rule_cover_set = [set() for r in rule_names]
         generated_text_pairs = []
         mat_idxes = []
-        for sample in samples:
+        # scan each sample target once with all the rules, so all 
+        # the candidates are validated together. When a deadline is given, 
+        # stop at the first chunk of samples after it.
+        samples = list(samples)
+        engine = PatternRuleEngine(list(rules.values()))
+        rewritten_list = []
+        for start_idx in range(0, len(samples), chunk_size):
+            if deadline is not None and start_idx > 0 and time.time() > deadline:
+                logger.info(f"[ filter_rules_via_sample_augment ]: validated on {start_idx}/{len(samples)} samples.")
+                break
+            rewritten_list += engine.rewrite_targets(samples[start_idx:start_idx+chunk_size])
+        for rewritten in rewritten_list:
             for rid, r_name in enumerate(rule_names):
-                input = rules[r_name]._get_target(sample)
-                output = rules[r_name]._rewrite_target(sample)
+                if r_name not in rewritten:
+                    continue
+                input, output = rewritten[r_name]
                 if not input or not output:
                     continue
                 text_pair = TextPairMeta(atext=input.text, btext=output)
@@ -202,7 +226,7 @@ class SemanticRule(ReplacePattern):
             mat[mat_idx[0]][mat_idx[1]] = 1
         # set the filter
         rules = cls.filter_rules_greedy_add(rules, mat, 
-            rule_cover_set, rule_names, keep_top_n=5)
+            rule_cover_set, rule_names, keep_top_n=keep_top_n)
         # setup the examples and descriptions
         for r in rules.values():
             ridx = rule_names.index(r.rid)
@@ -1,14 +1,16 @@
 import itertools
+import heapq
 import difflib
 import random
+import time
 import numpy as np
 # import copy
 from collections import Counter
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Iterator
 from spacy.tokens import Doc, Token
 
-from .helpers import REWRITE_TYPE_DICT, sequence_matcher
-from .semantic_rule import SemanticRule
+from .helpers import REWRITE_TYPE_DICT, sequence_matcher_batch
+from .semantic_rule import SemanticRule, CONCRETE_LEVEL
 from ..targets.interfaces import OpcodeMeta, PatternMeta, MatchedTokenMeta, RewriteTypeMeta
 from ..processor import DUMMY_FLAG
 from ..processor.ling_consts import NOT_INCLUDE_POS, WHs,  NNs, VBs, MDs
@@ -96,12 +98,30 @@ class SemanticRuleDetector(object):
         Returns:
             List[OpcodeMeta] -- list of rewriteing operations
         """
+        return self._get_rewrite_ops_text_batch([ (atokens, btokens) ], merge=merge, use_natural=use_natural)[0]
+
+    def _get_rewrite_ops_text_batch(self, pairs: List[Tuple[List[str], List[str]]], 
+        merge: bool, use_natural: bool) -> List[List[OpcodeMeta]]:
+        """The batch version of ``_get_rewrite_ops_text``. With the self-implemented 
+        function, all the pairs are aligned with one ``sequence_matcher_batch`` call.
+
+        Arguments:
+            pairs {List[Tuple[List[str], List[str]]]} -- (original, rewritten-to) token str lists
+            merge {bool} -- merge continuously rewritten ops (default: {True})
+            use_natural {bool} -- use difflib library / self-implemented function (default: {False})
+            
+        Returns:
+            List[List[OpcodeMeta]] -- list of rewriteing operations, aligned with the pairs
+        """
         if use_natural:
-            rewritten_raw_native = difflib.SequenceMatcher(a=atokens, b=btokens)
-            rewritten_raw_native = ([x for x in rewritten_raw_native.get_opcodes()])
-            return [OpcodeMeta(op=l[0], fromIdxes=l[1:3], toIdxes=l[3:5]) for l in rewritten_raw_native]
+            outputs = []
+            for atokens, btokens in pairs:
+                rewritten_raw_native = difflib.SequenceMatcher(a=atokens, b=btokens)
+                rewritten_raw_native = ([x for x in rewritten_raw_native.get_opcodes()])
+                outputs.append([OpcodeMeta(op=l[0], fromIdxes=l[1:3], toIdxes=l[3:5]) for l in rewritten_raw_native])
+            return outputs
         else:
-            return sequence_matcher(atokens, btokens, merge=merge)['rewrites']
+            return [ output['edits'] for output in sequence_matcher_batch(pairs, merge=merge) ]
 
     def _get_rewrite_ops(self, adoc: Doc, bdoc: Doc, key: str='text', merge: bool=True, use_natural: bool=True) -> List[OpcodeMeta]:
         """Compare two queries and get the rewriteing ops
@@ -119,9 +139,26 @@ class SemanticRuleDetector(object):
         Returns:
             List[OpcodeMeta] -- list of rewriteing operations
         """
-        return self._get_rewrite_ops_text(
+        return self._get_rewrite_ops_batch([ (adoc, bdoc) ], key=key, merge=merge, use_natural=use_natural)[0]
+
+    def _get_rewrite_ops_batch(self, doc_pairs: List[Tuple[Doc, Doc]], 
+        key: str='text', merge: bool=True, use_natural: bool=True) -> List[List[OpcodeMeta]]:
+        """The batch version of ``_get_rewrite_ops``.
+        
+        Arguments:
+            doc_pairs {List[Tuple[Doc, Doc]]} -- (original, rewritten-to) docs
+        
+        Keyword Arguments:
+            key {str} -- the linguistic feature. (default: {'text'})
+            merge {bool} -- merge continuously rewritten ops (default: {True})
+            use_natural {bool} -- use difflib library / self-implemented function (default: {False})
+        
+        Returns:
+            List[List[OpcodeMeta]] -- list of rewriteing operations, aligned with the pairs
+        """
+        return self._get_rewrite_ops_text_batch([ (
             list(map(lambda p: get_token_feature(p, key), adoc)), 
-            list(map(lambda p: get_token_feature(p, key), bdoc)),
+            list(map(lambda p: get_token_feature(p, key), bdoc))) for adoc, bdoc in doc_pairs ],
             merge=merge, use_natural=use_natural)
 
 
@@ -188,6 +225,146 @@ class SemanticRuleDetector(object):
             pattern['OP'] = match_op
         return pattern
     
+    def _pattern_concreteness(self, patterns: List[Dict[str, str]]) -> int:
+        """The concreteness of a (partial) pattern, same as ``SemanticRule._compute_pattern_concrete``.
+        Lower means more general.
+        
+        Arguments:
+            patterns {List[Dict[str, str]]} -- the matcher tokens
+        
+        Returns:
+            int -- A concrete score
+        """
+        return sum([
+            max([CONCRETE_LEVEL.get(label, 1) for label in p.keys()] or [1])
+            for p in patterns ])
+
+    def _gen_segment_options(self, caregory_meta: RewriteTypeMeta, 
+        atokens: List[Token], btokens: List[Token], 
+        deadline: float=None) -> List[Tuple[int, List[Dict[str, str]], List[Dict[str, str]]]]:
+        """Get all the valid token patterns of one segment (one op, or the unchanged tokens between ops),
+        ordered by generality. Combinations with an invalid token are dropped here, 
+        before they are combined with other segments. The label combinations are 
+        generated lazily, so the search can stop at the deadline.
+        
+        Arguments:
+            caregory_meta {RewriteTypeMeta} -- The rewrite type of this segment
+            atokens {List[Token]} -- the tokens of the segment in the original doc
+            btokens {List[Token]} -- the tokens of the segment in the rewritten doc
+            deadline {float} -- Stop after this timestamp (``time.time()``), and only 
+                return the options found so far. If None, no limit. (default: {None})
+        
+        Returns:
+            List[Tuple[int, List[Dict[str, str]], List[Dict[str, str]]]] -- [(score, apatterns, bpatterns)]
+        """
+        def gen_label_sequence(length: int) -> Iterator[List[str]]: 
+            # get all the possible linguistic feature label combinations for a given length
+            # if too many tokens in a given sequence, then just remove the combinations. 
+            if caregory_meta.allow_product and length <= self.max_token_count:
+                return itertools.product(caregory_meta.labels, repeat=length)
+            else:
+                return ([label] * length for label in caregory_meta.labels)
+        token_patterns = {}
+        def gen_token_pattern(side: str, idx: int, token: Token, label: str) -> Dict[str, str]:
+            if (side, idx, label) not in token_patterns:
+                token_patterns[(side, idx, label)] = self._gen_token_pattern(token=token, label=label)
+            return token_patterns[(side, idx, label)]
+        # create the label pairs based on if production is allowed. 
+        # The b sequences are generated again for each a sequence, so no product is stored.
+        if caregory_meta.allow_product and len(atokens) <= self.max_token_count and len(btokens) <= self.max_token_count:
+            labels = ( (alabels, blabels) for alabels in gen_label_sequence(len(atokens)) \
+                for blabels in gen_label_sequence(len(btokens)) )
+        else:
+            labels = zip(gen_label_sequence(len(atokens)), gen_label_sequence(len(btokens)))
+        options, seen = [], set()
+        for alabels, blabels in labels:
+            if deadline is not None and time.time() > deadline:
+                break
+            apatterns = [ gen_token_pattern('a', idx, t, alabels[idx]) for idx, t in enumerate(atokens) ]
+            bpatterns = [ gen_token_pattern('b', idx, t, blabels[idx]) for idx, t in enumerate(btokens) ]
+            if any([a == None for a in apatterns]) or any([b == None for b in bpatterns]):
+                continue
+            key = repr((apatterns, bpatterns))
+            if key in seen:
+                continue
+            seen.add(key)
+            options.append((self._pattern_concreteness(apatterns + bpatterns), apatterns, bpatterns))
+        return sorted(options, key=lambda o: o[0])
+
+    def _iter_pattern_list(self, inspect_index: OpcodeMeta, ops: List[OpcodeMeta], 
+        adoc: Doc, bdoc: Doc, rewrite_type: str, 
+        matched_op_token_idxes: List[MatchedTokenMeta], 
+        deadline: float=None) -> Iterator[Tuple[int, PatternMeta]]:
+        """Lazily generate the rule patterns given the phrases being inspected, from the most 
+        general to the most concrete. The patterns are built segment by segment with a 
+        best-first search, and a partial pattern is pruned as soon as its matched tokens 
+        (see ``_detect_rewrite_type``) use different linguistic labels, so the inconsistent
+        combinations of the later segments are never expanded.
+        
+        Arguments:
+            inspect_index {OpcodeMeta} -- Pair of inspect idxes
+            ops {List[OpcodeMeta]} -- rewriteing ops [(op=str, fromIdxes=int[], toIdxes=int[])]
+            adoc {Doc} -- The original doc for rewriteing
+            bdoc {Doc} -- The rewritten-to doc.
+            rewrite_type {str} -- Editing type.
+            matched_op_token_idxes {List[MatchedTokenMeta]} -- For inner restructing; which op match with which? What's the matched token
+            deadline {float} -- Stop the search after this timestamp (``time.time()``), even if no 
+                pattern is completed. If None, no limit. (default: {None})
+
+        Returns:
+            Iterator[Tuple[int, PatternMeta]] -- (concreteness score, rule pattern), with non-decreasing scores.
+        """
+        # compute the segments: unchanged tokens and ops, alternately.
+        segments = []
+        a_prev_idx, b_prev_idx = inspect_index.fromIdxes[0], inspect_index.toIdxes[0]
+        for op in ops:
+            segments.append((REWRITE_TYPE_DICT['unchange'], 
+                list(adoc[a_prev_idx:op.fromIdxes[0]]), list(bdoc[b_prev_idx:op.toIdxes[0]])))
+            segments.append((REWRITE_TYPE_DICT[rewrite_type], 
+                list(adoc[op.fromIdxes[0]:op.fromIdxes[1]]), list(bdoc[op.toIdxes[0]:op.toIdxes[1]])))
+            a_prev_idx, b_prev_idx = op.fromIdxes[1], op.toIdxes[1]
+        segments.append((REWRITE_TYPE_DICT['unchange'], 
+            list(adoc[a_prev_idx:inspect_index.fromIdxes[1]]), list(bdoc[b_prev_idx:inspect_index.toIdxes[1]])))
+        segment_options = [ self._gen_segment_options(*segment, deadline=deadline) for segment in segments ]
+        if any([ not options for options in segment_options ]):
+            return
+        # convert local idxes of the matched tokens to global idxes *in the pattern*
+        matched_pairs = []
+        for matched in matched_op_token_idxes:
+            matched_pairs += [ (
+                ops[matched.ops_idxes[0]].fromIdxes[0] + t_idxes[0] - inspect_index.fromIdxes[0],
+                ops[matched.ops_idxes[1]].toIdxes[0] + t_idxes[1]  - inspect_index.toIdxes[0]
+            ) for t_idxes in matched.tokens_idxes ]
+        def is_consistent(before: List[Dict[str, str]], after: List[Dict[str, str]], 
+            prev_before_len: int, prev_after_len: int) -> bool:
+            # only check the matched pairs that are completed by the last segment
+            for before_idx, after_idx in matched_pairs:
+                if before_idx >= len(before) or after_idx >= len(after):
+                    continue
+                if before_idx < prev_before_len and after_idx < prev_after_len:
+                    continue
+                if set(before[before_idx].keys()) != set(after[after_idx].keys()):
+                    return False
+            return True
+        # best-first search: the scores only increase, so the complete 
+        # patterns are popped from the most general to the most concrete.
+        counter = itertools.count()
+        heap = [ (0, next(counter), 0, [], []) ]
+        while heap:
+            if deadline is not None and time.time() > deadline:
+                return
+            score, _, seg_idx, before, after = heapq.heappop(heap)
+            if seg_idx == len(segments):
+                yield score, PatternMeta(
+                    before=[ dict(p) for p in before ], 
+                    after=[ dict(p) for p in after ])
+                continue
+            for option_score, apatterns, bpatterns in segment_options[seg_idx]:
+                before_new, after_new = before + apatterns, after + bpatterns
+                if not is_consistent(before_new, after_new, len(before), len(after)):
+                    continue
+                heapq.heappush(heap, (score + option_score, next(counter), seg_idx + 1, before_new, after_new))
+
     def _gen_pattern_list(self, inspect_index: OpcodeMeta, ops: List[OpcodeMeta], 
         adoc: Doc, bdoc: Doc, rewrite_type: str, matched_op_token_idxes: List[MatchedTokenMeta]) -> List[PatternMeta]:
         """Generate a list of patterns given the phrases being inspected
@@ -201,69 +378,10 @@ class SemanticRuleDetector(object):
             matched_op_token_idxes {List[MatchedTokenMeta]} -- For inner restructing; which op match with which? What's the matched token
 
         Returns:
-            List[PatternMeta] -- A list of rule patterns
+            List[PatternMeta] -- A list of rule patterns, from the most general to the most concrete
         """
-        def gen_label_sequence(caregory_meta: RewriteTypeMeta, length: int) -> List[List[str]]: 
-            # get all the possible linguistic feature label combinations for a given length
-            # if too many tokens in a given sequence, then just remove the combinations. 
-            if caregory_meta.allow_product and length <= self.max_token_count:
-                return list(itertools.product(caregory_meta.labels, repeat=length))
-            else:
-                return [[label] * length for label in caregory_meta.labels]
-        def extend_pattern_sequence(caregory_meta: RewriteTypeMeta, rule_patterns: List[PatternMeta], 
-            atokens: List[Token], btokens: List[Token]) -> List[PatternMeta]:
-            # get the existing rule patterns by including additional phrases
-            rule_patterns_new = []
-            # get label sequences for newly added tokens
-            alabels_arr = gen_label_sequence(caregory_meta, len(atokens))
-            blabels_arr = gen_label_sequence(caregory_meta, len(btokens))
-            # create the label pairs based on if production is allowed
-            if caregory_meta.allow_product and len(atokens) <= self.max_token_count and len(btokens) <= self.max_token_count:
-                labels = [(alabels, blabels) for alabels, blabels in itertools.product(alabels_arr, blabels_arr)]
-            else:
-                labels = zip(alabels_arr, blabels_arr)
-            for rule_pattern in rule_patterns:
-                for alabels, blabels in labels:
-                    apatterns = [ self._gen_token_pattern(token=t, label=alabels[idx]) for idx, t in enumerate(atokens) ]
-                    bpatterns = [ self._gen_token_pattern(token=t, label=blabels[idx]) for idx, t in enumerate(btokens) ]
-                    if any([a == None for a in apatterns]) or any([b == None for b in bpatterns]):
-                        continue
-                    rule_patterns_new.append(PatternMeta(
-                        before=rule_pattern.before + apatterns,
-                        after=rule_pattern.after + bpatterns
-                    ))
-            return rule_patterns_new
-        # compute the base.
-        a_prev_idx, b_prev_idx = inspect_index.fromIdxes[0], inspect_index.toIdxes[0]
-        rule_patterns = [ PatternMeta(before=[], after=[]) ]
-        # extend the patterns
-        for op in ops: # extend patterns
-            rule_patterns = extend_pattern_sequence(caregory_meta=REWRITE_TYPE_DICT['unchange'], rule_patterns=rule_patterns, 
-                atokens=list(adoc[a_prev_idx:op.fromIdxes[0]]), btokens=list(bdoc[b_prev_idx:op.toIdxes[0]]))
-            rule_patterns = extend_pattern_sequence(caregory_meta=REWRITE_TYPE_DICT[rewrite_type], rule_patterns=rule_patterns, 
-                atokens=list(adoc[op.fromIdxes[0]:op.fromIdxes[1]]), btokens=list(bdoc[op.toIdxes[0]:op.toIdxes[1]]))
-            a_prev_idx, b_prev_idx = op.fromIdxes[1], op.toIdxes[1]
-        rule_patterns = extend_pattern_sequence(caregory_meta=REWRITE_TYPE_DICT['unchange'], rule_patterns=rule_patterns, 
-            atokens=list(adoc[a_prev_idx:inspect_index.fromIdxes[1]]), btokens=list(bdoc[b_prev_idx:inspect_index.toIdxes[1]]))
-        #### This part starts filtering. Some patterns will be fitlered before reaching the next step.
-        rule_patterns_to_keep = [True for _ in rule_patterns]
-        for idx, rule_pattern in enumerate(rule_patterns): # for each rule
-            if not rule_patterns_to_keep[idx]: # already know it's a removed rule
-                continue
-            # second, if there are some matches
-            for matched in matched_op_token_idxes: # for each matched place
-                # convert local idxes to global idxes *in the pattern*
-                before_token_idxes = [ops[matched.ops_idxes[0]].fromIdxes[0] + t_idxes[0] - inspect_index.fromIdxes[0] for t_idxes in matched.tokens_idxes]
-                after_token_idxes = [ops[matched.ops_idxes[1]].toIdxes[0] + t_idxes[1]  - inspect_index.toIdxes[0] for t_idxes in matched.tokens_idxes]
-                # if any of these matched tokens have strange matches
-                if any ([ # if for the matched tokens, the used linguistic label do not match
-                    len(set(rule_pattern.before[before_idx].keys()) - set(rule_pattern.after[after_idx].keys()) | 
-                    set(rule_pattern.after[after_idx].keys()) - set(rule_pattern.before[before_idx].keys())) != 0
-                    for before_idx, after_idx in zip(before_token_idxes, after_token_idxes)]):
-                    rule_patterns_to_keep[idx] = False
-                    break # already know this is not going to be included, so just break to increase spead
-        rule_patterns = [r for idx, r in enumerate(rule_patterns) if rule_patterns_to_keep[idx]]
-        return rule_patterns
+        return [ pattern for _, pattern in self._iter_pattern_list(
+            inspect_index, ops, adoc, bdoc, rewrite_type, matched_op_token_idxes) ]
     
     def _extract_phrase_tag(self, doc: Doc, idxes: List[int], label: str = 'pos', merge_into_one: bool=True) -> List[str]:
         """extract some phrase tag.
@@ -373,12 +491,17 @@ class SemanticRuleDetector(object):
             print(matched_op_token_idxes)
         return rewrite_type, matched_op_token_idxes
 
-    def detect_rules_per_pair(self, adoc: Doc, bdoc: Doc, target_cmd: str) -> None:
-        """Detect rules and templates for each pair of queries.
+    def detect_rules_per_pair(self, adoc: Doc, bdoc: Doc, target_cmd: str, 
+        max_candidates: int=None, deadline: float=None) -> None:
+        """Detect rules and templates for each pair of queries. The candidate patterns
+        of all the inspect ranges are generated lazily, from the most general to the
+        most concrete, until either budget runs out.
         
         Arguments:
             aquery {Query} -- The original query for rewriteing
             bquery {Query} -- The rewritten-to query.
+            max_candidates {int} -- The max number of new rules to generate. If None, no limit. (default: {None})
+            deadline {float} -- Stop generating after this timestamp (``time.time()``). If None, no limit. (default: {None})
         
         Returns:
             None -- No return.
@@ -438,28 +561,44 @@ class SemanticRuleDetector(object):
                 inspect_indexes.append(OpcodeMeta(op='replace', fromIdxes=[from_start-2, from_end], toIdxes=[to_start-2, to_end]))
             elif from_end < len(adoc)-1 and to_end < len(bdoc)-1:
                 inspect_indexes.append(OpcodeMeta(op='replace', fromIdxes=[from_start, from_end+2], toIdxes=[to_start, to_end+2]))
-        for inspect_index in inspect_indexes: # [::-1] start from the longest one
-            # generate pattern
-            rule_patterns = self._gen_pattern_list(
-                inspect_index, ops, adoc, bdoc, rewrite_type, matched_op_token_idxes)
-            for rule_pattern in rule_patterns: # for each rule
-                # first, if the RHS had less information than LHS, delete.
-                # TODO: Not sure if this is useful...
-                # skip the structural part
-                #if not check_pos(rule_pattern.before, rule_pattern.after):
-                #    continue
-                rule = SemanticRule(pattern=rule_pattern, target_cmd=target_cmd)
-                self.rules[rule.rid] = rule
+        # merge the candidates of all the inspect ranges, from the most general one.
+        candidates = heapq.merge(*[ self._iter_pattern_list(
+            inspect_index, ops, adoc, bdoc, rewrite_type, matched_op_token_idxes, deadline=deadline) 
+            for inspect_index in inspect_indexes ], key=lambda c: c[0])
+        n_candidates = 0
+        for _, rule_pattern in candidates: # for each rule
+            if max_candidates is not None and n_candidates >= max_candidates:
+                break
+            if deadline is not None and time.time() > deadline:
+                break
+            # first, if the RHS had less information than LHS, delete.
+            # TODO: Not sure if this is useful...
+            # skip the structural part
+            #if not check_pos(rule_pattern.before, rule_pattern.after):
+            #    continue
+            rule = SemanticRule(pattern=rule_pattern, target_cmd=target_cmd)
+            if rule.rid in self.rules:
+                continue
+            self.rules[rule.rid] = rule
+            n_candidates += 1
 
     def detect_rule_wrapper(self, 
         adoc, bdoc, 
         instances: List['Instance'],
         target_cmd: str='question',
-        sample_size: int=50) -> int:
+        sample_size: int=50,
+        max_candidates: int=200,
+        top_k: int=5,
+        time_budget: float=None) -> int:
         """The wrapper function for extracting rules.
         
         Arguments:
             queries {List[Query]} -- A list of queries that are paraphrases of each other.
+            max_candidates {int} -- The max number of candidate rules to validate. (default: {200})
+            top_k {int} -- The number of best rules to keep. (default: {5})
+            time_budget {float} -- The time budget in seconds. Half of it is used for 
+                generating the candidates, and the rest for validating them on the samples.
+                If None, no limit. (default: {None})
         
         Returns:
             int -- Number of query pairs generated based on the input query.
@@ -469,13 +608,17 @@ class SemanticRuleDetector(object):
         #if IS_DEBUGGING:
         #    self._print_queries(ops, aquery, bquery)
         try:
-            print(adoc, bdoc)
-            self.detect_rules_per_pair(adoc, bdoc, target_cmd)
+            start = time.time()
+            self.detect_rules_per_pair(adoc, bdoc, target_cmd, 
+                max_candidates=max_candidates, 
+                deadline=start + time_budget / 2 if time_budget else None)
             if len(instances) <= sample_size:
                 samples = instances
             else:
                 samples = random.sample(instances, sample_size)
-            rules = SemanticRule.filter_rules_via_sample_augment(self.rules, samples)
+            rules = SemanticRule.filter_rules_via_sample_augment(
+                self.rules, samples, keep_top_n=top_k,
+                deadline=start + time_budget if time_budget else None)
             return rules
         except:
-            raise
\ No newline at end of file
+            raise
@@ -17,6 +17,7 @@ from errudite.server.converter import \
     BoolConverter, InstanceKeyConverter, InstanceKeyListConverter
 from errudite.server.api import API, APIQA, APIVQA
 from errudite.rewrites import Rewrite
+from errudite.predictors import Predictor
 from errudite.builts import Attribute, Group
 from errudite.targets.interfaces import InstanceKey
 from errudite.targets.instance import Instance
@@ -57,6 +58,9 @@ try:
     with open(args.config_file) as f:
         configs = yaml.safe_load(f)
     logger.info(configs)
+    # the prediction cache is opt-in.
+    if configs.get("prediction_cache_size", None):
+        Predictor.prediction_cache.set_max_size(configs["prediction_cache_size"])
     # construct the API
     API_CONSTRUCTOR =  API.by_name(configs["task"])
     api = API_CONSTRUCTOR(
@@ -96,6 +100,18 @@ def get_task(api: API=api):
     finally:
         return wrap_output(output, msg)
 
+@app.route('/api/get_annotation_cache_stats')
+def get_annotation_cache_stats(api: API=api):
+    output, msg = None, None
+    try:
+        output = api.get_annotation_cache_stats()
+    except Exception as e:
+        msg = f'{e}'
+        logger.error(e)
+        traceback.print_exc()
+    finally:
+        return wrap_output(output, msg)
+
 @app.route('/api/get_img/<img_id>')
 def get_img(img_id: str, api: API=api):
     """Get the image"""
@@ -423,6 +439,27 @@ def get_err_overlap(show_filtered_err_overlap: bool, api: API=api):
     finally:
         return wrap_output(output, msg)
 
+@app.route('/api/get_model_overlaps')
+@app.route('/api/get_model_overlaps/<str_list:models>')
+@app.route('/api/get_model_overlaps/<str_list:models>/<str_list:group_names>')
+@app.route('/api/get_model_overlaps/<str_list:models>/<str_list:group_names>/<str:filter_cmd>')
+@app.route('/api/get_model_overlaps/<str_list:models>/<str_list:group_names>/<str:filter_cmd>/<bool:with_intervals>')
+def get_model_overlaps(
+    models: List[str]=None, 
+    group_names: List[str]=None, 
+    filter_cmd: str=None, 
+    with_intervals: bool=False,
+    api: API=api):
+    output, msg = None, None
+    try:
+        output = api.get_model_overlaps(models, group_names, filter_cmd, with_intervals)
+    except Exception as e:
+        msg = e
+        logger.error(e)
+        traceback.print_exc()
+    finally:
+        return wrap_output(output, msg)
+
 ### Run detections
 @app.route('/api/detect_build_blocks/<str:target>/<str:qid>/<int:vid>/<int:start_idx>/<int:end_idx>')
 def detect_build_blocks(target: str, qid: str, vid: int, start_idx: int, end_idx: int, api: API=api):
@@ -477,11 +514,26 @@ def rewrite_group_instances(rid: str, gname: str, sample_size: int, API=api):
 @app.route('/api/rewrite_instances_by_rid/<str:rid>/<str_list:qids>')
 @app.route('/api/rewrite_instances_by_rid/<str:rid>/<str_list:qids>/<int:sample_size>')
 @app.route('/api/rewrite_instances_by_rid/<str:rid>/<str_list:qids>/<int:sample_size>/<bool:save>')
+@app.route('/api/rewrite_instances_by_rid/<str:rid>/<str_list:qids>/<int:sample_size>/<bool:save>/<int:max_variants>')
 def rewrite_instances_by_rid(
-    rid: str, qids: List[str]=None, sample_size: int=10, save: bool=False, api: API=api):
+    rid: str, qids: List[str]=None, sample_size: int=10, save: bool=False, 
+    max_variants: int=3, api: API=api):
+    output, msg = None, None
+    try:
+        output = api.rewrite_instances_by_rid(rid, qids, sample_size, save, max_variants)
+    except Exception as e:
+        msg = e
+        logger.error(e)
+        traceback.print_exc()
+    finally:
+        return wrap_output(output, msg)
+
+@app.route('/api/estimate_rewrite_coverage/<str_list:rids>')
+@app.route('/api/estimate_rewrite_coverage/<str_list:rids>/<int:sample_size>')
+def estimate_rewrite_coverage(rids: List[str], sample_size: int=10, api: API=api):
     output, msg = None, None
     try:
-        output = api.rewrite_instances_by_rid(rid, qids, sample_size, save)
+        output = api.estimate_rewrite_coverage(rids, sample_size)
     except Exception as e:
         msg = e
         logger.error(e)
@@ -504,6 +556,21 @@ def formalize_rewritten_examples(rid: str, api: API=api):
     finally:
         return wrap_output(output, msg)
 
+@app.route('/api/rewrite_and_formalize/<str:rid>')
+@app.route('/api/rewrite_and_formalize/<str:rid>/<str_list:qids>')
+@app.route('/api/rewrite_and_formalize/<str:rid>/<str_list:qids>/<int:max_variants>')
+def rewrite_and_formalize(rid: str, qids: List[str]=None, max_variants: int=1, api: API=api):
+    output, msg = None, None
+    try:
+        api.rewrite_and_formalize(rid, qids, max_variants=max_variants)
+        output = Rewrite.get(rid).serialize()
+    except Exception as e:
+        msg = e
+        logger.error(e)
+        traceback.print_exc()
+    finally:
+        return wrap_output(output, msg)
+
 
 @app.route('/api/predict_on_manual_rewrite/<str:qtext>/<str_list:groundtruths>/<str:ctext>')
 def predict_on_manual_rewrite(qtext: str, groundtruths: List[str], ctext: str, api: API=api):
@@ -567,4 +634,17 @@ def delete_selected_rules(rids: List[str], api: API=api):
     finally:
         return wrap_output(output, msg)
 
+@app.route('/api/add_model_predictions/<str:model>')
+@app.route('/api/add_model_predictions/<str:model>/<bool:set_as_anchor>')
+def add_model_predictions(model: str, set_as_anchor: bool=False, api: API=api):
+    output, msg = None, None
+    try:
+        output = api.add_model_predictions(model, set_as_anchor=set_as_anchor)
+    except Exception as e:
+        msg = e
+        logger.error(e)
+        traceback.print_exc()
+    finally:
+        return wrap_output(output, msg)
+
 app.run(debug=False)
\ No newline at end of file
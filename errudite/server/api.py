@@ -7,14 +7,16 @@ from collections import Counter
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
 from collections import defaultdict
-from typing import List, Dict
+from typing import List, Dict, Callable
 from ..targets.interfaces import InstanceKey
 from ..utils import Registrable, Store, ConfigurationError, convert_list, set_cache_folder
 from ..io import DatasetReader
 from ..targets.instance import Instance
 from ..targets.label import Label
 from ..predictors.predictor import Predictor
-from ..builts import BuiltBlock, Attribute, Group
+from ..predictors.predictor_service import PredictorService
+from ..add_model import predict_instances
+from ..builts import BuiltBlock, Attribute, Group, ErrorOverlap
 from ..build_blocks.build_block_detector import BuildBlockDetector
 from ..build_blocks.prim_funcs import perform, truncate
 
@@ -25,7 +27,13 @@ from ..targets.qa import QAAnswer, Question, Context
 from ..targets.vqa import VQAAnswer, VQAQuestion
 from ..processor import spacy_annotator
 
-
+# seconds; keep "infer rule from my edit" interactive.
+DETECT_RULE_TIME_BUDGET = 2.0
+# the predictor services collect up to MICRO_BATCH_SIZE requests, or wait
+# MICRO_BATCH_WAIT_MS after the first one, before running a batch.
+MICRO_BATCH_SIZE = 32
+MICRO_BATCH_WAIT_MS = 10
+MICRO_BATCH_WORKERS = 1
 
 class API(Registrable):
     def __init__(self, 
@@ -39,6 +47,8 @@ class API(Registrable):
         self.task = task
         # save the last rewritten instances so they can be retrieved and really saved..
         self.prev_tried_rewrite_examples = {}
+        # { model: the micro-batching service }, started on demand by ``get_predictor_service``.
+        self.predictor_services: Dict[str, PredictorService] = {}
         # instances
         try:
             logger.info(f'{self.task}: Finding cache folder and loading instances...')
@@ -56,6 +66,7 @@ class API(Registrable):
             self.load_groups(group_file_name)
             logger.info('Loading the rewrite rules...')
             self.load_rewrites(rewrite_file_name)
+            self.load_rewritten_instances()
             logger.info('Init sample cache...')
             self.sample_cache_idx = -1
             self.sampled_instances = []
@@ -125,6 +136,17 @@ class API(Registrable):
             pass
             #self.rewrite_instances_by_rid(rewrite.rid, None, sample_size=100, save=True)
     
+    def load_rewritten_instances(self):
+        """Attach the rewritten instances saved in ``Instance.rewritten_store`` 
+        to their rewrite rules, so they are not rewritten and predicted again. 
+        The instances themselves are loaded when they are queried."""
+        if Instance.rewritten_store is None:
+            return
+        for key, rid in Instance.rewritten_store.keys():
+            if not Rewrite.exists(rid):
+                Rewrite.save(Rewrite(rid, "manual", ""))
+            Rewrite.get(rid).add_instance(key)
+    
     def set_anchor_predictor(self, model: str, is_global_update: bool=True) -> str:
         """Only taking 1e-5s"""
         model = Instance.resolve_default_model(model)
@@ -164,10 +186,14 @@ class API(Registrable):
         if switched not in [ 'model', 'rewrite' ]:
             logger.warn(f"The switch type does not exist: {switched}. Skip the rest.")
             return
+        switched_names = self._recompute_built_blocks(lambda b: b.should_recompute(switched))
+        logger.info(f"Recomputed attrs: {switched_names}.")
+    
+    def _recompute_built_blocks(self, should_recompute: Callable[[BuiltBlock], bool]) -> List[str]:
         # if we have attrs
         switched_names = []
         for attr in Attribute.values():
-            if attr.should_recompute(switched):
+            if should_recompute(attr):
                 switched_names.append(attr.name)
                 Attribute.create(
                     name=attr.name, description=attr.description,
@@ -176,7 +202,7 @@ class API(Registrable):
                     attr_hash=Attribute.store_hash(),
                     save=True, force_recompute=True)
         for group in Group.values():
-            if group.should_recompute(switched):
+            if should_recompute(group):
                 switched_names.append(group.name)
                 Group.create(
                     name=group.name, description=group.description, 
@@ -184,8 +210,114 @@ class API(Registrable):
                     group_hash=Group.store_hash(),
                     attr_hash=Attribute.store_hash(),
                     save=True, force_recompute=True)
-        logger.info(f"Recomputed attrs: {switched_names}.")
+        return switched_names
     
+    def add_model_predictions(self, 
+        model: str, 
+        model_meta: dict=None, 
+        file_path: str=None,
+        set_as_anchor: bool=False) -> Dict[str, any]:
+        """Hot-add the predictions of a new model to the running session, 
+        without reloading the dataset. The predictions are read from 
+        ``evaluations/[model].pkl`` (e.g., written by ``python -m errudite.add_model``), 
+        and only the model-dependent caches are updated. The attributes and groups 
+        that refer to the model (or to the "ANCHOR" model, if it's set as the anchor) 
+        are recomputed; all the others are untouched. ``Rewrite.flip_stats`` is reset,
+        so the flips of the new model are counted.
+
+        The prediction file only covers the original instances. If the predictor 
+        can run (i.e., ``model_meta`` is given, or the loaded predictor has a model), 
+        it's also run on the saved rewritten instances. Otherwise, the rewritten 
+        instances do not have predictions from the new model, and its flips
+        are not counted (see ``FlipStats``).
+        
+        Parameters
+        ----------
+        model : str
+            The model name.
+        model_meta : dict, optional
+            The meta to create the predictor, by default None. 
+            See ``Predictor.create_from_json``. If None, a task predictor with no 
+            model is created, so the predictions can still be analyzed.
+        file_path : str, optional
+            The prediction file, by default None (``evaluations/[model].pkl``).
+        set_as_anchor : bool, optional
+            Whether to switch the anchor model to the new one, by default False.
+        
+        Returns
+        -------
+        Dict[str, any]
+            ``{ model, predictions, rewritten_predictions, predictors, recomputed, anchor_predictor, compare_predictor }``
+        """
+        try:
+            size = self.dr.add_model_predictions(model, file_path)
+            if model_meta:
+                predictor = Predictor.create_from_json(dict(model_meta, name=model))
+            elif model in self.predictors:
+                predictor = self.predictors[model]
+            else:
+                # no runnable model: only the saved predictions are compared.
+                predictor = Predictor.by_name(f'{self.task}_task_class')(
+                    name=model, description='', model=None)
+            predictor.evaluate_performance(list(Instance.instance_hash.values()))
+            self._replace_predictor(model, predictor)
+            rewritten_size = self._predict_rewritten_instances(predictor)
+            Rewrite.flip_stats.reset()
+            recomputed = self._recompute_built_blocks(lambda b: b.depends_on_model(model))
+            if set_as_anchor and model != self.get_anchor_predictor():
+                self.set_anchor_predictor(model)
+            else:
+                self.set_compare_predictor(self.compare_predictor)
+            logger.info(f"Recomputed attrs: {recomputed}.")
+            return {
+                'model': model,
+                'predictions': size,
+                'rewritten_predictions': rewritten_size,
+                'predictors': [ p.serialize() for p in self.predictors.values() ],
+                'recomputed': recomputed,
+                'anchor_predictor': self.get_anchor_predictor(),
+                'compare_predictor': self.get_compare_predictor()
+            }
+        except:
+            raise
+
+    def _predict_rewritten_instances(self, predictor: Predictor) -> int:
+        # the rewritten instances are only predicted when the rules are applied,
+        # so a model added afterwards has to be run on them here.
+        if predictor.predictor is None:
+            logger.warn(f"[ {predictor.name} ]: no runnable model. " + 
+                "The rewritten instances do not have its predictions.")
+            return 0
+        store = Instance.rewritten_store
+        keys = [ key for key, i in Instance.instance_hash_rewritten.items() if i is not None ]
+        if store is not None:
+            # the stored instances are only loaded one batch at a time.
+            loaded = set(keys)
+            keys += [ key for key, _ in store.keys() if key not in loaded ]
+        size, total, batch_size = 0, 0, 256
+        for start in range(0, len(keys), batch_size):
+            instances = [ Instance.instance_hash_rewritten.get(key) or store.get(key) \
+                for key in keys[start:start+batch_size] ]
+            instances = [ i for i in instances if i is not None ]
+            total += len(instances)
+            predictions = predict_instances(predictor, instances, f'{self.task}_task_class', batch_size)
+            for instance, prediction in zip(instances, predictions):
+                old_preds = instance.get_entry('predictions') or []
+                preds = [ p for p in old_preds if p.model != predictor.name ]
+                if prediction is None and len(preds) == len(old_preds):
+                    continue
+                if prediction is not None:
+                    preds.append(prediction)
+                    size += 1
+                instance.set_entries(predictions=preds)
+                # only the changed instances are written again.
+                if store is not None:
+                    store.append(instance)
+        if store is not None:
+            store.flush()
+        logger.info(f"Predicted {size}/{total} rewritten instances with [ {predictor.name} ].")
+        return size
+
     def _get_filterered_instances(self, 
         filter_cmd: str, 
         sample_rewrite: str=None,
@@ -238,7 +370,10 @@ class API(Registrable):
         if built_type == 'attr':
             return Attribute.remove_saved(name)
         elif built_type == 'rewrite':
-            return Rewrite.remove_saved(name)
+            removed = Rewrite.remove_saved(name)
+            if Instance.rewritten_store is not None:
+                Instance.rewritten_store.flush()
+            return removed
         elif built_type == 'group':
             return Group.remove_saved(name)
         return False
@@ -369,6 +504,36 @@ class API(Registrable):
             models=[self.get_anchor_predictor(), self.get_compare_predictor()], 
             filtered_instances=self.sampled_instances if show_filtered_err_overlap else None)
 
+    def get_model_overlaps(self, 
+        models: List[str]=None, 
+        group_names: List[str]=None, 
+        filter_cmd: str=None,
+        with_intervals: bool=False) -> Dict:
+        """Compare K models at once: the 2^K correctness patterns, the pairwise 
+        error overlaps and regressions, and the metric deltas between every two 
+        models, on all the instances, each group and (optionally) a filter.
+        
+        Arguments:
+            models {List[str]} -- the models, by default all the predictors.
+            group_names {List[str]} -- the groups, by default all the saved groups.
+            filter_cmd {str} -- an additional filter, by default None.
+            with_intervals {bool} -- add the 95% intervals of the error rates 
+                and the metric deltas, by default False.
+        
+        Returns:
+            Dict -- the output of ``ErrorOverlap.evaluate``.
+        """
+        models = models or list(self.predictors.keys())
+        group_names = group_names or list(Group.keys())
+        groups = { 'all': None }
+        for name in group_names:
+            if not Group.exists(name):
+                raise(ConfigurationError(f"[ get_model_overlaps ]: {name} does not exist."))
+            groups[name] = Group.get(name).get_instance_list()
+        if filter_cmd:
+            groups[filter_cmd] = self._get_filterered_instances(filter_cmd)
+        return ErrorOverlap(models).evaluate(groups, with_intervals=with_intervals)
+
     def get_one_attr_of_instances(self, attr_name: str, instance_keys: List[InstanceKey]) -> List[any]: 
         output = []
         if Attribute.exists(attr_name):
@@ -399,103 +564,264 @@ class API(Registrable):
         output = []
         for rewrite in Rewrite.values():
             for key in instance_keys:
-                if rewrite.retrive_instance_key(key.qid):
+                if rewrite.retrive_instance_keys(key.qid):
                     output.append(rewrite.rid)
                     break
         return output
 
     def rewrite_instances_by_rid(
         self, rid: str, qids: List[str]=None, sample_size: int=10, 
-        save: bool=False) -> List:
+        save: bool=False, max_variants: int=3) -> List:
+        """Preview (or save) the rewrites of one rule on a sample of instances.
+        One instance can be rewritten into multiple variants, and each variant 
+        is one preview.
+        
+        Arguments:
+            rid {str} -- the rewrite rule id.
+        
+        Keyword Arguments:
+            qids {List[str]} -- the qids to try. If None, try all the instances. (default: {None})
+            sample_size {int} -- the number of rewritten instances (qids) to preview. (default: {10})
+            save {bool} -- whether to officially save the rewritten instances. (default: {False})
+            max_variants {int} -- the max number of variants per instance. (default: {3})
+        
+        Returns:
+            List -- [{ 'qid', 'ori_instance', 'rewrite_instance' }], one per variant.
+        """
         try:
             if not rid in self.prev_tried_rewrite_examples: # reset the raw save
                 self.prev_tried_rewrite_examples = { rid: defaultdict(lambda: None) }
-            output = []
+            # { qid: the previews of all the variants }
+            tried = self.prev_tried_rewrite_examples[rid]
+            outputs = {}
             qids = qids or list(Instance.qid_hash.keys())
             if not Rewrite.exists(rid):
                 raise(ConfigurationError(f"[ rewrite_instances_by_rid ]: {rid} does not exist."))
             rewrite = Rewrite.get(rid)
-            for idx, qid in enumerate(qids):
-                ori_key = InstanceKey(qid=qid, vid=0)
-                if not Instance.exists(ori_key):
-                    raise(ConfigurationError(f"[ rewrite_instances_by_rid ]: {ori_key} does not exist."))
-                if qid in self.prev_tried_rewrite_examples[rid]:
-                    o = self.prev_tried_rewrite_examples[rid][qid]
-                else:
-                    ori_i = Instance.get(ori_key)
-                    rewritten_key = rewrite.retrive_instance_key(qid)
-                    if Instance.exists(rewritten_key):
-                        rewrite_i = Instance.get(rewritten_key)
-                        rewrite_i_serialized = rewrite_i.serialize()
+            bucket_size = max([sample_size, 100])
+            start = 0
+            # each round rewrites just enough qids to fill the sample, and predicts
+            # them all at once; failed ones are refilled in the next round.
+            while start < len(qids) and start <= bucket_size + 1 and len(outputs) < sample_size:
+                to_rewrite = []
+                for idx in range(start, len(qids)):
+                    start = idx + 1
+                    qid = qids[idx]
+                    ori_key = InstanceKey(qid=qid, vid=0)
+                    if not Instance.exists(ori_key):
+                        raise(ConfigurationError(f"[ rewrite_instances_by_rid ]: {ori_key} does not exist."))
+                    if qid in tried:
+                        outputs[idx] = tried[qid]
                     else:
-                        rewritten_output = rewrite.rewrite_one_instance(ori_i)
-                        if not rewritten_output:
-                            #logger.warn(f"{rewrite.rid} cannot rewrite {ori_i}.")
-                            continue
-                        q_rewrite = rewritten_output.text if rewrite.target == 'question' \
-                            else ori_i.get_entry('question').doc.text
-                        g_rewrites = [ rewritten_output.text ] if rewrite.target == 'groundtruth' else \
-                            [ g.doc.text for g in ori_i.get_entry('groundtruths') ]
-                        if self.task == 'qa':
-                            c_rewrite = rewritten_output.text \
-                                if rewrite.target == 'context' \
-                                else ori_i.get_entry('context').doc.text                        
-                        else:
-                            c_rewrite = ori_i.get_entry('question').img_id if ori_i.get_entry('question') else ''
-                        if save: # officially save it.
-                            rewrite_output = self.predict_formalize(qid, rid, q_rewrite, g_rewrites, c_rewrite)
-                            if not rewrite_output:
-                                logger.warn(f"{rewrite.rid} cannot rewrite {qid}.")
-                                continue
-                            rewritten_key = InstanceKey(qid=rewrite_output['key']['qid'], vid=rewrite_output['key']['vid'])
-                            if not rewrite_output or not Instance.exists(rewritten_key):
-                                logger.warn(f"{rewrite.rid} cannot rewrite {qid}.")
-                                continue
-                            rewrite_i = Instance.get(rewritten_key)
-                            rewrite_i_serialized = rewrite_i.serialize()
+                        ori_i = Instance.get(ori_key)
+                        rewritten_keys = [ key for key in rewrite.retrive_instance_keys(qid) if Instance.exists(key) ]
+                        if rewritten_keys:
+                            outputs[idx] = tried[qid] = [ {
+                                'qid': qid, 
+                                'ori_instance': ori_i.serialize(),
+                                'rewrite_instance': Instance.get(rewritten_key).serialize()
+                            } for rewritten_key in rewritten_keys ]
                         else:
-                            predicted = self.predict_on_manual_rewrite (q_rewrite, g_rewrites, c_rewrite)
-                            if not predicted:
-                                continue
-                            rewrite_i_serialized = {
-                                'key': { 'qid': qid },
-                                'question': q_rewrite, 
-                                'groundtruths': g_rewrites, 
-                                'context': c_rewrite, 
-                                'prediction': predicted['prediction'],
-                                'perform': predicted['perform']
-                            }
-                    o = {
-                        'qid': qid, 
+                            to_rewrite.append((idx, ori_i))
+                    if len(outputs) + len(to_rewrite) >= sample_size or idx > bucket_size:
+                        break
+                pending = [ (idx, ori_i, self._get_rewrite_inputs(rewrite, ori_i, rewritten_output))
+                    for (idx, ori_i), rewritten_outputs in zip(to_rewrite, 
+                        rewrite.rewrite_instances_variants([ ori_i for _, ori_i in to_rewrite ], max_variants))
+                    for rewritten_output in rewritten_outputs ]
+                rewrite_serialized = self._predict_rewrite_previews(
+                    rid, [ rewrite_inputs for _, _, rewrite_inputs in pending ], save)
+                for (idx, ori_i, _), rewrite_i_serialized in zip(pending, rewrite_serialized):
+                    if not rewrite_i_serialized:
+                        logger.warn(f"{rewrite.rid} cannot rewrite {ori_i.qid}.")
+                        continue
+                    if idx not in outputs:
+                        outputs[idx] = tried[ori_i.qid] = []
+                    outputs[idx].append({
+                        'qid': ori_i.qid, 
                         'ori_instance': ori_i.serialize(),
                         'rewrite_instance': rewrite_i_serialized
-                    }
-                output.append(o)
-                self.prev_tried_rewrite_examples[rid][qid] = o
-                bucket_size = max([sample_size, 100])
-                if len(output) >= sample_size or idx > bucket_size:
-                    break
-            return output[:20]
+                    })
+            return [ output for idx in sorted(outputs) for output in outputs[idx] ][:20]
         except:
             raise
 
+    def _predict_rewrite_previews(self, 
+        rid: str, rewrite_inputs: List[Dict[str, any]], save: bool) -> List[Dict]:
+        """Run the predictions of the rewrite previews in one batch.
+        
+        Arguments:
+            rid {str} -- the rewrite rule id
+            rewrite_inputs {List[Dict[str, any]]} -- the outputs of ``_get_rewrite_inputs``.
+            save {bool} -- whether to officially save the rewritten instances.
+        
+        Returns:
+            List[Dict] -- the serialized rewritten instances, aligned with the inputs. 
+                None if the prediction failed.
+        """
+        if not rewrite_inputs:
+            return []
+        if save: # officially save it.
+            output = []
+            for rewrite_output in self.predict_formalize_batch(rid, rewrite_inputs):
+                rewritten_key = InstanceKey(qid=rewrite_output['key']['qid'], vid=rewrite_output['key']['vid']) \
+                    if rewrite_output else None
+                output.append(Instance.get(rewritten_key).serialize() \
+                    if rewritten_key and Instance.exists(rewritten_key) else None)
+            return output
+        predicted_list = self.predict_on_manual_rewrite_batch(rewrite_inputs)
+        return [ {
+            'key': { 'qid': r['qid'] },
+            'question': r['q_rewrite'], 
+            'groundtruths': r['groundtruths'], 
+            'context': r['c_rewrite'], 
+            'prediction': predicted['prediction'],
+            'perform': predicted['perform']
+        } if predicted else None for r, predicted in zip(rewrite_inputs, predicted_list) ]
+
+    def estimate_rewrite_coverage(self, 
+        rids: List[str], sample_size: int=10) -> List[Dict]:
+        """Estimate how many instances each rewrite rule would touch, from the
+        posting lists in ``Instance.token_index``. No rewrite or prediction is run.
+        
+        Arguments:
+            rids {List[str]} -- The rewrite rule ids.
+            sample_size {int} -- The number of sampled qids to return per rule. (default: {10})
+        
+        Returns:
+            List[Dict] -- One dict per rule, sorted by the coverage:
+                { 'rid': str, 'count': int, 'coverage': float, 
+                  'is_exact': bool, 'sample_qids': List[str] }.
+                ``count`` is None if the rule cannot be estimated with the index.
+        """
+        output = []
+        token_index = Instance.token_index
+        total_size = len(token_index.rows)
+        for rid in rids:
+            if not Rewrite.exists(rid):
+                raise(ConfigurationError(f"[ estimate_rewrite_coverage ]: {rid} does not exist."))
+            rewrite = Rewrite.get(rid)
+            rows, is_exact = token_index.estimate(rewrite.target, rewrite.get_match_pattern())
+            if rows is None:
+                output.append({ 'rid': rid, 'count': None, 'coverage': None, 
+                    'is_exact': False, 'sample_qids': [] })
+                continue
+            # a sub-target (e.g. one sentence) is only part of the indexed entry.
+            is_exact = is_exact and rewrite.target_cmd == rewrite.target and \
+                rewrite.__class__.__name__ != 'ReplaceStr'
+            sampled = rows if len(rows) <= sample_size else np.random.choice(rows, sample_size, replace=False)
+            output.append({
+                'rid': rid,
+                'count': int(len(rows)),
+                'coverage': len(rows) / total_size if total_size else 0,
+                'is_exact': bool(is_exact),
+                'sample_qids': [ key.qid for key in token_index.get_keys(sorted(sampled)) ]
+            })
+        return sorted(output, key=lambda o: -1 if o['count'] is None else o['count'], reverse=True)
+
     def formalize_prev_tried_rewrites(self, rid: str):
         if rid not in self.prev_tried_rewrite_examples or not Rewrite.exists(rid):
             logger.warn(f"{rid} does not exist.")
             return
         rewrite = Rewrite.get(rid)
-        for p in self.prev_tried_rewrite_examples[rid].values():
-            e = p['rewrite_instance']
-            qid, q_rewrite, g_rewrites = p['qid'], e['question'], e['groundtruths']
-            c_rewrite = e['context'] if 'context' in e else None
-            rewritten_key = rewrite.retrive_instance_key(qid)
-            if rewritten_key and Instance.exists(rewritten_key):
-                logger.warn(f"{rewritten_key} already exist.")
+        rewrite_inputs = []
+        for qid, previews in self.prev_tried_rewrite_examples[rid].items():
+            rewritten_keys = [ key for key in rewrite.retrive_instance_keys(qid) if Instance.exists(key) ]
+            if rewritten_keys:
+                logger.warn(f"{rewritten_keys} already exist.")
                 continue
-            self.predict_formalize(qid, rid, q_rewrite, g_rewrites, c_rewrite)
+            for p in previews:
+                e = p['rewrite_instance']
+                q_rewrite, g_rewrites = e['question'], e['groundtruths']
+                c_rewrite = e['context'] if 'context' in e else None
+                rewrite_inputs.append({ 
+                    'qid': qid, 'q_rewrite': q_rewrite, 
+                    'groundtruths': g_rewrites, 'c_rewrite': c_rewrite })
+        self.predict_formalize_batch(rid, rewrite_inputs)
         self.prev_tried_rewrite_examples = {} # reset
         return True #self.evaluate_rewrites_on_groups(rid, list(self.group_hash.keys()))
 
+    def rewrite_and_formalize(self, 
+        rid: str, qids: List[str]=None, batch_size: int=1000, max_variants: int=1) -> List[InstanceKey]:
+        """Rewrite all the instances with one rule, run all the predictors 
+        on the rewritten instances, and save them. This is the batched 
+        version of ``rewrite_instances_by_rid(..., save=True)``: the rule is 
+        applied to ``batch_size`` instances at a time, the rewritten texts 
+        are annotated with one ``nlp.pipe`` pass, and each predictor runs
+        on the whole batch. With ``max_variants > 1``, one instance can be 
+        rewritten into multiple variants (e.g., one per synonym), all saved 
+        under the same rid with their own vids, and the variants of all the 
+        instances in the batch are annotated and predicted together.
+        
+        Arguments:
+            rid {str} -- the rewrite rule id.
+        
+        Keyword Arguments:
+            qids {List[str]} -- the qids of instances to rewrite. If None, rewrite 
+                all the instances. (default: {None})
+            batch_size {int} -- the number of instances processed together. Capped 
+                by the annotation cache size, so the pre-annotated docs are 
+                not evicted before being used. (default: {1000})
+            max_variants {int} -- the max number of rewritten variants per instance.
+                If None, keep all the variants. (default: {1})
+        
+        Returns:
+            List[InstanceKey] -- the keys of the saved rewritten instances.
+        """
+        try:
+            if not Rewrite.exists(rid):
+                raise(ConfigurationError(f"[ rewrite_and_formalize ]: {rid} does not exist."))
+            rewrite = Rewrite.get(rid)
+            qids = qids or list(Instance.qid_hash.keys())
+            ori_instances = []
+            for qid in qids:
+                ori_key = InstanceKey(qid=qid, vid=0)
+                if not Instance.exists(ori_key):
+                    raise(ConfigurationError(f"[ rewrite_and_formalize ]: {ori_key} does not exist."))
+                if not rewrite.retrive_instance_keys(qid):
+                    ori_instances.append(Instance.get(ori_key))
+            if spacy_annotator.cache_size > 0:
+                batch_size = min(batch_size, spacy_annotator.cache_size)
+            if max_variants and max_variants > 1:
+                # every instance can produce up to max_variants texts to annotate.
+                batch_size = batch_size // max_variants
+            batch_size = max(batch_size, 1)
+            output = []
+            for start in tqdm(range(0, len(ori_instances), batch_size)):
+                batch = ori_instances[start:start+batch_size]
+                rewrite_inputs = [
+                    self._get_rewrite_inputs(rewrite, ori_i, rewritten_output)
+                    for ori_i, rewritten_outputs in zip(
+                        batch, rewrite.rewrite_instances_variants(batch, max_variants))
+                    for rewritten_output in rewritten_outputs ]
+                formalized = self.predict_formalize_batch(rid, rewrite_inputs)
+                output += [ InstanceKey(qid=f['key']['qid'], vid=f['key']['vid']) for f in formalized if f ]
+            return output
+        except:
+            raise
+
+    def _get_rewrite_inputs(self, 
+        rewrite: Rewrite, ori_i: Instance, rewritten_output: 'RewriteOutputMeta') -> Dict[str, any]:
+        """Merge the rewritten target text back to the other (unchanged) 
+        targets of the original instance, as the inputs of ``predict_formalize``.
+        
+        Returns:
+            Dict[str, any] -- { qid, q_rewrite, groundtruths, c_rewrite }
+        """
+        q_rewrite = rewritten_output.text if rewrite.target == 'question' \
+            else ori_i.get_entry('question').doc.text
+        g_rewrites = [ rewritten_output.text ] if rewrite.target == 'groundtruth' else \
+            [ g.label for g in ori_i.get_entry('groundtruths') ]
+        if self.task == 'qa':
+            c_rewrite = rewritten_output.text \
+                if rewrite.target == 'context' \
+                else ori_i.get_entry('context').doc.text                        
+        else:
+            c_rewrite = ori_i.get_entry('question').img_id if ori_i.get_entry('question') else ''
+        return { 
+            'qid': ori_i.qid, 'q_rewrite': q_rewrite, 
+            'groundtruths': g_rewrites, 'c_rewrite': c_rewrite }
+
     def rewrite_group_instances(self, 
         rid: str, group_name: str, 
         sample_size: int=100, 
@@ -526,64 +852,66 @@ class API(Registrable):
         except:
             raise
     
-    def evaluate_tried_rewrites(self, rids: List[str], gnames: List[str]):
-        rids, gnames = convert_list(rids), convert_list(gnames)
+    def _evaluate_rewrites_on_groups(self, rids: List[str], gnames: List[str]) -> List[Dict]:
+        # all the (rewrite, group) counts of the anchor model, in one pass of ``Rewrite.flip_stats``.
+        rids = [ rid for rid in rids if Rewrite.exists(rid) ]
+        gnames = [ g for g in gnames if Group.exists(g) ]
+        Rewrite.flip_stats.update([ Rewrite.get(rid) for rid in rids ])
+        qid_groups = { g: { key.qid for key in Group.get(g).get_instances() } for g in gnames }
+        model = Instance.resolve_default_model(None)
+        stats = Rewrite.flip_stats.evaluate(rids, qid_groups, [ model ])
         output = []
-        for g in gnames:
-            if not Group.exists(g):
-                logger.warn(f"{g} does not exist.")
-                continue
-            group = Group.get(g)
-            for rid in rids:
-                if not Rewrite.exists(rid):
-                    logger.warn(f"{rid} does not exist.")
-                    continue
-                rule = Rewrite.get(rid)
-                qids = {}
-                for key in group.get_instances():
-                    if key.qid not in qids:
-                        qids[key.qid] = True
-                counts = Rewrite.count_flips(
-                    Rewrite.get_delta_performance(rule, qids)['delta_f1s'])
-                output.append({ 'rid': rid, 'group': g, 'counts': counts })
+        for gidx, g in enumerate(gnames):
+            for ridx, rid in enumerate(rids):
+                output.append({
+                    'rid': rid, 
+                    'group': g, 
+                    'counts': {
+                        'flip_to_correct': int(stats['flip_to_correct'][ridx, gidx, 0]),
+                        'flip_to_incorrect': int(stats['flip_to_incorrect'][ridx, gidx, 0]),
+                        'unflip': int(stats['unflip'][ridx, gidx, 0])
+                    }
+                })
         return output
 
+    def evaluate_tried_rewrites(self, rids: List[str], gnames: List[str]):
+        rids, gnames = convert_list(rids), convert_list(gnames)
+        for name, exists in [ (g, Group.exists(g)) for g in gnames ] + [ (r, Rewrite.exists(r)) for r in rids ]:
+            if not exists:
+                logger.warn(f"{name} does not exist.")
+        return self._evaluate_rewrites_on_groups(rids, gnames)
+
     def evaluate_rewrites_on_groups(self, rids: List[str], gnames: List[str], on_tried: bool=False):
         rids, gnames = convert_list(rids), convert_list(gnames)
-        print(rids, gnames)
+        for name, exists in [ (g, Group.exists(g)) for g in gnames ] + [ (r, Rewrite.exists(r)) for r in rids ]:
+            if not exists:
+                logger.warn(f"{name} does not exist.")
+        # the tried (not yet saved) examples are not in the flip stats.
+        tried_rids = [ rid for rid in rids if on_tried and rid in self.prev_tried_rewrite_examples ]
+        counts = { (o['rid'], o['group']): o['counts'] for o in self._evaluate_rewrites_on_groups(
+            [ rid for rid in rids if rid not in tried_rids ], gnames) }
         output = []
         for g in gnames:
             if not Group.exists(g):
-                logger.warn(f"{g} does not exist.")
                 continue
             group = Group.get(g)
             for rid in rids:
                 if not Rewrite.exists(rid):
-                    logger.warn(f"{rid} does not exist.")
                     continue
-                rule = Rewrite.get(rid)
-                if on_tried and rid in self.prev_tried_rewrite_examples:
+                if rid in tried_rids:
                     delta_performance = []
                     for key in group.get_instances():
                         if key.qid in self.prev_tried_rewrite_examples[rid]:
-                            o = self.prev_tried_rewrite_examples[rid][key.qid]
-                            delta_performance.append(
-                                int(o['rewrite_instance']['perform'] == 1) - 
-                                int(o['ori_instance']['perform'] == 1)
-                            )
-                elif len(rule.get_instances()) > 0:
-                    qids = { key.qid for key in group.get_instances() }
-                    delta_performance = Rewrite.get_delta_performance(rule, qids)['delta_f1s']
+                            for o in self.prev_tried_rewrite_examples[rid][key.qid]:
+                                delta_performance.append(
+                                    int(o['rewrite_instance']['perform'] == 1) - 
+                                    int(o['ori_instance']['perform'] == 1)
+                                )
+                    output.append({ 'rid': rid, 'group': g, 'counts': Rewrite.count_flips(delta_performance) })
                 else:
-                    delta_performance = []
-                counts = Rewrite.count_flips(delta_performance)
-                print(counts)
-                output.append({
-                    'rid': rid,
-                    'group': g,
-                    'counts': counts
-                })
-        print(output)
+                    output.append({ 'rid': rid, 'group': g, 'counts': counts[(rid, g)] })
+        for o, intervals in zip(output, Rewrite.flip_intervals([ o['counts'] for o in output ])):
+            o['intervals'] = intervals
         return output
 
 
@@ -591,6 +919,10 @@ class API(Registrable):
         self.bbd.on_select(target, qid, vid, start_idx, end_idx)
         return self.bbd.suggestions
 
+    def get_annotation_cache_stats(self) -> Dict[str, float]:
+        """The hit rate of the shared annotation cache in ``spacy_annotator``."""
+        return spacy_annotator.get_cache_stats()
+
     def detect_rule_from_rewrite(self, adoc, bdoc, target_cmd):
         adoc = spacy_annotator.process_text(adoc) if type(adoc) == str else adoc
         bdoc = spacy_annotator.process_text(bdoc) if type(bdoc) == str else bdoc
@@ -599,7 +931,8 @@ class API(Registrable):
             bdoc=bdoc, 
             instances=list(Instance.instance_hash.values()),
             target_cmd=target_cmd,
-            sample_size=100)
+            sample_size=100,
+            time_budget=DETECT_RULE_TIME_BUDGET)
         for r in self.rd.rules:
             Rewrite.save(self.rd.rules[r])
         self.rd.rules = {}
@@ -619,16 +952,107 @@ class API(Registrable):
         Returns:
             Dict -- [description]
         """
-        #if True:
-        predictor = self.predictors[Instance.model]
+        return self.predict_on_manual_rewrite_batch([{ 
+            'q_rewrite': q_rewrite, 'groundtruths': groundtruths, 'c_rewrite': c_rewrite }])[0]
+
+    def predict_on_manual_rewrite_batch(self, rewrite_inputs: List[Dict[str, any]]) -> List[Dict]:
+        """The batch version of ``predict_on_manual_rewrite``. All the inputs are 
+        submitted to the predictor service of the anchor model at once, so they 
+        are run in micro-batches together with the other concurrent requests.
+        
+        Arguments:
+            rewrite_inputs {List[Dict[str, any]]} -- a list of 
+                { q_rewrite, groundtruths, c_rewrite }, as in ``predict_on_manual_rewrite``.
+        
+        Returns:
+            List[Dict] -- { prediction, perform }, aligned with the inputs. 
+                None if the prediction failed.
+        """
+        service = self.get_predictor_service(Instance.model)
+        if not service or not rewrite_inputs:
+            return [ None ] * len(rewrite_inputs)
+        futures = service.submit_batch([ 
+            self._get_predict_inputs(r['q_rewrite'], r['c_rewrite']) for r in rewrite_inputs ])
+        predictions = []
+        for future in futures:
+            try:
+                predictions.append(future.result())
+            except Exception as e:
+                logger.error(e)
+                predictions.append(None)
+        evaluated = [ (p, r) for p, r in zip(predictions, rewrite_inputs) if p ]
+        performs = iter(Label.task_evaluator_batch(
+            [ p['text'] for p, _ in evaluated ], [ r['groundtruths'] for _, r in evaluated ]))
+        return [ { 
+            'prediction': p['text'], 
+            'perform': next(performs).get(Label.task_primary_metric, 0)
+        } if p else None for p in predictions ]
+
+    def _get_predict_inputs(self, q_rewrite: str, c_rewrite: str=None) -> Dict[str, str]:
+        """The kwargs of ``predictor.predict`` for one manual rewrite."""
+        return { 'qtext': q_rewrite, 'ptext': c_rewrite }
+
+    def get_predictor_service(self, model: str) -> PredictorService:
+        """Get (or start) the micro-batching service of a predictor.
+        
+        Arguments:
+            model {str} -- the model name.
+        
+        Returns:
+            PredictorService -- the service. None if the model is not loaded.
+        """
+        predictor = self.predictors.get(model, None)
         if not predictor:
             return None
-        prediction = predictor.predict(q_rewrite, c_rewrite)
-        if not prediction:
-            return None
-        perform = Label.task_evaluator(prediction['text'], groundtruths)[Label.task_primary_metric]
-        return { 'prediction': prediction['text'], 'perform': perform }
+        service = self.predictor_services.get(model, None)
+        if service is None:
+            service = PredictorService(predictor, 
+                max_batch_size=MICRO_BATCH_SIZE, max_wait_ms=MICRO_BATCH_WAIT_MS, 
+                n_workers=MICRO_BATCH_WORKERS)
+            self.predictor_services[model] = service
+        return service
+
+    def _replace_predictor(self, model: str, predictor: Predictor=None) -> None:
+        """Replace (or remove) the predictor of a model, and shut down the 
+        service of the old predictor. The queued requests of the old service 
+        are still run, by the old predictor.
+        
+        Arguments:
+            model {str} -- the model name.
+        
+        Keyword Arguments:
+            predictor {Predictor} -- the new predictor. If None, the model is removed. (default: {None})
+        
+        Returns:
+            None
+        """
+        service = self.predictor_services.get(model, None)
+        if service is not None and service.predictor is not predictor:
+            service.shutdown(wait=False)
+            del self.predictor_services[model]
+        if predictor is None:
+            self.predictors.pop(model, None)
+        else:
+            self.predictors[model] = predictor
+
     def predict_formalize(self, qid: str, rid: str, q_rewrite: str, groundtruths: List[str], c_rewrite: str=None):
+        return self.predict_formalize_batch(rid, [{ 
+            'qid': qid, 'q_rewrite': q_rewrite, 
+            'groundtruths': groundtruths, 'c_rewrite': c_rewrite }])[0]
+
+    def predict_formalize_batch(self, rid: str, rewrite_inputs: List[Dict[str, any]]) -> List[Dict]:
+        """Create the rewritten instances of one rule, run all the predictors 
+        on them in batch, and save them.
+        
+        Arguments:
+            rid {str} -- the rewrite rule id
+            rewrite_inputs {List[Dict[str, any]]} -- a list of 
+                { qid, q_rewrite, groundtruths, c_rewrite }, as in ``predict_formalize``.
+        
+        Returns:
+            List[Dict] -- the outputs of ``predict_formalize``, aligned with the 
+                inputs. None if an input cannot be formalized.
+        """
         raise NotImplementedError
 
     def get_serialized_instance_with_qids(self, qids: List[str]):
@@ -778,13 +1202,16 @@ class API(Registrable):
                             delta_f1s = defaultdict(int)
                             for key in keys:
                                 ori_key = InstanceKey(qid=key.qid, vid=0)
-                                edi_key = rewrite.retrive_instance_key(key.qid)
-                                if Instance.exists(edi_key) and Instance.exists(ori_key):
-                                    ori_i = Instance.get(ori_key)
-                                    rewrite_i = Instance.get(edi_key)
-                                    delta_f1s[key] = \
-                                        int(rewrite_i.get_perform(selected_predictor) == 1) - \
-                                        int(ori_i.get_perform(selected_predictor) == 1)
+                                if not Instance.exists(ori_key):
+                                    continue
+                                ori_i = Instance.get(ori_key)
+                                # summed over all the rewritten variants.
+                                for edi_key in rewrite.retrive_instance_keys(key.qid):
+                                    if Instance.exists(edi_key):
+                                        rewrite_i = Instance.get(edi_key)
+                                        delta_f1s[key] += \
+                                            int(rewrite_i.get_perform(selected_predictor) == 1) - \
+                                            int(ori_i.get_perform(selected_predictor) == 1)
                             keys = sorted(list(keys.keys()), 
                                 key=lambda key: isflip * delta_f1s[key], reverse=True )
                         else:
@@ -792,14 +1219,15 @@ class API(Registrable):
                             changed_predictions = defaultdict(int)
                             for key in keys:
                                 ori_key = InstanceKey(qid=key.qid, vid=0)
-                                edi_key = rewrite.retrive_instance_key(key.qid)
-                                if Instance.exists(edi_key) and Instance.exists(ori_key):
-                                    ori_i = Instance.get(ori_key)
-                                    rewrite_i = Instance.get(edi_key)
-                                    ori_p = ori_i.get_entry('prediction', selected_predictor)
-                                    rewrite_p = rewrite_i.get_entry('prediction', selected_predictor)
-                                    if ori_p and rewrite_p:
-                                        changed_predictions[key] = int(ori_p.doc.text != rewrite_p.doc.text)
+                                if not Instance.exists(ori_key):
+                                    continue
+                                ori_p = Instance.get(ori_key).get_entry('prediction', selected_predictor)
+                                # counted over all the rewritten variants.
+                                for edi_key in rewrite.retrive_instance_keys(key.qid):
+                                    if Instance.exists(edi_key):
+                                        rewrite_p = Instance.get(edi_key).get_entry('prediction', selected_predictor)
+                                        if ori_p and rewrite_p:
+                                            changed_predictions[key] += int(ori_p.label != rewrite_p.label)
                             keys = sorted(list(keys.keys()), 
                                 key=lambda key: ischange * changed_predictions[key], reverse=True )
                     else:
@@ -847,66 +1275,108 @@ class APIQA(API):
             model_metas, 
             attr_file_name, group_file_name, rewrite_file_name, 'qa')
 
-    def predict_formalize(self, 
-        qid: str,
-        rid: str,
-        q_rewrite: str, 
-        groundtruths: List[str],
-        c_rewrite: str):
-        ori_key = InstanceKey(qid=qid, vid=0)
-        if not Instance.exists(ori_key):
-            logger.warn(f"{ori_key} does not exist.")
-            return None
-        i_ori = Instance.get(ori_key)
-        q_ori, p_ori = i_ori.get_entry('question'), i_ori.get_entry('context')
-        if not q_ori or not p_ori:
-            return None
-        qrewritten, prewritten = q_ori.doc.text != q_rewrite, p_ori.doc.text != c_rewrite
-        # get groundtruths
-        g_texts = [ g.doc.text for g in i_ori.get_entry('groundtruths') ]
-        if prewritten or not groundtruths or all([g in g_texts for g in groundtruths]):
-            grewritten = False
-        else:
-            grewritten = True
-        if not qrewritten and not prewritten:
-            return None
-        vid = len(Instance.qid_hash[qid])
-        #vid = max(versions) + 1 if versions else 1
-        question = Question(qid=i_ori.qid, text=q_rewrite, vid=vid) if qrewritten else q_ori
-        context = Context(aid=i_ori.aid, cid=i_ori.cid, text=c_rewrite, vid=vid, qid=i_ori.qid) \
-            if prewritten else p_ori
-        # get groundtruths
-        if not grewritten:
-            groundtruths = i_ori.get_entry('groundtruths')
-        else:
-            groundtruths = [ 
-                QAAnswer(model='groundtruth', qid=question.qid, text=g, vid=vid) for g in groundtruths ]
-            for g in groundtruths:
-                g.add_attributes(context=context, predicted=None, 
-                groundtruths=None, char_start=None, span_start=None)
-        # run the prediction
-        predictions = []
+    def predict_formalize_batch(self, 
+        rid: str, 
+        rewrite_inputs: List[Dict[str, any]]):
+        # annotate all the rewritten texts in one pass. Contexts are 
+        # re-annotated incrementally below, as usually only one sentence changes.
+        spacy_annotator.process_texts(list(set([ 
+            text for r in rewrite_inputs 
+            for text in [ r['q_rewrite'] ] + (r['groundtruths'] or [])
+            if text is not None ])))
+        formalized, next_vids = [], {}
+        for r in rewrite_inputs:
+            qid, q_rewrite, groundtruths, c_rewrite = \
+                r['qid'], r['q_rewrite'], r['groundtruths'], r['c_rewrite']
+            ori_key = InstanceKey(qid=qid, vid=0)
+            if not Instance.exists(ori_key):
+                logger.warn(f"{ori_key} does not exist.")
+                formalized.append(None)
+                continue
+            i_ori = Instance.get(ori_key)
+            q_ori, p_ori = i_ori.get_entry('question'), i_ori.get_entry('context')
+            if not q_ori or not p_ori:
+                formalized.append(None)
+                continue
+            qrewritten, prewritten = q_ori.doc.text != q_rewrite, p_ori.doc.text != c_rewrite
+            # get groundtruths
+            g_texts = [ g.label for g in i_ori.get_entry('groundtruths') ]
+            if prewritten or not groundtruths or all([g in g_texts for g in groundtruths]):
+                grewritten = False
+            else:
+                grewritten = True
+            if not qrewritten and not prewritten:
+                formalized.append(None)
+                continue
+            # the same qid can be rewritten more than once in one batch.
+            vid = next_vids.get(qid, Instance.get_next_vid(qid))
+            next_vids[qid] = vid + 1
+            question = Question(qid=i_ori.qid, text=q_rewrite, vid=vid) if qrewritten else q_ori
+            if prewritten:
+                spacy_annotator.process_text_incremental(c_rewrite, p_ori.doc)
+            context = Context(aid=i_ori.aid, cid=i_ori.cid, text=c_rewrite, vid=vid, qid=i_ori.qid) \
+                if prewritten else p_ori
+            # get groundtruths
+            if not grewritten:
+                groundtruths = i_ori.get_entry('groundtruths')
+            else:
+                groundtruths = [ 
+                    QAAnswer(model='groundtruth', qid=question.qid, text=g, vid=vid) for g in groundtruths ]
+                for g in groundtruths:
+                    g.add_attributes(context=context, predicted=None, 
+                    groundtruths=None, char_start=None, span_start=None)
+            formalized.append({
+                'qid': qid, 'vid': vid,
+                'question': question, 'context': context, 'groundtruths': groundtruths,
+                'qrewritten': qrewritten, 'prewritten': prewritten, 'grewritten': grewritten,
+                'predictions': []
+            })
+        # run the prediction, one batch per predictor
+        to_predict = [ f for f in formalized if f ]
         for predictor in self.predictors.values():
-            predicted = Predictor.by_name("qa_task_class").model_predict(predictor, question, context, groundtruths)
-            if predicted:
-                predictions.append(predicted)
-        instance = Instance(qid, vid, rid, additional_keys={"aid":context.aid, "cid":context.cid})
-        instance.set_entries(
-            question=question, context=context, 
-            groundtruths=groundtruths, predictions=predictions)
+            predicted_list = Predictor.by_name("qa_task_class").model_predict_batch(
+                predictor, 
+                questions=[ f['question'] for f in to_predict ], 
+                contexts=[ f['context'] for f in to_predict ], 
+                groundtruths=[ f['groundtruths'] for f in to_predict ])
+            for f, predicted in zip(to_predict, predicted_list):
+                if predicted:
+                    f['predictions'].append(predicted)
         # save the rewrite
-        if not Rewrite.exists(rid):
+        if to_predict and not Rewrite.exists(rid):
             Rewrite.save(Rewrite(rid, "manual", ""))
-        rewrite = Rewrite.get(rid)
-        rewrite.add_instance(instance.key())
-        Instance.save(instance)
-        return {
-            'key': instance.get_all_keys(),
-            'question': instance.get_entry('question') if qrewritten else None,
-            'context': instance.get_entry('context') if prewritten else None,
-            'groundtruths': instance.get_entry('groundtruths') if grewritten else None,
-            'predictions': instance.get_entry('predictions')
-        }
+        output = []
+        for f in formalized:
+            if not f:
+                output.append(None)
+                continue
+            context = f['context']
+            # only save the changed entries; the rest are shared with vid 0.
+            instance = Instance(f['qid'], f['vid'], rid, 
+                additional_keys={"aid":context.aid, "cid":context.cid}, 
+                base_key=InstanceKey(qid=f['qid'], vid=0))
+            changed = { 'predictions': f['predictions'] }
+            if f['qrewritten']:
+                changed['question'] = f['question']
+            if f['prewritten']:
+                changed['context'] = context
+            if f['grewritten']:
+                changed['groundtruths'] = f['groundtruths']
+            instance.set_entries(**changed)
+            Rewrite.get(rid).add_instance(instance.key())
+            Instance.save(instance)
+            if Instance.rewritten_store is not None:
+                Instance.rewritten_store.append(instance)
+            output.append({
+                'key': instance.get_all_keys(),
+                'question': instance.get_entry('question') if f['qrewritten'] else None,
+                'context': instance.get_entry('context') if f['prewritten'] else None,
+                'groundtruths': instance.get_entry('groundtruths') if f['grewritten'] else None,
+                'predictions': instance.get_entry('predictions')
+            })
+        if Instance.rewritten_store is not None:
+            Instance.rewritten_store.flush()
+        return output
 
 
 @API.register("vqa")
@@ -922,33 +1392,60 @@ class APIVQA(API):
             model_metas, 
             attr_file_name, group_file_name, rewrite_file_name, 'vqa')
 
-    def predict_formalize(self, 
+    def _get_predict_inputs(self, q_rewrite: str, c_rewrite: str=None) -> Dict[str, str]:
+        # c_rewrite is the img_id.
+        return { 'qtext': q_rewrite, 'img_id': c_rewrite }
+
+    def predict_formalize_batch(self, 
+        rid: str, 
+        rewrite_inputs: List[Dict[str, any]]):
+        formalized, next_vids = [], {}
+        for r in rewrite_inputs:
+            formalized.append(self._formalize_one(
+                r['qid'], r['q_rewrite'], r['groundtruths'], next_vids))
+        # run the prediction, one batch per predictor
+        to_predict = [ f for f in formalized if f ]
+        for predictor in self.predictors.values():
+            predicted_list = Predictor.by_name("vqa_task_class").model_predict_batch(
+                predictor, 
+                question=[ f['question'] for f in to_predict ], 
+                groundtruths=[ f['groundtruths'] for f in to_predict ])
+            for f, predicted in zip(to_predict, predicted_list):
+                if predicted:
+                    f['predictions'].append(predicted)
+        output = [ self._save_formalized(rid, f) if f else None for f in formalized ]
+        if Instance.rewritten_store is not None:
+            Instance.rewritten_store.flush()
+        return output
+
+    def _formalize_one(self, 
         qid: str,
-        rid: str,
         q_rewrite: str, 
         groundtruths: List[str],
-        c_rewrite: str=None):
+        next_vids: Dict[str, int]) -> Dict[str, any]:
         ori_key = InstanceKey(qid=qid, vid=0)
         if not Instance.exists(ori_key):
             logger.warn(f"{ori_key} does not exist.")
             return None
         i_ori = Instance.get(ori_key)
         q_ori = i_ori.get_entry('question')
-        g_texts = sum([ [g.doc.text] * g.count for g in i_ori.get_entry('groundtruths') ], [])
+        g_texts = sum([ [g.label] * g.count for g in i_ori.get_entry('groundtruths') ], [])
         if not groundtruths or all([g in g_texts for g in groundtruths]):
             grewritten = False
         else:
             grewritten = True
         if (not q_ori or q_ori.doc.text == q_rewrite) and not grewritten: 
             return None
-        vid = len(Instance.qid_hash[qid])
+        # the same qid can be rewritten more than once in one batch.
+        vid = next_vids.get(qid, Instance.get_next_vid(qid))
+        next_vids[qid] = vid + 1
         question = VQAQuestion(qid=i_ori.qid,text=q_rewrite, 
             vid=vid, img_id = q_ori.img_id, 
             question_type=q_ori.question_type)
         # get groundtruths
-        g_texts = [ g.doc.text for g in i_ori.get_entry('groundtruths') ]
+        g_texts = [ g.label for g in i_ori.get_entry('groundtruths') ]
         # get groundtruths
-        g_texts = [ g.doc.text for g in i_ori.get_entry('groundtruths') ]
+        g_texts = [ g.label for g in i_ori.get_entry('groundtruths') ]
         if not groundtruths or all([g in g_texts for g in groundtruths]):
             grewritten = False
             groundtruths = i_ori.get_entry('groundtruths')
@@ -965,24 +1462,33 @@ class APIVQA(API):
                     vid=vid)
                 for ans_text, count in c.most_common()
             ]
-        # run the prediction
-        predictions = []
-        for predictor in self.predictors.values():
-            predicted = Predictor.by_name("vqa_task_class").model_predict(predictor, question, groundtruths)
-            if predicted:
-                predictions.append(predicted)
-        instance = Instance(qid, vid, rid)
-        instance.set_entries(question=question, groundtruths=groundtruths, predictions=predictions)
+        return {
+            'qid': qid, 'vid': vid, 'question': question, 'groundtruths': groundtruths,
+            'qrewritten': not q_ori or q_ori.doc.text != q_rewrite, 'grewritten': grewritten,
+            'predictions': []
+        }
+
+    def _save_formalized(self, rid: str, f: Dict[str, any]) -> Dict[str, any]:
+        # only save the changed entries; the rest are shared with vid 0.
+        instance = Instance(f['qid'], f['vid'], rid, base_key=InstanceKey(qid=f['qid'], vid=0))
+        changed = { 'predictions': f['predictions'] }
+        if f['qrewritten']:
+            changed['question'] = f['question']
+        if f['grewritten']:
+            changed['groundtruths'] = f['groundtruths']
+        instance.set_entries(**changed)
         # save the rewrite
         if not Rewrite.exists(rid):
             Rewrite.save(Rewrite(rid, "manual", ""))
         rewrite = Rewrite.get(rid)
         rewrite.add_instance(instance.key())
         Instance.save(instance)
+        if Instance.rewritten_store is not None:
+            Instance.rewritten_store.append(instance)
         return {
             'key': instance.get_all_keys(),
             'question': instance.get_entry('question'),
             'context': None,
-            'groundtruths': instance.get_entry('groundtruths') if grewritten else None,
+            'groundtruths': instance.get_entry('groundtruths') if f['grewritten'] else None,
             'predictions': instance.get_entry('predictions')
         }
\ No newline at end of file
@@ -6,7 +6,10 @@ from itertools import groupby
 from .label import Label
 from .target import Target
 from .interfaces import InstanceKey, UNREWRITTEN_RID
+from .type_columns import TypeColumns
 from ..processor import spacy_annotator
+from ..processor.freq_table import FreqTable
+from ..processor.token_index import TokenIndex
 from ..utils.check import ConfigurationError
 
 import logging
@@ -34,6 +37,10 @@ class Instance(object):
         The rewrite rule id. If not rewritten (i.e., the original version), it is UNREWRITTEN_RID.
     additional_keys : Dict[str, Union[str, int]], optional
         Additional keys that can help locate an instance, in the format of {key_name: key}, by default {}  
+    base_key : InstanceKey, optional
+        For rewritten instances, the key of the instance it is rewritten from, by default None.
+        The rewritten instance only saves the entries that are changed (and its own
+        predictions), and ``get_entry`` falls through to the base instance for the rest.
     
     """
     #: ``str``, The selected model. This is what DSL resolve to when we set ``model="ANCHOR"``
@@ -52,19 +59,33 @@ class Instance(object):
     instance_hash_rewritten = defaultdict(lambda: None)
     #: ``Dict[str, int]`` The training vocabulary frequency
     train_freq = defaultdict(dict)
+    #: ``FreqTable`` The training vocabulary frequency, compiled into arrays for ``freq``.
+    train_freq_table: FreqTable = FreqTable()
+    #: ``TypeColumns`` The precomputed question/answer types of the original instances.
+    type_columns: TypeColumns = TypeColumns()
+    #: ``TokenIndex`` The posting lists of the token attributes of the original instances.
+    token_index: TokenIndex = TokenIndex()
+    #: ``RewrittenStore`` The on-disk store of the rewritten instances. If set, 
+    #: rewritten instances not yet in ``Instance.instance_hash_rewritten`` are loaded from it.
+    rewritten_store: 'RewrittenStore' = None
     #: ``dict``: The relationship between linguistic features and model performances.
     ling_perform_dict = defaultdict(dict)
     # TODO: save the dev frequency??
 
     def __init__(self, qid: str, vid: int, rid: str=UNREWRITTEN_RID, 
-            additional_keys: Dict[str, Union[str, int]]={}):
+            additional_keys: Dict[str, Union[str, int]]={},
+            base_key: InstanceKey=None):
         self.qid: str = qid
         self.vid: int = vid
         self.entries: List[str] = []
         self.rid = rid
         self.additional_keys = additional_keys
+        self.base_key: InstanceKey = base_key
         for key, val in additional_keys.items():
             setattr(self, key, val)
+        if base_key:
+            base = Instance.get(base_key)
+            self.entries = list(base.entries)
 
     def get_all_keys(self) -> Dict[str, Union[int, str]]:
         """
@@ -120,6 +141,10 @@ class Instance(object):
         perform_name = Label.resolve_default_perform_name(perform_name)
         try:
             model = Instance.resolve_default_model(model)
+            if self.vid == 0:
+                score = Label.performance_table.get(self.key(), model, perform_name)
+                if score is not None:
+                    return score
             prediction = self.get_entry('prediction', model)
             if prediction:
                 return prediction.get_perform(perform_name)
@@ -146,6 +171,11 @@ class Instance(object):
             If the model is incorrect.
         """
         try:
+            if self.vid == 0:
+                incorrect = Label.performance_table.is_incorrect(
+                    self.key(), Instance.resolve_default_model(model), Label.task_primary_metric)
+                if incorrect is not None:
+                    return incorrect
             prediction = self.get_entry('prediction', model)
             if prediction:
                 return prediction.is_incorrect()
@@ -192,19 +222,47 @@ class Instance(object):
         if entry == 'instance':
             return self.key()
         if entry in self.entries:
+            if entry not in self.__dict__ and getattr(self, 'base_key', None):
+                return self.get_base().get_entry(entry, model)
             output = getattr(self, entry, None)
             return output
         elif entry == 'groundtruth':
-            groundtruths = getattr(self, 'groundtruths', [])
+            groundtruths = self.get_entry('groundtruths') or []
             groundtruths = sorted(groundtruths, key=lambda g: getattr(g, 'count', -1), reverse=True)
             return groundtruths[0] if groundtruths else None
         elif entry == 'prediction':
-            predictions = getattr(self, 'predictions', [])
+            predictions = self.get_entry('predictions') or []
             predictions = [ p for p in predictions if p.model == Instance.resolve_default_model(model) ]
             return predictions[0] if predictions else None
         # logger.warn(f"Cannot get the target entry: [ {entry} ] Returning None.")
         return None
     
+    def get_base(self) -> 'Instance':
+        """
+        Get the instance that this instance is rewritten from.
+        
+        Returns
+        -------
+        Instance
+            The base instance. ``None`` if this instance is not a delta.
+        """
+        base_key = getattr(self, 'base_key', None)
+        return Instance.get(base_key) if base_key else None
+
+    def get_local_entries(self) -> List[str]:
+        """
+        Get the names of the entries saved in this instance, 
+        excluding the ones shared with the base instance.
+        
+        Returns
+        -------
+        List[str]
+            The entry names.
+        """
+        if not getattr(self, 'base_key', None):
+            return self.entries
+        return [ e for e in self.entries if e in self.__dict__ ]
+
     def _show_instance_str(self) -> str:
         """
         Generate an instance string that represent the key information of the instance,
@@ -282,7 +340,7 @@ class Instance(object):
         Instance
             The byte version of the instance.
         """
-        for entry in self.entries:
+        for entry in self.get_local_entries():
             got_entry = self.get_entry(entry)
             if type(got_entry) == list:
                 setattr(self, entry, 
@@ -300,7 +358,7 @@ class Instance(object):
         Instance
             The normal version of the instance.
         """
-        for entry in self.entries:
+        for entry in self.get_local_entries():
             got_entry = self.get_entry(entry)
             if type(got_entry) == list:
                 setattr(self, entry, 
@@ -416,6 +474,11 @@ class Instance(object):
                 return instance_hash[key]
             if key.vid != 0 and key in instance_hash_rewritten:
                 return instance_hash_rewritten[key]
+            if key.vid != 0 and cls.rewritten_store is not None and key in cls.rewritten_store:
+                instance = cls.rewritten_store.get(key)
+                if instance:
+                    cls.save(instance)
+                    return instance
             raise(ConfigurationError(f"get_instance_by_key: {key} was not found."))
         except Exception as e:
             raise(e)
@@ -454,6 +517,8 @@ class Instance(object):
                 return True
             if key.vid != 0 and key in instance_hash_rewritten:
                 return True
+            if key.vid != 0 and cls.rewritten_store is not None and key in cls.rewritten_store:
+                return True
             return False
         except Exception as e:
             return False
@@ -552,6 +617,25 @@ class Instance(object):
             cls.qid_hash[instance.qid].append(instance.key())
         return True
     
+    @classmethod
+    def get_next_vid(cls, qid: str) -> int:
+        """
+        Get the vid for a new rewritten version of the instance. It's one more 
+        than the largest vid in use, so it never collides with a saved version, 
+        even after other versions are removed.
+        
+        Parameters
+        ----------
+        qid : str
+            The id of the instance.
+        
+        Returns
+        -------
+        int
+            The new vid.
+        """
+        return max([ key.vid for key in cls.qid_hash.get(qid, []) ] + [ 0 ]) + 1
+
     @classmethod
     def remove_saved(cls, key: InstanceKey) -> bool:
         """Remove the saved instance from the hashes 
@@ -573,6 +657,8 @@ class Instance(object):
                 del Instance.instance_hash[key]
             if key in Instance.instance_hash_rewritten:
                 del Instance.instance_hash_rewritten[key]
+            if Instance.rewritten_store is not None:
+                Instance.rewritten_store.remove(key)
             if key.qid in Instance.qid_hash:
                 Instance.qid_hash[key.qid] = [k for k in Instance.qid_hash[key.qid] if k != key]
             return True
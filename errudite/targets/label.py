@@ -2,9 +2,11 @@ import traceback
 from typing import Union, List, Dict, Callable
 from collections import defaultdict
 from .target import Target
-from .interfaces import LabelKey
-from ..processor import SpacyAnnotator, spans_to_json
+from .interfaces import LabelKey, InstanceKey
+from .performance_table import PerformanceTable
+from ..processor import SpacyAnnotator, spans_to_json, spacy_annotator
 from ..utils.helpers import convert_list
+from ..utils.evaluator import evaluate_batch
 from ..utils.check import DSLValueError
 
 
@@ -42,18 +44,105 @@ class Label(Target):
     #: This is what DSL resolve to when we set ``perform_name="DEFAULT"``
     task_primary_metric: str = 'accuracy'
 
+    #: ``PerformanceTable`` The metrics of all the predictions on the original instances,
+    #: as a dense array. ``set_perform`` writes through to it.
+    performance_table: PerformanceTable = PerformanceTable()
+
+    #: ``{ model: { id(label): label } }`` The lazy labels whose docs are annotated 
+    #: together when the doc of any of them is first used. See ``Label.defer_docs``.
+    pending_docs: Dict[str, Dict[int, 'Label']] = defaultdict(dict)
+
+    #: The attributes that are computed when first used, if missing.
+    lazy_attrs: List[str] = [ 'doc' ]
+
     def __init__(self, 
         model: str,
         qid: str, 
         text: str, vid: int=0, 
         metas: Dict[str, any]={},
         annotator: SpacyAnnotator=None) -> None:
-        Target.__init__(self, qid, text, vid, metas=metas, annotator=annotator)
+        # most metrics only need the raw text, so unless an annotator is 
+        # explicitly given, the doc is annotated lazily (see ``__getattr__``).
+        lazy = text is not None and annotator is None
+        Target.__init__(self, qid, None if lazy else text, vid, metas=metas, annotator=annotator)
+        if lazy:
+            del self.doc
         self.model = model
         self.label = text
         self.is_groundtruth = model == 'groundtruth'
         self.perform = { }
 
+    def __getattr__(self, name: str) -> any:
+        # only called when the attribute is missing: lazy labels, and the labels 
+        # restored from the columnar prediction files, do not have a doc until it is first used.
+        if name == 'doc' and 'label' in self.__dict__:
+            pending = Label.pending_docs.get(self.__dict__.get('model', None), {})
+            if pending.pop(id(self), None) is self:
+                # annotate all the pending labels of the same model together.
+                Label.materialize_docs([ self ] + list(pending.values()))
+                pending.clear()
+            else:
+                self.doc = spacy_annotator.process_text(self.__dict__['label'])
+            return self.__dict__['doc']
+        raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'")
+
+    def has_doc(self) -> bool:
+        """If the doc is already annotated (or not needed)."""
+        return 'doc' in self.__dict__
+
+    @classmethod
+    def defer_docs(cls, labels: List['Label']) -> None:
+        """Register the lazy labels in ``Label.pending_docs``, so when the doc of any 
+        of them is first used, the docs of all the labels from the same model are 
+        annotated in one batch. Nothing is annotated if no doc is used.
+        
+        Parameters
+        ----------
+        labels : List[Label]
+            The labels. The ones that already have docs are skipped.
+        
+        Returns
+        -------
+        None
+        """
+        for label in labels:
+            if label is not None and not label.has_doc():
+                Label.pending_docs[label.model][id(label)] = label
+
+    @classmethod
+    def clear_pending_docs(cls) -> None:
+        """Unregister all the labels in ``Label.pending_docs``."""
+        Label.pending_docs.clear()
+
+    @classmethod
+    def materialize_docs(cls, labels: List['Label']) -> None:
+        """Annotate the docs of the lazy labels with one ``nlp.pipe`` pass.
+        
+        Parameters
+        ----------
+        labels : List[Label]
+            The labels. The ones that already have docs are skipped.
+        
+        Returns
+        -------
+        None
+        """
+        labels = [ l for l in labels if l is not None and not l.has_doc() ]
+        docs = spacy_annotator.process_texts([ l.label for l in labels ])
+        for label, doc in zip(labels, docs):
+            label.doc = doc
+
+    def to_bytes(self) -> 'Label':
+        # a lazy doc is not annotated just for dumping.
+        return Target.to_bytes(self) if self.has_doc() else self
+
+    def from_bytes(self) -> 'Label':
+        return Target.from_bytes(self) if self.has_doc() else self
+
+    def serialize(self) -> Dict[str, any]:
+        getattr(self, 'doc', None)
+        return Target.serialize(self)
+
     def key(self) -> LabelKey:
         """Return the key of the label as a Named Tuple.
 
@@ -74,6 +163,16 @@ class Label(Target):
         """
         return f'qid:{self.qid}-vid:{self.vid}-model:{self.model}'
     
+    def get_text(self) -> str:
+        """Get the label string, without annotating the doc.
+        
+        Returns
+        -------
+        str
+            The string
+        """
+        return self.__dict__.get('label', None) or ''
+
     def get_label(self) -> str:
         """Get the label string.
         
@@ -115,6 +214,9 @@ class Label(Target):
             if key is None or val is None:
                 continue
             self.perform[str(key)] = float(val)
+        if self.vid == 0 and not self.is_groundtruth:
+            Label.performance_table.set_perform(
+                InstanceKey(qid=self.qid, vid=self.vid), self.model, self.perform)
     
     def get_perform(self, perform_name: str=None) -> float:
         """Get a performance metric from this label with the performance name.
@@ -226,15 +328,74 @@ class Label(Target):
             A dict of metrics: { metric_name: metric_score }
         """
         try:
-            if not Label.task_evaluation_func or len(Label.task_evaluation_func(pred, labels)) == 0:
+            metrics = Label.task_evaluation_func(pred, labels) if Label.task_evaluation_func else {}
+            if len(metrics) == 0:
                 print('Define the task evaluation function!')
                 return {}
-            else:
-                return Label.task_evaluation_func(pred, labels)
+            return metrics
         except Exception:
             print('[task_evaluator]')
             traceback.print_exc()
             return {}
+
+    @classmethod
+    def task_evaluator_batch(cls, 
+        preds: List[str], labels_list: List[Union[str, List[str]]], 
+        n_processes: int=1) -> List[Dict[str, float]]:
+        """The batched version of ``Label.task_evaluator``, through 
+        ``errudite.utils.evaluator.evaluate_batch``.
+        
+        Parameters
+        ----------
+        preds : List[str]
+            The predicted strings.
+        labels_list : List[Union[list, str]]
+            The groundtruth(s) of each prediction, aligned with ``preds``.
+        n_processes : int, optional
+            The number of processes, by default 1
+        
+        Returns
+        -------
+        List[Dict[str, float]]
+            The metrics of each prediction: { metric_name: metric_score }
+        """
+        if not Label.task_evaluation_func:
+            print('Define the task evaluation function!')
+            return [ {} for _ in preds ]
+        try:
+            return evaluate_batch(Label.task_evaluation_func, preds, labels_list, n_processes=n_processes)
+        except Exception:
+            # some inputs are invalid: evaluate them one by one, so only those get {}.
+            return [ Label.task_evaluator(pred, labels) for pred, labels in zip(preds, labels_list) ]
+
+    @classmethod
+    def compute_perform_batch(cls, 
+        labels: List['Label'], 
+        groundtruths_texts: List[Union[str, List[str]]],
+        n_processes: int=1) -> None:
+        """
+        Compute the performances of multiple labels in one pass, and save them 
+        to each ``label.perform``. The same as calling 
+        ``label.compute_perform(groundtruths_text=...)`` on every label.
+
+        Parameters
+        ----------
+        labels : List[Label]
+            The predictions.
+        groundtruths_texts : List[Union[str, List[str]]]
+            The groundtruth string(s) of each prediction, aligned with ``labels``.
+        n_processes : int, optional
+            The number of processes, by default 1
+        
+        Returns
+        -------
+        None
+        """
+        pairs = [ (label, g) for label, g in zip(labels, groundtruths_texts) if label and g ]
+        metrics_list = cls.task_evaluator_batch(
+            [ label.label for label, _ in pairs ], [ g for _, g in pairs ], n_processes)
+        for (label, _), metrics in zip(pairs, metrics_list):
+            label.set_perform(**metrics)
     
     @classmethod
     def resolve_default_perform_name(cls, perform_name: str=None) -> str:
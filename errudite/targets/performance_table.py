@@ -0,0 +1,242 @@
+from typing import List, Dict, Iterable
+import numpy as np
+
+from .interfaces import InstanceKey
+
+import logging
+logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+
+class PerformanceTable(object):
+    """
+    The performance metrics of all the models on the original instances, saved
+    as one dense ``float64`` array indexed by (instance row, model, metric), so
+    the correctness masks, the per-model averages and the error rates of any
+    instance slice are numpy reductions instead of scans over ``Label.perform``.
+
+    ``Label.perform`` stays the per-label copy: ``Label.set_perform`` writes
+    through to the table, and ``Instance.get_perform`` / ``Instance.is_incorrect``
+    read from the table when the instance is covered. Adding a model
+    (or a metric) appends one slice to the array.
+
+    Attributes
+    ----------
+    rows : Dict[InstanceKey, int]
+        ``{ InstanceKey: row index }``, only the original instances.
+    models : List[str]
+        The model of each column.
+    metrics : List[str]
+        The metric names of the last axis.
+    values : np.ndarray
+        ``(n_rows, n_models, n_metrics)``, ``NaN`` denotes a missing metric.
+    has_label : np.ndarray
+        ``(n_rows, n_models)``, whether the model has a prediction on the instance.
+    """
+    def __init__(self) -> None:
+        self.rows: Dict[InstanceKey, int] = {}
+        self.models: List[str] = []
+        self.model_idxes: Dict[str, int] = {}
+        self.metrics: List[str] = []
+        self.metric_idxes: Dict[str, int] = {}
+        self.values = np.zeros((0, 0, 0), dtype=np.float64)
+        self.has_label = np.zeros((0, 0), dtype=bool)
+
+    def __contains__(self, model: str) -> bool:
+        return model in self.model_idxes
+
+    def covers(self, keys: Iterable[InstanceKey]) -> bool:
+        """Whether all the keys are rows of the table. A set comparison of
+        the key views, so a ``{ InstanceKey: ... }`` hash is not scanned in Python."""
+        if not self.rows:
+            return False
+        if isinstance(keys, dict):
+            keys = keys.keys()
+        elif not isinstance(keys, (set, frozenset, type({}.keys()))):
+            keys = set(keys)
+        return self.rows.keys() >= keys
+
+    def set_rows(self, keys: List[InstanceKey]) -> bool:
+        """
+        Set the instance rows. If the rows are changed, all the saved
+        metrics are dropped.
+
+        Parameters
+        ----------
+        keys : List[InstanceKey]
+            The keys of the original instances.
+
+        Returns
+        -------
+        bool
+            Whether or not the rows are changed.
+        """
+        rows = { key: idx for idx, key in enumerate(keys) }
+        if rows == self.rows:
+            return False
+        self.__init__()
+        self.rows = rows
+        self.values = np.zeros((len(rows), 0, 0), dtype=np.float64)
+        self.has_label = np.zeros((len(rows), 0), dtype=bool)
+        return True
+
+    def _add_model(self, model: str) -> int:
+        if model not in self.model_idxes:
+            self.model_idxes[model] = len(self.models)
+            self.models.append(model)
+            self.values = np.concatenate([ self.values, np.full(
+                (len(self.rows), 1, len(self.metrics)), np.nan, dtype=np.float64) ], axis=1)
+            self.has_label = np.concatenate([ self.has_label,
+                np.zeros((len(self.rows), 1), dtype=bool) ], axis=1)
+        return self.model_idxes[model]
+
+    def _add_metric(self, metric: str) -> int:
+        if metric not in self.metric_idxes:
+            self.metric_idxes[metric] = len(self.metrics)
+            self.metrics.append(metric)
+            self.values = np.concatenate([ self.values, np.full(
+                (len(self.rows), len(self.models), 1), np.nan, dtype=np.float64) ], axis=2)
+        return self.metric_idxes[metric]
+
+    def set_perform(self, key: InstanceKey, model: str, perform: Dict[str, float]) -> bool:
+        """
+        Save the metrics of one prediction.
+
+        Parameters
+        ----------
+        key : InstanceKey
+            The instance key.
+        model : str
+            The model of the prediction.
+        perform : Dict[str, float]
+            ``{ metric name: score }``, i.e., ``Label.perform``.
+
+        Returns
+        -------
+        bool
+            If saved. Keys that are not rows of the table are skipped.
+        """
+        if key not in self.rows:
+            return False
+        midx = self._add_model(model)
+        metric_idxes = [ self._add_metric(metric) for metric in perform ]
+        row = self.rows[key]
+        self.has_label[row, midx] = True
+        self.values[row, midx, metric_idxes] = [ perform[metric] for metric in perform ]
+        return True
+
+    def add_model(self, model: str, labels: Dict[InstanceKey, 'Label']) -> None:
+        """
+        Add (or replace) the slice of one model, from the predictions.
+
+        Parameters
+        ----------
+        model : str
+            The model name.
+        labels : Dict[InstanceKey, Label]
+            ``{ InstanceKey: prediction of the model }``. ``None`` for missing predictions.
+
+        Returns
+        -------
+        None
+        """
+        midx = self._add_model(model)
+        self.has_label[:, midx] = False
+        self.values[:, midx, :] = np.nan
+        for metric in set([ m for l in labels.values() if l for m in l.perform ]):
+            self._add_metric(metric)
+        for key, label in labels.items():
+            if label is None or key not in self.rows:
+                continue
+            row = self.rows[key]
+            self.has_label[row, midx] = True
+            for metric, score in label.perform.items():
+                self.values[row, midx, self.metric_idxes[metric]] = score
+        logger.info(f"Added the performance of [ {model} ] on {int(self.has_label[:, midx].sum())} instances.")
+
+    def remove_model(self, model: str) -> None:
+        if model not in self.model_idxes:
+            return
+        midx = self.model_idxes[model]
+        self.values = np.delete(self.values, midx, axis=1)
+        self.has_label = np.delete(self.has_label, midx, axis=1)
+        self.models.pop(midx)
+        self.model_idxes = { m: idx for idx, m in enumerate(self.models) }
+
+    def _get_row_idxes(self, keys: Iterable[InstanceKey]=None) -> np.ndarray:
+        if keys is None:
+            return np.arange(len(self.rows))
+        return np.array([ self.rows[key] for key in keys if key in self.rows ], dtype=np.int64)
+
+    def get(self, key: InstanceKey, model: str, metric: str) -> float:
+        """
+        Get one metric, the same as ``prediction.get_perform(metric)``.
+
+        Returns
+        -------
+        float
+            The score. ``None`` if the instance or the model prediction is not
+            in the table, or if the prediction does not have the metric, so the
+            caller can fall back to ``Label.get_perform``.
+        """
+        if key not in self.rows or model not in self.model_idxes or metric not in self.metric_idxes:
+            return None
+        row, midx = self.rows[key], self.model_idxes[model]
+        if not self.has_label[row, midx]:
+            return None
+        score = self.values[row, midx, self.metric_idxes[metric]]
+        return None if np.isnan(score) else float(score)
+
+    def get_scores(self, model: str, metric: str, keys: Iterable[InstanceKey]=None) -> np.ndarray:
+        """
+        Get the scores of one metric on multiple instances with one gather.
+
+        Returns
+        -------
+        np.ndarray
+            The ``float64`` scores, of the keys that are rows of the table
+            (by default all the rows). Missing metrics are 0.
+        """
+        idxes = self._get_row_idxes(keys)
+        if model not in self.model_idxes or metric not in self.metric_idxes:
+            return np.zeros(len(idxes), dtype=np.float64)
+        scores = self.values[idxes, self.model_idxes[model], self.metric_idxes[metric]]
+        return np.nan_to_num(scores, nan=0)
+
+    def incorrect_mask(self, model: str, metric: str) -> np.ndarray:
+        """
+        The correctness of all the rows, the same as ``Instance.is_incorrect``:
+        a prediction is incorrect when the metric is below 1, and the instances
+        without a prediction are not incorrect.
+
+        Returns
+        -------
+        np.ndarray
+            A bool mask, aligned with the rows.
+        """
+        if model not in self.model_idxes:
+            return np.zeros(len(self.rows), dtype=bool)
+        return self.has_label[:, self.model_idxes[model]] & (self.get_scores(model, metric) < 1)
+
+    def is_incorrect(self, key: InstanceKey, model: str, metric: str) -> bool:
+        """The correctness of one instance, ``None`` if it is not in the table."""
+        score = self.get(key, model, metric)
+        return None if score is None else score < 1
+
+    def average(self, model: str, metrics: List[str], keys: Iterable[InstanceKey]=None) -> Dict[str, float]:
+        """
+        The averaged metrics of a model, over the keys (by default all the rows).
+
+        Returns
+        -------
+        Dict[str, float]
+            ``{ metric: averaged score }``
+        """
+        idxes = self._get_row_idxes(keys)
+        if not len(idxes):
+            return { metric: 0 for metric in metrics }
+        return { metric: float(self.get_scores(model, metric)[idxes].mean(dtype=np.float64))
+            for metric in metrics }
+
+    def count_incorrect(self, model: str, metric: str, keys: Iterable[InstanceKey]=None) -> int:
+        """The number of incorrect predictions among the keys (by default all the rows)."""
+        return int(self.incorrect_mask(model, metric)[self._get_row_idxes(keys)].sum())
@@ -7,6 +7,8 @@ from ...task_helpers.qa.qc_ner import classify_answer
 from ...utils.evaluator import qa_score
 
 class Answer(SpanLabel):
+    lazy_attrs: List[str] = [ 'doc', 'answer_type' ]
+
     def __init__(self, 
         model: str,
         qid: str, 
@@ -30,7 +32,19 @@ class Answer(SpanLabel):
         self.sid = -1 # sentence id
         Label.set_task_evaluator(qa_score, 'f1')
         # the following only matters for predicted results.
-        self.answer_type = answer_type if answer_type else self.get_answer_type()
+        # if not given, it's classified when first used (see ``__getattr__``).
+        if answer_type:
+            self.answer_type = answer_type
+
+    def __getattr__(self, name: str) -> any:
+        if name == 'answer_type' and 'label' in self.__dict__:
+            self.answer_type = self.get_answer_type()
+            return self.answer_type
+        return SpanLabel.__getattr__(self, name)
+
+    def serialize(self) -> Dict[str, any]:
+        getattr(self, 'answer_type', None)
+        return SpanLabel.serialize(self)
     
     def get_answer_type(self):
         """Classify the answer type based on TREC classifier
@@ -101,10 +115,10 @@ class QAAnswer(Answer):
 
         # if nothing is given, try to get the span_start based on index
         if char_start is None and span_start is None:
-            if self.doc.text in context.doc.text:
-                char_start = context.doc.text.index(self.doc.text)
+            if self.label in context.doc.text:
+                char_start = context.doc.text.index(self.label)
             else:
-                answer_str = re.sub('[^A-Za-z0-9 ]', '', self.doc.text)
+                answer_str = re.sub('[^A-Za-z0-9 ]', '', self.label)
                 context_str = re.sub('[^A-Za-z0-9 ]', '', context.doc.text)
                 if answer_str in context_str:
                     char_start = context_str.index(answer_str)
@@ -121,7 +135,22 @@ class QAAnswer(Answer):
                 break
         # global level offset.
         self.span_start = span_start #- sentence.start
-        self.span_end = self.span_start + len(self.doc)
+        if self.has_doc():
+            self.span_end = self.span_start + len(self.doc)
+        else:
+            self.span_end = self._get_span_end(context)
+
+    def _get_span_end(self, context: Context) -> int:
+        """The span level end offset, counted on the context tokens that the 
+        answer text covers, so the answer itself does not need to be annotated."""
+        text = self.label.strip()
+        if not text or self.span_start < 0 or self.span_start >= len(context.doc):
+            return self.span_start + (1 if text else 0)
+        char_end = context.doc[self.span_start].idx + len(text)
+        span_end = self.span_start + 1
+        while span_end < len(context.doc) and context.doc[span_end].idx < char_end:
+            span_end += 1
+        return span_end
 
     def compute_perform(self, groundtruths: List['Answer']=None, groundtruths_text: List[str]=None) -> None:
         '''
@@ -132,9 +161,9 @@ class QAAnswer(Answer):
             if groundtruths:
                 self.perform['sent'] = 1 if any([g.sid == self.sid for g in groundtruths]) else 0
             if not groundtruths_text and groundtruths:
-                groundtruths_text = [g.doc.text for g in groundtruths]
+                groundtruths_text = [g.label for g in groundtruths]
             if groundtruths_text:
-                perform = qa_score(self.doc.text, groundtruths_text)
+                perform = qa_score(self.label, groundtruths_text)
                 for key, val in perform.items():
                     self.perform[key] = val
             return self.perform
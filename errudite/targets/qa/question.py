@@ -26,7 +26,20 @@ class Question(Target):
         question_type: str=None,
         metas: Dict[str, any]={}) -> None:
         Target.__init__(self, qid, text, vid, annotator=annotator, metas=metas)
-        self.question_type = question_type if question_type else self.get_question_type()
+        # if not given, it's computed when first used (see ``__getattr__``), 
+        # i.e., in batch by ``DatasetReader.compute_type_columns`` for the dataset.
+        if question_type:
+            self.question_type = question_type
+
+    def __getattr__(self, name: str) -> any:
+        if name == 'question_type' and 'doc' in self.__dict__:
+            self.question_type = self.get_question_type()
+            return self.question_type
+        raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'")
+
+    def serialize(self) -> Dict[str, any]:
+        getattr(self, 'question_type', None)
+        return Target.serialize(self)
 
     def get_question_type(self) -> str:
         """get the question type
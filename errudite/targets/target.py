@@ -21,6 +21,7 @@ class Target(object):
         will automatically grow.
     annotator : SpacyAnnotator, optional
         The annotator, by default None. If None, use the default annotator.
+        The doc is shared with other targets that have the same text.
     metas : Dict[str, any], optional
         Additional metas associated with a target, in the format of {key: value}, by default {}
     """
@@ -36,7 +37,7 @@ class Target(object):
         if text is not None:
             if not annotator:
                 annotator = spacy_annotator
-            self.doc: Doc = annotator.model(text)
+            self.doc: Doc = annotator.process_text(text)
         else:
             self.doc = None
         self.metas = metas
@@ -0,0 +1,225 @@
+from typing import List, Dict
+from collections import Counter
+import hashlib
+import numpy as np
+
+from .interfaces import InstanceKey
+
+import logging
+logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+#: The column name of the question types.
+QUESTION_COLUMN = 'question'
+#: The column name of the (majority) answer types of the groundtruths.
+GROUNDTRUTH_COLUMN = 'groundtruths'
+MISSING = -1
+
+
+def get_answer_type(answers: List['Answer']) -> str:
+    """
+    Get the majority answer type of a list of answers.
+    ``VQAAnswer`` s are weighted by their ``count``.
+
+    Parameters
+    ----------
+    answers : List[Answer]
+        The answers.
+
+    Returns
+    -------
+    str
+        The majority answer type. ``None`` if any of the input
+        does not have an answer type.
+    """
+    answer_types = []
+    for a in answers:
+        if a.__class__.__name__ == 'VQAAnswer':
+            answer_types += [ a.answer_type ] * a.count
+        elif 'Answer' in a.__class__.__name__:
+            answer_types.append(a.answer_type)
+        else:
+            return None
+    if not answer_types:
+        return None
+    answer_type, _ = Counter(answer_types).most_common()[0]
+    return answer_type
+
+
+def get_signature(texts: List[str]) -> str:
+    """
+    A digest of the texts a column is computed from, aligned with the rows,
+    so a column can be recomputed when its predictions are replaced.
+
+    Parameters
+    ----------
+    texts : List[str]
+        The texts, e.g., the labels of one model's predictions. ``None`` for missing ones.
+
+    Returns
+    -------
+    str
+        The md5 digest.
+    """
+    digest = hashlib.md5()
+    for text in texts:
+        digest.update(b'\x00' if text is None else text.encode('utf-8') + b'\x01')
+    return digest.hexdigest()
+
+
+class TypeColumns(object):
+    """
+    Precomputed question/answer types of the original instances, saved as
+    dictionary-encoded columns: every column is an ``int16`` array aligned
+    with the instance rows, and the codes index into a shared ``categories`` list.
+
+    The columns include the question types (``question``), the majority answer
+    types of the groundtruths (``groundtruths``), and the answer types of the
+    predictions, with one column per model (named by the model).
+
+    Attributes
+    ----------
+    rows : Dict[InstanceKey, int]
+        ``{ InstanceKey: row index }``
+    categories : List[str]
+        The distinct type strings. The codes are their indexes.
+    columns : Dict[str, np.ndarray]
+        ``{ column name: codes }``. ``-1`` denotes missing values.
+    signatures : Dict[str, str]
+        ``{ column name: signature }``, see ``get_signature``.
+    """
+    def __init__(self) -> None:
+        self.rows: Dict[InstanceKey, int] = {}
+        self.categories: List[str] = []
+        self.category_idxes: Dict[str, int] = {}
+        self.columns: Dict[str, np.ndarray] = {}
+        self.signatures: Dict[str, str] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def is_current(self, name: str, signature: str) -> bool:
+        """Whether the column is computed from the texts with the signature."""
+        return name in self.columns and self.signatures.get(name, None) == signature
+
+    def _encode(self, value: str) -> int:
+        if value is None:
+            return MISSING
+        if value not in self.category_idxes:
+            self.category_idxes[value] = len(self.categories)
+            self.categories.append(value)
+        return self.category_idxes[value]
+
+    def set_rows(self, keys: List[InstanceKey]) -> bool:
+        """
+        Set the instance rows. If the rows are changed,
+        all the computed columns are dropped.
+
+        Parameters
+        ----------
+        keys : List[InstanceKey]
+            The keys of the original instances.
+
+        Returns
+        -------
+        bool
+            Whether or not the rows are changed.
+        """
+        rows = { key: idx for idx, key in enumerate(keys) }
+        if rows == self.rows:
+            return False
+        self.rows = rows
+        self.columns = {}
+        self.signatures = {}
+        return True
+
+    def add_column(self, name: str, values: Dict[InstanceKey, str], signature: str=None) -> None:
+        """
+        Encode and save one column.
+
+        Parameters
+        ----------
+        name : str
+            The column name.
+        values : Dict[InstanceKey, str]
+            ``{ InstanceKey: type }``. Keys that are not
+            in the rows are ignored.
+        signature : str, optional
+            The signature of the texts the types are computed from, by default None.
+
+        Returns
+        -------
+        None
+        """
+        column = np.full(len(self.rows), MISSING, dtype=np.int16)
+        for key, value in values.items():
+            if key in self.rows:
+                column[self.rows[key]] = self._encode(value)
+        self.columns[name] = column
+        self.signatures[name] = signature
+
+    def remove_column(self, name: str) -> None:
+        if name in self.columns:
+            del self.columns[name]
+        self.signatures.pop(name, None)
+
+    def get(self, name: str, key: InstanceKey) -> str:
+        """
+        Get one type value.
+
+        Parameters
+        ----------
+        name : str
+            The column name.
+        key : InstanceKey
+            The instance key.
+
+        Returns
+        -------
+        str
+            The type. ``None`` if it is not precomputed.
+        """
+        if name not in self.columns or key not in self.rows:
+            return None
+        code = self.columns[name][self.rows[key]]
+        return self.categories[code] if code != MISSING else None
+
+    def get_column(self, name: str, keys: List[InstanceKey]) -> List[str]:
+        """
+        Get the type values of multiple instances with one gather.
+
+        Parameters
+        ----------
+        name : str
+            The column name.
+        keys : List[InstanceKey]
+            The instance keys.
+
+        Returns
+        -------
+        List[str]
+            The types, aligned with the keys. ``None`` if not precomputed.
+        """
+        if name not in self.columns or not self.rows:
+            return [ None ] * len(keys)
+        idxes = np.array([ self.rows.get(key, -1) for key in keys ], dtype=np.int64)
+        codes = np.where(idxes >= 0, self.columns[name][idxes], MISSING)
+        return [ self.categories[c] if c != MISSING else None for c in codes ]
+
+    def serialize(self) -> Dict[str, any]:
+        return {
+            'rows': self.rows,
+            'categories': self.categories,
+            'columns': self.columns,
+            'signatures': self.signatures
+        }
+
+    @classmethod
+    def create_from_json(cls, raw: Dict[str, any]) -> 'TypeColumns':
+        type_columns = cls()
+        type_columns.rows = raw['rows']
+        type_columns.categories = raw['categories']
+        type_columns.category_idxes = { c: idx for idx, c in enumerate(raw['categories']) }
+        type_columns.columns = raw['columns']
+        # the files saved without signatures are recomputed once.
+        type_columns.signatures = raw.get('signatures', {})
+        return type_columns
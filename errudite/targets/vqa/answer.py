@@ -25,13 +25,19 @@ class VQAAnswer(Answer):
             'accuracy': 0, 'confidence': 0
         }
         if not self.is_groundtruth or not answer_type:
-            self.answer_type = self.rectify_answer_type()
+            # rectified when first used.
+            self.__dict__.pop('answer_type', None)
+
+    def get_answer_type(self):
+        return self.rectify_answer_type()
 
     def rectify_answer_type(self):
-        if not self.doc:
+        if not self.label:
             return 'other'
-        if self.doc.text.lower() in ['yes', 'no']:
+        if self.label.lower() in ['yes', 'no']:
             return 'yes/no'
+        if not self.doc:
+            return 'other'
         if any([i.pos_ == "NUM" or i.is_digit for i in self.doc]):
             return 'number'
         return 'other'
@@ -46,10 +52,10 @@ class VQAAnswer(Answer):
                 groundtruths = convert_list(groundtruths)
                 groundtruths_text = []
                 for g in groundtruths:
-                    groundtruths_text += [ g.doc.text ] * g.count
+                    groundtruths_text += [ g.label ] * g.count
             if groundtruths_text:
                 groundtruths_text = convert_list(groundtruths_text)
-                self.perform['accuracy'] = vqa_accuracy(self.doc.text, groundtruths_text)['accuracy']
+                self.perform['accuracy'] = vqa_accuracy(self.label, groundtruths_text)['accuracy']
                 return self.perform
         except ValueError:
             print('[_compute_performance]')
@@ -1,6 +1,8 @@
 import sys
+import functools
+from multiprocessing import Pool
 
-from typing import Union, List, Dict, Callable
+from typing import Union, List, Dict, Callable, Tuple
 from collections import Counter, defaultdict
 
 from ..processor.helpers import normalize_text
@@ -39,7 +41,7 @@ def f1_score(prediction: str, ground_truth: str) -> Dict[str, float]:
     else:
         prediction_tokens = normalize_text(prediction).split()
     if type(ground_truth) == list:
-        ground_truth_tokens = prediction
+        ground_truth_tokens = ground_truth
     else:
         ground_truth_tokens = normalize_text(ground_truth).split()
     common = Counter(prediction_tokens) & Counter(ground_truth_tokens)
@@ -80,20 +82,49 @@ def metric_max_over_ground_truths(metric_fn: Callable[[str, str], Dict],
     scores_for_ground_truths = sorted(scores_for_ground_truths, key=lambda d: d[key], reverse=True)
     return scores_for_ground_truths[0]
 
+# the same answers are normalized again and again (groundtruths shared by 
+# all the models and rewrites, repeated predictions), so they are memoized.
+NORMALIZE_CACHE_SIZE = 2 ** 18
+
+@functools.lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_tokens(text: str) -> Tuple[Tuple[str], Counter]:
+    tokens = tuple(normalize_text(text).split())
+    return tokens, Counter(tokens)
+
+@functools.lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_vqa_answer(text: str) -> str:
+    return normalize_answer(text)
+
+def _qa_score_normalized(prediction: str, ground_truths: List[str]) -> Dict[str, float]:
+    # em and f1 from the memoized tokens: normalize_text joins the split tokens,
+    # so comparing the tokens is the same as comparing the normalized strings.
+    pred_tokens, pred_counter = _normalize_tokens(prediction)
+    em, f1_set = 0, None
+    for ground_truth in convert_list(ground_truths):
+        gt_tokens, gt_counter = _normalize_tokens(ground_truth)
+        em = max(em, int(pred_tokens == gt_tokens))
+        num_same = sum((pred_counter & gt_counter).values())
+        if num_same == 0:
+            scores = {'f1': 0, 'precision': 0, 'recall': 0}
+        else:
+            precision = 1.0 * num_same / len(pred_tokens)
+            recall = 1.0 * num_same / len(gt_tokens)
+            scores = {'f1': (2 * precision * recall) / (precision + recall), 
+                'precision': precision, 'recall': recall}
+        # same as metric_max_over_ground_truths: the first one with the max f1.
+        if f1_set is None or scores['f1'] > f1_set['f1']:
+            f1_set = scores
+    if f1_set is None:
+        raise(ConfigurationError("Empty groundtruths given to [ qa_score ]"))
+    return { 'em': em, 'f1': f1_set['f1'], 'precision': f1_set['precision'], 'recall': f1_set['recall'] }
+
 def qa_score(prediction: str, ground_truths: List[str]):
     try:
         if prediction is None:
             raise(ConfigurationError("No prediction given to [ qa_score ]"))
         if ground_truths is None:
             raise(ConfigurationError("No groundtruths given to [ qa_score ]"))
-        perform = {}
-        em_set = metric_max_over_ground_truths(exact_match_score, prediction, ground_truths, 'em')
-        f1_set = metric_max_over_ground_truths(f1_score, prediction, ground_truths, 'f1')
-        perform['em'] = em_set['em']
-        perform['f1'] = f1_set['f1']
-        perform['precision'] = f1_set['precision']
-        perform['recall'] = f1_set['recall']
-        return perform
+        return _qa_score_normalized(prediction, ground_truths)
     except:
         raise
 
@@ -103,10 +134,50 @@ def vqa_accuracy(prediction: str, ground_truths: List[str]) -> Dict[str, float]:
             raise(ConfigurationError("No prediction given to [ qa_score ]"))
         if ground_truths is None:
             raise(ConfigurationError("No groundtruths given to [ qa_score ]"))
-        groundtruths_text = [ normalize_answer(ans) for ans in ground_truths ]
-        prediction = normalize_answer(prediction)
-        matchs = [ g for g in groundtruths_text if g == prediction ]
+        prediction = _normalize_vqa_answer(prediction)
+        matchs = [ g for g in ground_truths if _normalize_vqa_answer(g) == prediction ]
         acc = min(1, float(len(matchs))/3)
         return { 'accuracy': acc }
     except:
-        raise
\ No newline at end of file
+        raise
+
+def _evaluate_chunk(metric_fn: Callable, predictions: List[str], ground_truths: List[List[str]]) -> List[Dict[str, float]]:
+    return [ metric_fn(p, g) for p, g in zip(predictions, ground_truths) ]
+
+def evaluate_batch(
+    metric_fn: Callable[[str, Union[str, List[str]]], Dict[str, float]],
+    predictions: List[str], 
+    ground_truths: List[Union[str, List[str]]],
+    n_processes: int=1,
+    chunk_size: int=5000) -> List[Dict[str, float]]:
+    """Evaluate N predictions against their groundtruths in one pass. 
+    With ``qa_score`` and ``vqa_accuracy``, every distinct answer string 
+    is normalized only once, and the groundtruths shared across predictions 
+    (e.g., the predictions of multiple models and rewrites on the same instance)
+    are not re-normalized.
+    
+    Arguments:
+        metric_fn {Callable} -- the single-prediction evaluator, e.g. ``qa_score``.
+        predictions {List[str]} -- the prediction strings.
+        ground_truths {List[Union[str, List[str]]]} -- the groundtruth(s) of 
+            each prediction, aligned with the predictions.
+    
+    Keyword Arguments:
+        n_processes {int} -- if > 1, split the predictions into chunks and 
+            evaluate them in a process pool. Each process keeps its own 
+            normalization cache. (default: {1})
+        chunk_size {int} -- the number of predictions per chunk. (default: {5000})
+    
+    Returns:
+        List[Dict[str, float]] -- the metrics of each prediction, aligned with the predictions.
+    """
+    if len(predictions) != len(ground_truths):
+        raise(ConfigurationError(
+            f"[ evaluate_batch ]: {len(predictions)} predictions but {len(ground_truths)} groundtruths."))
+    if n_processes <= 1 or len(predictions) <= chunk_size:
+        return _evaluate_chunk(metric_fn, predictions, ground_truths)
+    chunks = [ (metric_fn, predictions[i:i+chunk_size], ground_truths[i:i+chunk_size]) 
+        for i in range(0, len(predictions), chunk_size) ]
+    with Pool(n_processes) as pool:
+        outputs = pool.starmap(_evaluate_chunk, chunks)
+    return [ o for output in outputs for o in output ]
\ No newline at end of file
@@ -0,0 +1,120 @@
+from typing import Union, List, Tuple
+import math
+import numpy as np
+
+# the default confidence level is 1 - ALPHA.
+ALPHA = 0.05
+N_RESAMPLES = 2000
+# the number of (resample, instance) cells in one weight matrix.
+MAX_BOOTSTRAP_CELLS = 5 * 10 ** 6
+# two-sided z for the common alphas; others are solved from the normal cdf.
+Z_SCORES = { 0.1: 1.6448536, 0.05: 1.9599640, 0.01: 2.5758293 }
+
+
+def _z_score(alpha: float) -> float:
+    if alpha in Z_SCORES:
+        return Z_SCORES[alpha]
+    # bisect the normal cdf: 1 - alpha / 2 = (1 + erf(z / sqrt(2))) / 2
+    low, high = 0.0, 10.0
+    for _ in range(60):
+        mid = (low + high) / 2
+        if math.erf(mid / math.sqrt(2)) < 1 - alpha:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2
+
+def wilson_interval(
+    counts: Union[int, np.ndarray],
+    totals: Union[int, np.ndarray],
+    alpha: float=ALPHA) -> Tuple[np.ndarray, np.ndarray]:
+    """The Wilson score intervals of rates, e.g., error rates and flip rates.
+    Works on scalars and arrays alike; empty totals get (0, 0).
+
+    Arguments:
+        counts {Union[int, np.ndarray]} -- the number of events, e.g., incorrect predictions.
+        totals {Union[int, np.ndarray]} -- the number of trials, e.g., the group sizes.
+        alpha {float} -- the significance level. (default: {0.05})
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray] -- the lower and the upper bounds.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    totals = np.asarray(totals, dtype=np.float64)
+    z = _z_score(alpha)
+    safe_totals = np.maximum(totals, 1)
+    rates = counts / safe_totals
+    denominator = 1 + z ** 2 / safe_totals
+    center = (rates + z ** 2 / (2 * safe_totals)) / denominator
+    margin = z * np.sqrt(rates * (1 - rates) / safe_totals + z ** 2 / (4 * safe_totals ** 2)) / denominator
+    empty = totals == 0
+    lower = np.where(empty, 0, np.clip(center - margin, 0, 1))
+    upper = np.where(empty, 0, np.clip(center + margin, 0, 1))
+    return lower, upper
+
+def bootstrap_means(
+    values: np.ndarray,
+    n_resamples: int=N_RESAMPLES,
+    seed: int=0) -> np.ndarray:
+    """Bootstrap the means of the values. The resamples are drawn as one
+    ``(n_resamples, n)`` matrix of row weights, so the resampled means of all
+    the columns are one matrix product (chunked to bound the memory). Columns are resampled
+    together, i.e., the rows are paired (e.g., two models on the same instances).
+
+    Arguments:
+        values {np.ndarray} -- ``(n, )`` or ``(n, k)`` values, e.g., 0/1 correctness, or metric scores.
+        n_resamples {int} -- the number of resamples. (default: {2000})
+        seed {int} -- the random seed, so the intervals are stable across requests. (default: {0})
+
+    Returns:
+        np.ndarray -- ``(n_resamples, )`` or ``(n_resamples, k)`` resampled means.
+            Zeros if there are no values.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = values.shape[0]
+    if n == 0:
+        return np.zeros((n_resamples, ) + values.shape[1:], dtype=np.float64)
+    rng = np.random.RandomState(seed)
+    chunk_size = max(1, MAX_BOOTSTRAP_CELLS // n)
+    means = []
+    for start in range(0, n_resamples, chunk_size):
+        size = min(chunk_size, n_resamples - start)
+        # the weight of each row in each resample = how many times it is drawn.
+        draws = rng.randint(0, n, size=(size, n)) + np.arange(size)[:, None] * n
+        weights = np.bincount(draws.ravel(), minlength=size * n).reshape(size, n)
+        means.append(weights @ values / n)
+    return np.concatenate(means, axis=0)
+
+def percentile_interval(samples: np.ndarray, alpha: float=ALPHA) -> Tuple[np.ndarray, np.ndarray]:
+    """The percentile interval of bootstrapped samples, along the first axis."""
+    lower, upper = np.percentile(samples, [ 100 * alpha / 2, 100 * (1 - alpha / 2) ], axis=0)
+    return lower, upper
+
+def bootstrap_interval(
+    values: np.ndarray,
+    alpha: float=ALPHA,
+    n_resamples: int=N_RESAMPLES,
+    seed: int=0) -> Tuple[np.ndarray, np.ndarray]:
+    """The bootstrap percentile intervals of the means of the values,
+    e.g., the average delta performance of the rewritten instances.
+
+    Arguments:
+        values {np.ndarray} -- ``(n, )`` or ``(n, k)`` values.
+        alpha {float} -- the significance level. (default: {0.05})
+        n_resamples {int} -- the number of resamples. (default: {2000})
+        seed {int} -- the random seed. (default: {0})
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray] -- the lower and the upper bounds.
+    """
+    return percentile_interval(bootstrap_means(values, n_resamples, seed), alpha)
+
+def rate_interval(count: int, total: int, alpha: float=ALPHA) -> List[float]:
+    """The json-friendly ``[lower, upper]`` Wilson interval of one rate."""
+    lower, upper = wilson_interval(count, total, alpha)
+    return [ float(lower), float(upper) ]
+
+def mean_interval(values: List[float], alpha: float=ALPHA, n_resamples: int=N_RESAMPLES) -> List[float]:
+    """The json-friendly ``[lower, upper]`` bootstrap interval of one mean."""
+    lower, upper = bootstrap_interval(np.asarray(values, dtype=np.float64), alpha, n_resamples)
+    return [ float(lower), float(upper) ]
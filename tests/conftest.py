@@ -0,0 +1,57 @@
+import random
+from collections import defaultdict
+from typing import List
+import pytest
+
+from errudite.utils import set_cache_folder
+from errudite.targets.instance import Instance
+from errudite.targets.label import Label
+from errudite.targets.interfaces import InstanceKey
+from errudite.targets.performance_table import PerformanceTable
+from errudite.targets.type_columns import TypeColumns
+
+
+@pytest.fixture(autouse=True)
+def clean_state(tmp_path):
+    """Every test gets its own cache folder, and empty class-level hashes and tables."""
+    set_cache_folder(str(tmp_path))
+    Instance.qid_hash = defaultdict(list)
+    Instance.instance_hash = defaultdict(lambda: None)
+    Instance.instance_hash_rewritten = defaultdict(lambda: None)
+    Instance.type_columns = TypeColumns()
+    Instance.rewritten_store = None
+    Instance.model = None
+    Label.performance_table = PerformanceTable()
+    Label.clear_pending_docs()
+    yield
+    Instance.rewritten_store = None
+
+
+@pytest.fixture
+def build_label_instances():
+    """A factory of instances with random predictions from the models, 
+    with the rows of the performance table set."""
+    Instance.set_entry_keys([ 'predictions' ])
+    Label.set_task_evaluator(lambda pred, labels: {}, 'f1')
+    def build(models: List[str], 
+        n: int=50, seed: int=0, missing_rate: float=0.2, 
+        f1s: List[float]=[ 0, 0.1, 0.5, 1 ], with_confidence: bool=True) -> List[InstanceKey]:
+        rand = random.Random(seed)
+        keys = [ InstanceKey(qid=str(i), vid=0) for i in range(n) ]
+        Label.performance_table.set_rows(keys)
+        for key in keys:
+            instance = Instance(qid=key.qid, vid=0)
+            predictions = []
+            for model in models:
+                if rand.random() < missing_rate:
+                    continue  # a missing prediction
+                prediction = Label(model, key.qid, 'text', 0)
+                perform = { 'f1': rand.choice(f1s) }
+                if with_confidence:
+                    perform['confidence'] = rand.random()
+                prediction.set_perform(**perform)
+                predictions.append(prediction)
+            instance.set_entries(predictions=predictions)
+            Instance.save(instance)
+        return keys
+    return build
@@ -0,0 +1,83 @@
+import random
+
+from errudite.targets.instance import Instance
+from errudite.targets.target import Target
+from errudite.targets.interfaces import UNREWRITTEN_RID
+from errudite.build_blocks.prim_func import PrimFunc
+from errudite.build_blocks.prim_funcs.length import length, length_batch
+from errudite.build_blocks.wrapper import BuildBlockWrapper
+
+
+COUNTED = []
+
+
+@PrimFunc.register('counted_length')
+def counted_length(docs) -> int:
+    return length(docs)
+
+
+@PrimFunc.register_batch('counted_length')
+def counted_length_batch(docs) -> list:
+    COUNTED.append(len(docs))
+    return length_batch(docs)
+
+
+WORDS = [ 'cat', 'dog', 'red', '12', '3.5', 'how', 'many' ]
+
+
+def setup_function():
+    Instance.set_entry_keys([ 'question', 'context' ])
+    COUNTED.clear()
+
+
+def build_instance_groups(n: int=60, seed: int=0):
+    rand = random.Random(seed)
+    groups = []
+    for i in range(n):
+        qid = str(i)
+        instance = Instance(qid=qid, vid=0)
+        instance.set_entries(
+            question=Target(qid, ' '.join(rand.choices(WORDS, k=rand.randint(1, 6)))),
+            context=Target(qid, ' '.join(rand.choices(WORDS, k=rand.randint(1, 2)))))
+        Instance.save(instance)
+        groups.append({ instance.rid: instance })
+    return groups
+
+
+def brute_test_instances(wrapper: BuildBlockWrapper, instance_groups):
+    output = {}
+    for instance_group in instance_groups:
+        value = wrapper.operator.get_value(
+            instance_group=instance_group, attr_hash={}, group_hash={})
+        if value.value == True:
+            output[list(set(value.key))[0]] = value.value
+    return output
+
+
+def test_batch_equals_the_instance_path():
+    groups = build_instance_groups()
+    for cmd in [
+        'length(question) > 3',
+        'length(question) > 3 and is_digit(context)',
+        'length(question) > 3 or length(context) < 2',
+        'is_digit(context) or length(question) <= 2 or length(context) == 2',
+        'length(question) > 1 and length(context) > 1 and not is_digit(context)' ]:
+        wrapper = BuildBlockWrapper()
+        wrapper.parse_cmd_to_operator(cmd, 'filter')
+        expected = brute_test_instances(wrapper, groups)
+        assert expected
+        assert dict(wrapper.test_instances(groups, attr_hash={}, group_hash={})) == expected
+
+
+def test_and_or_skip_the_decided_instances():
+    groups = build_instance_groups()
+    questions = [ length(g[UNREWRITTEN_RID].get_entry('question')) for g in groups ]
+    for cmd, undecided in [
+        ('length(question) > 3 and counted_length(context) > 1', sum([ q > 3 for q in questions ])),
+        ('length(question) > 3 or counted_length(context) > 1', sum([ q <= 3 for q in questions ])) ]:
+        COUNTED.clear()
+        wrapper = BuildBlockWrapper()
+        wrapper.parse_cmd_to_operator(cmd, 'filter')
+        assert dict(wrapper.test_instances(groups, attr_hash={}, group_hash={})) == \
+            brute_test_instances(wrapper, groups)
+        assert COUNTED == [ undecided ]
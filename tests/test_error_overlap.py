@@ -0,0 +1,73 @@
+import random
+import functools
+import itertools
+import pytest
+import numpy as np
+
+from errudite.builts import ErrorOverlap, Group
+from errudite.targets.instance import Instance
+from errudite.targets.label import Label
+
+
+MODELS = [ 'a', 'b', 'c' ]
+
+
+@pytest.fixture
+def build_instances(build_label_instances):
+    return functools.partial(build_label_instances, MODELS, 
+        n=200, missing_rate=0.1, f1s=[ 0, 0.3, 1, 1 ], with_confidence=False)
+
+
+def test_evaluate_equals_brute_force(build_instances):
+    keys = build_instances()
+    group = random.Random(1).sample(keys, 60)
+    output = ErrorOverlap(MODELS + [ 'missing' ]).evaluate({ 'all': None, 'group': group })
+    assert output['models'] == MODELS
+    for group_output, group_keys in zip(output['groups'], [ keys, group ]):
+        incorrect = { (key, m): Instance.get(key).is_incorrect(m) for key in group_keys for m in MODELS }
+        counts = {}
+        for key in group_keys:
+            pattern = tuple([ m for m in MODELS if incorrect[(key, m)] ])
+            counts[pattern] = counts.get(pattern, 0) + 1
+        assert { tuple(p['incorrect']): p['count'] for p in group_output['patterns'] } == counts
+        for (i, a), (j, b) in itertools.product(enumerate(MODELS), repeat=2):
+            assert group_output['overlaps'][i][j] == \
+                sum([ incorrect[(key, a)] and incorrect[(key, b)] for key in group_keys ])
+            assert group_output['regressions'][i][j] == \
+                sum([ not incorrect[(key, a)] and incorrect[(key, b)] for key in group_keys ])
+        means = [ np.mean([ Instance.get(key).get_perform(m) for key in group_keys ]) for m in MODELS ]
+        assert np.allclose(group_output['metrics'], means)
+        assert np.allclose(group_output['metric_deltas'], np.array(means)[None, :] - np.array(means)[:, None])
+
+
+def test_slice_model_compare_equals_the_instance_path(build_instances):
+    keys = build_instances()
+    group = keys[:80]
+    # a copy of the hash skips the table, and checks every instance instead.
+    for models in [ [ 'a', 'b' ], [ 'c', 'a' ] ]:
+        assert Group.eval_slice_model_compare(models, group) == \
+            Group.eval_slice_model_compare(models, group, instance_hash=dict(Instance.instance_hash))
+
+
+def test_replaced_model_is_read_again(build_instances):
+    keys = build_instances(n=20)
+    before = ErrorOverlap([ 'a' ]).evaluate({ 'all': None })
+    labels = {}
+    for key in keys:
+        label = Label('a', key.qid, 'text', 0)
+        label.perform = { 'f1': 0 }
+        labels[key] = label
+    Label.performance_table.add_model('a', labels)
+    after = ErrorOverlap([ 'a' ]).evaluate({ 'all': None })
+    assert after['groups'][0]['error_counts'] == [ 20 ]
+    assert before['groups'][0]['error_counts'] != after['groups'][0]['error_counts']
+
+
+def test_extra_models_are_dropped_with_a_warning(build_instances, caplog):
+    build_instances(n=5)
+    models = [ f'm{i}' for i in range(20) ]
+    for model in models:
+        Label.performance_table.add_model(model, {})
+    output = ErrorOverlap(MODELS + models).evaluate({ 'all': None })
+    assert output['models'] == (MODELS + models)[:16]
+    assert str(models[13:]) in caplog.text
@@ -0,0 +1,93 @@
+from errudite.rewrites.rewrite import Rewrite
+from errudite.rewrites.flip_stats import FlipStats
+from errudite.targets.instance import Instance
+from errudite.targets.label import Label
+from errudite.targets.interfaces import InstanceKey
+
+
+def make_prediction(qid: str, vid: int, text: str, correct: bool) -> Label:
+    prediction = Label('m', qid, text, vid)
+    prediction.set_perform(accuracy=int(correct), confidence=0.5)
+    return prediction
+
+
+def save_instance(qid: str, vid: int, correct: bool, rid: str='r1') -> InstanceKey:
+    base_key = InstanceKey(qid=qid, vid=0) if vid else None
+    instance = Instance(qid=qid, vid=vid, rid=rid if vid else Instance.selected_rewrite, base_key=base_key)
+    instance.set_entries(predictions=[ make_prediction(qid, vid, str(correct), correct) ])
+    Instance.save(instance)
+    return instance.key()
+
+
+def make_rewrite(rid: str='r1') -> Rewrite:
+    rewrite = Rewrite(rid=rid, category='auto', description='', target_cmd='question')
+    Rewrite.save(rewrite)
+    return rewrite
+
+
+def setup_function():
+    Instance.set_entry_keys([ 'question', 'predictions' ])
+    Label.set_task_evaluator(lambda pred, labels: {}, 'accuracy')
+    for name in list(Rewrite.keys()):
+        Rewrite._remove_by_name(name)
+
+
+def test_update_adds_and_drops_rows():
+    rewrite = make_rewrite()
+    for qid in [ 'q1', 'q2' ]:
+        save_instance(qid, 0, correct=True)
+        rewrite.add_instance(save_instance(qid, 1, correct=False))
+    stats = FlipStats()
+    assert stats.update([ rewrite ], models=[ 'm' ]) == 2
+    assert stats.evaluate([ 'r1' ])['flip_to_incorrect'][0, 0, 0] == 2
+    rewrite.remove_instance(InstanceKey(qid='q1', vid=1))
+    assert stats.update([ rewrite ], models=[ 'm' ]) == 0
+    assert stats.evaluate([ 'r1' ])['flip_to_incorrect'][0, 0, 0] == 1
+
+
+def test_replaced_instance_is_recomputed():
+    rewrite = make_rewrite()
+    save_instance('q1', 0, correct=True)
+    rewrite.add_instance(save_instance('q1', 1, correct=False))
+    stats = FlipStats()
+    stats.update([ rewrite ], models=[ 'm' ])
+    # the same key now holds another rewritten instance.
+    save_instance('q1', 1, correct=True)
+    assert stats.update([ rewrite ], models=[ 'm' ]) == 1
+    counts = stats.evaluate([ 'r1' ])
+    assert counts['flip_to_incorrect'][0, 0, 0] == 0
+    assert counts['unflip'][0, 0, 0] == 1
+
+
+def test_removed_rule_does_not_leak_into_a_recreated_one():
+    save_instance('q1', 0, correct=True)
+    rewrite = make_rewrite()
+    rewrite.add_instance(save_instance('q1', 1, correct=False))
+    Rewrite.flip_stats.update([ rewrite ], models=[ 'm' ])
+    Rewrite.remove_saved('r1')
+    # recreated with the same rid, and the same (reused) key, but not flipped.
+    recreated = make_rewrite()
+    recreated.add_instance(save_instance('q1', 1, correct=True))
+    Rewrite.flip_stats.update([ recreated ], models=[ 'm' ])
+    counts = Rewrite.flip_stats.evaluate([ 'r1' ])
+    assert counts['flip_to_incorrect'][0, 0, 0] == 0
+    assert counts['rewritten'][0, 0, 0] == 1
+
+
+def test_hot_added_model_is_counted():
+    rewrite = make_rewrite()
+    Label.performance_table.set_rows([ InstanceKey(qid='q1', vid=0) ])
+    save_instance('q1', 0, correct=True)
+    rewrite.add_instance(save_instance('q1', 1, correct=False))
+    stats = FlipStats()
+    stats.update([ rewrite ])
+    assert stats.models == [ 'm' ]
+    # a second model gets its predictions after the stats are computed.
+    for key, correct in [ (InstanceKey(qid='q1', vid=0), True), (InstanceKey(qid='q1', vid=1), False) ]:
+        instance = Instance.get(key)
+        prediction = Label('new', key.qid, 'new', key.vid)
+        prediction.set_perform(accuracy=int(correct), confidence=0.5)
+        instance.set_entries(predictions=instance.get_entry('predictions') + [ prediction ])
+    stats.update([ rewrite ])
+    assert stats.models == [ 'm', 'new' ]
+    assert stats.evaluate([ 'r1' ], models=[ 'new' ])['flip_to_incorrect'][0, 0, 0] == 1
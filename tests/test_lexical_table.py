@@ -0,0 +1,53 @@
+import os
+
+from errudite.utils import set_cache_folder, load_caches
+from errudite.processor.lexical_table import LexicalTable
+
+
+class Vocab(object):
+    def has_vector(self, word: str) -> bool:
+        return False
+
+
+class CountingTable(LexicalTable):
+    """A lexical table without WordNet, and a counter of the computed lemmas."""
+    def __init__(self):
+        LexicalTable.__init__(self, Vocab())
+        self.computed = []
+
+    def _compute(self, lemma: str, pos: str):
+        self.computed.append((lemma, pos))
+        return { 'synonym': [ f'{lemma}_syn' ], 'antonym': [ f'{lemma}_ant' ] }
+
+
+def test_round_trip():
+    table = CountingTable()
+    assert table.lookup('good', 'ADJ', 'synonym') == [ 'good_syn' ]
+    assert table.lookup('good', 'ADJ', 'antonym') == [ 'good_ant' ]
+    assert table.lookup('run', 'NUM', 'synonym') == [ 'run_syn' ]
+    assert table.computed == [ ('good', 'ADJ'), ('run', None) ]
+    table.dump()
+    reloaded = CountingTable()
+    assert reloaded.lookup('good', 'ADJ', 'antonym') == [ 'good_ant' ]
+    assert reloaded.lookup('run', 'VERB', 'synonym') == [ 'run_syn' ]
+    assert reloaded.computed == [ ('run', 'VERB') ]
+    assert { k: v for k, v in reloaded.table.items() if k != ('run', 'VERB') } == table.table
+
+
+def test_changed_cache_folder_is_merged(tmp_path):
+    table = CountingTable()
+    table.lookup('good', 'ADJ', 'synonym')
+    table.dump()
+    # another table is saved in a second folder.
+    set_cache_folder(str(tmp_path / 'other'))
+    other = CountingTable()
+    other.lookup('bad', 'ADJ', 'synonym')
+    other.dump()
+    # the first table reads the new folder before its lookups and saves.
+    assert table.lookup('bad', 'ADJ', 'synonym') == [ 'bad_syn' ]
+    assert table.computed == [ ('good', 'ADJ') ]
+    table.lookup('fast', 'ADV', 'synonym')
+    table.dump()
+    saved = load_caches(os.path.join(str(tmp_path / 'other'), 'lexical_table.pkl'))
+    assert set(saved) == { ('good', 'ADJ'), ('bad', 'ADJ'), ('fast', 'ADV') }
+    assert set(load_caches(os.path.join(str(tmp_path), 'lexical_table.pkl'))) == { ('good', 'ADJ') }
@@ -0,0 +1,92 @@
+import functools
+import pytest
+
+from errudite.targets.instance import Instance
+from errudite.targets.label import Label
+from errudite.targets.interfaces import InstanceKey
+from errudite.targets.performance_table import PerformanceTable
+from errudite.utils.check import DSLValueError
+from errudite.build_blocks.prim_funcs.perform import perform
+
+
+MODELS = [ 'a', 'b' ]
+
+
+@pytest.fixture
+def build_instances(build_label_instances):
+    return functools.partial(build_label_instances, MODELS)
+
+
+def brute_get_perform(instance: Instance, model: str, metric: str) -> float:
+    prediction = instance.get_entry('prediction', model)
+    return prediction.get_perform(metric) if prediction else 0
+
+
+def test_table_reads_match_the_labels(build_instances):
+    keys = build_instances()
+    table = Label.performance_table
+    assert table.values.dtype.name == 'float64'
+    for key in keys:
+        instance = Instance.get(key)
+        for model in MODELS:
+            for metric in [ 'f1', 'confidence' ]:
+                # float64 storage: the exact values, not rounded copies.
+                assert instance.get_perform(model, metric) == brute_get_perform(instance, model, metric)
+            prediction = instance.get_entry('prediction', model)
+            assert instance.is_incorrect(model) == (prediction.is_incorrect() if prediction else False)
+    for model in MODELS:
+        mask = table.incorrect_mask(model, 'f1')
+        assert [ bool(mask[table.rows[key]]) for key in keys ] == \
+            [ Instance.get(key).is_incorrect(model) for key in keys ]
+
+
+def test_unknown_metric_is_none(build_instances):
+    keys = build_instances()
+    table = Label.performance_table
+    key = next(key for key in keys if table.has_label[table.rows[key], table.model_idxes['a']])
+    assert table.get(key, 'a', 'f2') is None
+    assert table.get(key, 'missing', 'f1') is None
+    # the same answer as the labels, instead of a silent 0 from the table.
+    instance = Instance.get(key)
+    assert instance.get_perform('a', 'f2') == instance.get_entry('prediction', 'a').get_perform('f2')
+    with pytest.raises(DSLValueError):
+        perform('missing', instance.get_entry('predictions'), 'f1')
+
+
+def test_missing_metric_of_one_prediction_is_none(build_instances):
+    keys = build_instances(n=2)
+    prediction = Instance.get(keys[0]).get_entry('predictions')[0]
+    prediction.set_perform(f1=1, confidence=1, sent=1)
+    assert Label.performance_table.get(keys[0], prediction.model, 'sent') == 1
+    for model in MODELS:
+        assert Label.performance_table.get(keys[1], model, 'sent') is None
+
+
+def test_covers(build_instances):
+    keys = build_instances(n=10)
+    table = PerformanceTable()
+    assert not table.covers(keys)
+    table = Label.performance_table
+    assert table.covers(keys) and table.covers(Instance.instance_hash)
+    assert table.covers({ key: True for key in keys[:3] })
+    assert table.covers(iter(keys[:3]))
+    assert not table.covers(keys + [ InstanceKey(qid='x', vid=0) ])
+    assert not table.covers([ InstanceKey(qid='0', vid=1) ])
+
+
+def test_add_model_replaces_the_slice(build_instances):
+    keys = build_instances(n=20)
+    table = Label.performance_table
+    labels = {}
+    for key in keys:
+        label = Label('a', key.qid, 'text', 0)
+        label.perform = { 'f1': 1 }
+        labels[key] = label
+    labels[keys[0]] = None
+    table.add_model('a', labels)
+    assert table.get(keys[0], 'a', 'f1') is None
+    assert all([ table.get(key, 'a', 'f1') == 1 for key in keys[1:] ])
+    assert table.count_incorrect('a', 'f1') == 0
+    # the other model is untouched.
+    for key in keys:
+        assert Instance.get(key).get_perform('b', 'f1') == brute_get_perform(Instance.get(key), 'b', 'f1')
@@ -0,0 +1,74 @@
+import time
+import pytest
+
+from errudite.predictors.predictor import Predictor
+from errudite.predictors.prediction_cache import PredictionCache
+from errudite.predictors.vqa.predictor_vqa import PredictorVQA
+
+
+class CountingVQA(PredictorVQA):
+    """A VQA predictor with its own argument names, and a counter of the model runs."""
+    def __init__(self, name: str='counting'):
+        PredictorVQA.__init__(self, name, '', model=None)
+        self.calls = []
+
+    def predict(self, question, image):
+        self.calls.append((question, image))
+        return { 'text': f'{question}@{image}' }
+
+
+@pytest.fixture(autouse=True)
+def prediction_cache():
+    default = Predictor.prediction_cache
+    Predictor.prediction_cache = PredictionCache()
+    yield Predictor.prediction_cache
+    Predictor.prediction_cache.close()
+    Predictor.prediction_cache = default
+
+
+def test_disabled_by_default():
+    assert not PredictionCache().is_enabled()
+    predictor = CountingVQA()
+    for _ in range(2):
+        assert predictor.cached_predict(qtext='what', img_id='1') == { 'text': 'what@1' }
+    assert len(predictor.calls) == 2
+
+
+def test_cached_outputs_equal_the_model_outputs(prediction_cache, tmp_path):
+    prediction_cache.file_path = str(tmp_path / 'cache.sqlite')
+    prediction_cache.set_max_size()
+    predictor = CountingVQA()
+    inputs = [ { 'qtext': q, 'img_id': '1' } for q in [ 'a', 'b', 'a' ] ]
+    expected = predictor.predict_batch(inputs)
+    predictor.calls = []
+    assert predictor.cached_predict_batch(inputs) == expected
+    # the duplicated input is only predicted once.
+    assert predictor.calls == [ ('a', '1'), ('b', '1') ]
+    assert predictor.cached_predict_batch(inputs) == expected
+    assert len(predictor.calls) == 2
+    # a different predictor does not share the outputs.
+    other = CountingVQA('other')
+    other.cached_predict_batch(inputs)
+    assert len(other.calls) == 2
+    # persisted across the cache objects.
+    Predictor.prediction_cache = PredictionCache(file_path=prediction_cache.file_path)
+    Predictor.prediction_cache.set_max_size()
+    predictor.calls = []
+    assert predictor.cached_predict_batch(inputs) == expected
+    assert predictor.calls == []
+    Predictor.prediction_cache.close()
+
+
+def test_least_recently_used_are_evicted(prediction_cache, tmp_path):
+    prediction_cache.file_path = str(tmp_path / 'cache.sqlite')
+    prediction_cache.set_max_size()
+    predictor = CountingVQA()
+    keys = [ prediction_cache.get_key(predictor, { 'qtext': q, 'img_id': '1' }) for q in 'abc' ]
+    for key in [ keys[1], keys[0], keys[2] ]:
+        prediction_cache.set_many({ key: 'x' * 100 })
+        time.sleep(0.01)
+    # 'b' is the least recently used.
+    prediction_cache.set_max_size(prediction_cache.total_size - 1)
+    assert set(prediction_cache.get_many(keys)) == { keys[0], keys[2] }
+    prediction_cache.set_max_size(0)
+    assert prediction_cache.get_many(keys) == {}
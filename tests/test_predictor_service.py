@@ -0,0 +1,71 @@
+import threading
+import pytest
+
+from errudite.predictors.predictor import Predictor
+from errudite.predictors.predictor_service import PredictorService
+
+
+class CountingPredictor(Predictor):
+    """A predictor that records the size of each batch, and fails on 'error'."""
+    def __init__(self):
+        Predictor.__init__(self, 'counting', '', model=None, perform_metrics=[])
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def predict(self, text):
+        return { 'text': text.upper() }
+
+    def predict_batch(self, inputs):
+        with self.lock:
+            self.batches.append(len(inputs))
+        if any([ i['text'] == 'error' for i in inputs ]):
+            raise ValueError('bad input')
+        return Predictor.predict_batch(self, inputs)
+
+
+def test_requests_are_run_in_micro_batches():
+    predictor = CountingPredictor()
+    service = PredictorService(predictor, max_batch_size=4, max_wait_ms=500)
+    texts = [ str(i) for i in range(10) ]
+    assert service.predict_batch([ { 'text': t } for t in texts ]) == \
+        [ { 'text': t.upper() } for t in texts ]
+    assert predictor.batches == [ 4, 4, 2 ]
+    service.shutdown()
+
+
+def test_concurrent_callers_share_a_batch():
+    predictor = CountingPredictor()
+    service = PredictorService(predictor, max_batch_size=32, max_wait_ms=500)
+    outputs = {}
+    def call(text):
+        outputs[text] = service.predict(text=text)
+    threads = [ threading.Thread(target=call, args=(f'q{i}', )) for i in range(8) ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert outputs == { f'q{i}': { 'text': f'Q{i}' } for i in range(8) }
+    assert sum(predictor.batches) == 8
+    assert len(predictor.batches) < 8
+    service.shutdown()
+
+
+def test_failed_batch_sets_the_exceptions():
+    predictor = CountingPredictor()
+    service = PredictorService(predictor, max_batch_size=2, max_wait_ms=500)
+    futures = service.submit_batch([ { 'text': t } for t in [ 'a', 'error', 'b' ] ])
+    for future in futures[:2]:
+        with pytest.raises(ValueError):
+            future.result()
+    # the worker keeps running after a failed batch.
+    assert futures[2].result() == { 'text': 'B' }
+    service.shutdown()
+
+
+def test_shutdown_runs_the_queued_requests():
+    predictor = CountingPredictor()
+    service = PredictorService(predictor, max_batch_size=2, max_wait_ms=500, n_workers=2)
+    futures = service.submit_batch([ { 'text': t } for t in 'abcde' ])
+    service.shutdown()
+    assert [ f.result(timeout=0) for f in futures ] == [ { 'text': t.upper() } for t in 'abcde' ]
+    assert service.workers == []
@@ -0,0 +1,51 @@
+from spacy.tokens import Doc
+
+from errudite.io.rewritten_store import RewrittenStore
+from errudite.targets.instance import Instance
+from errudite.targets.target import Target
+from errudite.targets.interfaces import InstanceKey
+
+
+def make_instance(qid: str, vid: int, text: str) -> Instance:
+    instance = Instance(qid=qid, vid=vid, rid='rule')
+    instance.set_entries(question=Target(qid, text, vid))
+    return instance
+
+
+def test_flush_does_not_touch_live_docs(tmp_path):
+    store = RewrittenStore(folder=str(tmp_path / 'rewritten'))
+    store.open()
+    instance = make_instance('q1', 1, 'What is a test ?')
+    doc = instance.question.doc
+    store.append(instance)
+    store.flush()
+    # the live instance keeps the same doc object, not the bytes.
+    assert instance.question.doc is doc
+    assert type(instance.question.doc) == Doc
+
+
+def test_flushed_instances_reload(tmp_path):
+    folder = str(tmp_path / 'rewritten')
+    store = RewrittenStore(folder=folder)
+    store.open()
+    store.append(make_instance('q1', 1, 'What is a test ?'))
+    store.append(make_instance('q1', 2, 'What is an exam ?'))
+    store.flush()
+    store.remove(InstanceKey(qid='q1', vid=1))
+    store.flush()
+
+    reopened = RewrittenStore(folder=folder)
+    assert reopened.open() == 1
+    assert InstanceKey(qid='q1', vid=1) not in reopened
+    loaded = reopened.get(InstanceKey(qid='q1', vid=2))
+    assert loaded.question.doc.text == 'What is an exam ?'
+
+
+def test_next_vid_skips_the_vids_in_use():
+    for vid in [ 0, 1, 2, 3 ]:
+        Instance.qid_hash['q1'].append(InstanceKey(qid='q1', vid=vid))
+    assert Instance.get_next_vid('q1') == 4
+    # with len(), removing vid 1 would hand out vid 3 again.
+    Instance.remove_saved(InstanceKey(qid='q1', vid=1))
+    assert Instance.get_next_vid('q1') == 4
+    assert Instance.get_next_vid('unknown') == 1
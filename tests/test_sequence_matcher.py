@@ -0,0 +1,98 @@
+import sys
+import random
+import numpy as np
+
+from errudite.targets.interfaces import OpcodeMeta
+from errudite.rewrites.helpers import sequence_matcher, sequence_matcher_batch
+from errudite.rewrites.semantic_rule_detector import SemanticRuleDetector
+
+
+def brute_sequence_matcher(source, target, cost=None, merge=True):
+    # the original one-cell-at-a-time DP.
+    m, n = len(source), len(target)
+    distance = np.zeros((m + 1, n + 1))
+    operation = np.zeros((m + 1, n + 1))
+    distance[0, :] = np.array(range(n + 1))
+    distance[:, 0] = np.array(range(m + 1))
+    for i in range(1, m + 1):
+        for j in range(1, n + 1):
+            if cost is None:
+                cost_insert = distance[i - 1, j] + 1
+                cost_delete = distance[i, j - 1] + 1
+                cost_sub = distance[i - 1, j - 1] + (0 if source[i - 1] == target[j - 1] else 2)
+            else:
+                cost_insert = distance[i - 1, j] + \
+                    cost['insert'].setdefault(source[i - 1], sys.float_info.max / 1000.0)
+                cost_delete = distance[i, j - 1] + \
+                    cost['delete'].setdefault(target[j - 1], sys.float_info.max / 1000.0)
+                cost_sub = distance[i - 1, j - 1] + (0 if source[i - 1] == target[j - 1] else \
+                    cost['replace'].setdefault((source[i - 1], target[j - 1]), sys.float_info.max / 1000.0))
+            min_cost = min(cost_insert, cost_delete, cost_sub)
+            distance[i, j] = min_cost
+            if cost_sub == min_cost and source[i - 1] != target[j - 1]:
+                operation[i, j] = 3
+            elif cost_insert == min_cost:
+                operation[i, j] = 2
+            elif cost_delete == min_cost:
+                operation[i, j] = 1
+    edits_op = []
+    cur_i, cur_j = m, n
+    while cur_i > 0 and cur_j > 0:
+        if operation[cur_i, cur_j] == 1:
+            edits_op.insert(0, { 'etype': 'insert', 'source': cur_i - 1, 'target': cur_j - 1 })
+            cur_j -= 1
+        elif operation[cur_i, cur_j] == 2:
+            edits_op.insert(0, { 'etype': 'delete', 'source': cur_i - 1, 'target': cur_j - 1 })
+            cur_i -= 1
+        else:
+            etype = 'replace' if source[cur_i - 1] != target[cur_j - 1] else 'equal'
+            edits_op.insert(0, { 'etype': etype, 'source': cur_i - 1, 'target': cur_j - 1 })
+            cur_i -= 1
+            cur_j -= 1
+    revised_ops, op = [], ''
+    from_start, from_end, to_start, to_end = 0, 0, 0, 0
+    for idx, edit in enumerate(edits_op):
+        if not merge or edit['etype'] != op:
+            if op != '':
+                revised_ops.append(OpcodeMeta(op=op, fromIdxes=(from_start, from_end), toIdxes=(to_start, to_end)))
+            from_start, to_start = from_end, to_end
+        op = edit['etype']
+        from_end, to_end = edit['source'] + 1, edit['target'] + 1
+        if idx == len(edits_op) - 1:
+            revised_ops.append(OpcodeMeta(op=op, fromIdxes=(from_start, from_end), toIdxes=(to_start, to_end)))
+    return { 'dist': min(distance[m, n], 8), 'edits': revised_ops }
+
+
+def build_pairs(n: int=200, seed: int=0):
+    rand = random.Random(seed)
+    words = [ 'what', 'is', 'the', 'a', 'dog', 'cat', 'NOUN', 'VERB' ]
+    return [ (rand.choices(words, k=rand.randint(0, 8)), rand.choices(words, k=rand.randint(0, 8))) \
+        for _ in range(n) ]
+
+
+def test_batch_equals_the_original_dp():
+    pairs = build_pairs()
+    for merge in [ True, False ]:
+        expected = [ brute_sequence_matcher(a, b, merge=merge) for a, b in pairs ]
+        assert sequence_matcher_batch(pairs, merge=merge) == expected
+        assert [ sequence_matcher(a, b, merge=merge) for a, b in pairs ] == expected
+    assert sequence_matcher_batch([]) == []
+
+
+def test_batch_equals_the_original_dp_with_costs():
+    pairs = build_pairs(n=50, seed=1)
+    cost = {
+        'insert': { 'the': 0.5, 'a': 0.5, 'is': 1 },
+        'delete': { 'the': 0.5, 'a': 0.5, 'dog': 1 },
+        'replace': { ('dog', 'cat'): 0.3, ('the', 'a'): 0.1 } }
+    expected = [ brute_sequence_matcher(a, b, cost={ k: dict(v) for k, v in cost.items() }) for a, b in pairs ]
+    assert sequence_matcher_batch(pairs, cost={ k: dict(v) for k, v in cost.items() }) == expected
+
+
+def test_detector_aligns_the_pairs_in_batch():
+    pairs = build_pairs(n=30, seed=2)
+    detector = SemanticRuleDetector()
+    assert detector._get_rewrite_ops_text_batch(pairs, merge=True, use_natural=False) == \
+        [ brute_sequence_matcher(a, b)['edits'] for a, b in pairs ]
+    assert detector._get_rewrite_ops_text_batch(pairs, merge=True, use_natural=True) == \
+        [ detector._get_rewrite_ops_text(a, b, merge=True, use_natural=True) for a, b in pairs ]
@@ -0,0 +1,71 @@
+from errudite.io.dataset_reader import DatasetReader
+from errudite.targets.instance import Instance
+from errudite.targets.interfaces import InstanceKey
+from errudite.targets.type_columns import TypeColumns, QUESTION_COLUMN, GROUNDTRUTH_COLUMN
+from errudite.targets.vqa.question import VQAQuestion
+from errudite.targets.vqa.answer import VQAAnswer
+from errudite.build_blocks.prim_funcs.types import question_type, answer_type
+
+
+def setup_function():
+    Instance.set_entry_keys([ 'question', 'groundtruths', 'predictions' ])
+
+
+def build_instances(predictions: dict):
+    instances = []
+    for qid, (question, groundtruth) in enumerate([ ('is it red', 'yes'), ('how many dogs', '2'), ('what is it', 'cat') ]):
+        qid = str(qid)
+        instance = Instance(qid=qid, vid=0)
+        instance.set_entries(
+            question=VQAQuestion(qid=qid, text=question, img_id='0'),
+            groundtruths=[ VQAAnswer('groundtruth', qid, groundtruth, 3) ],
+            predictions=[ VQAAnswer('m', qid, predictions[qid], 1) ])
+        Instance.save(instance)
+        instances.append(instance)
+    return instances
+
+
+def test_types_are_classified_in_the_columns(tmp_path):
+    instances = build_instances({ '0': 'no', '1': '3', '2': 'dog' })
+    # nothing is classified when the targets are constructed.
+    for instance in instances:
+        assert 'question_type' not in instance.get_entry('question').__dict__
+        assert 'answer_type' not in instance.get_entry('prediction', 'm').__dict__
+    computed = DatasetReader(str(tmp_path)).compute_type_columns(instances)
+    assert computed == [ QUESTION_COLUMN, GROUNDTRUTH_COLUMN, 'm' ]
+    columns = Instance.type_columns
+    keys = [ i.key() for i in instances ]
+    assert columns.get_column('m', keys) == [ 'yes/no', 'number', 'other' ]
+    assert columns.get_column(GROUNDTRUTH_COLUMN, keys) == [ 'yes/no', 'number', 'other' ]
+    assert columns.get_column(QUESTION_COLUMN, keys) == [
+        i.get_entry('question').get_question_type() for i in instances ]
+    assert [ answer_type(i.get_entry('prediction', 'm')) for i in instances ] == [ 'yes/no', 'number', 'other' ]
+    assert question_type(instances[1].get_entry('question')) == 'how'
+
+
+def test_replaced_predictions_are_recomputed(tmp_path):
+    reader = DatasetReader(str(tmp_path))
+    instances = build_instances({ '0': 'no', '1': '3', '2': 'dog' })
+    reader.compute_type_columns(instances)
+    assert reader.compute_type_columns(instances) == []
+    # regenerated predictions, with the same instance rows.
+    for instance, text in zip(instances, [ 'red', 'yes', '4' ]):
+        instance.set_entries(predictions=[ VQAAnswer('m', instance.qid, text, 1) ])
+    assert reader.compute_type_columns(instances) == [ 'm' ]
+    keys = [ i.key() for i in instances ]
+    assert Instance.type_columns.get_column('m', keys) == [ 'other', 'yes/no', 'number' ]
+    assert answer_type(instances[2].get_entry('prediction', 'm')) == 'number'
+
+
+def test_signatures_are_saved():
+    instances = build_instances({ '0': 'no', '1': '3', '2': 'dog' })
+    reader = DatasetReader()
+    reader.compute_type_columns(instances)
+    raw = Instance.type_columns.serialize()
+    Instance.type_columns = TypeColumns.create_from_json(raw)
+    assert reader.compute_type_columns(instances) == []
+    # a file saved without signatures is recomputed once.
+    del raw['signatures']
+    Instance.type_columns = TypeColumns.create_from_json(raw)
+    assert reader.compute_type_columns(instances) == [ QUESTION_COLUMN, GROUNDTRUTH_COLUMN, 'm' ]
+    assert Instance.type_columns.get(QUESTION_COLUMN, InstanceKey(qid='1', vid=0)) == 'how'